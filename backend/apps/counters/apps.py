@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class CountersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.counters'
+
+    # Models whose total row count is kept up to date.
+    counted_models = ("recipes.Recipe", "users.User")
+
+    def ready(self) -> None:
+        from . import signals
+
+        signals.connect_counted_models(
+            [self.apps.get_model(label) for label in self.counted_models])
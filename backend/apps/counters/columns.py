@@ -0,0 +1,84 @@
+"""
+Denormalized counter columns.
+
+Counters such as `Recipe.like_count` or `User.follower_count` are shifted
+with `F()` updates by `adjust_counter` so lists can show them without
+counting rows, and `reconcile_counters` recounts them from scratch to fix
+any drift.
+"""
+from __future__ import annotations
+
+import operator
+from functools import reduce
+from typing import Any, Iterable
+
+from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def adjust_counter(
+        model: type[models.Model],
+        pk: int,
+        field: str,
+        amount: int,
+        **extra: Any
+) -> None:
+    """
+    Atomically shift a counter column of one row by the given amount,
+    never going below zero, along with any extra column values
+    """
+    model._base_manager.filter(pk=pk).update(
+        **{field: Greatest(F(field) + amount, 0)}, **extra)
+
+
+def adjust_counters(
+        model: type[models.Model],
+        pks: Iterable[int],
+        field: str,
+        amount: int
+) -> None:
+    """Atomically shift a counter column of several rows by one amount"""
+    model._base_manager.filter(pk__in=pks).update(
+        **{field: Greatest(F(field) + amount, 0)})
+
+
+def _count_of(child: type[models.Model], field: str) -> Coalesce:
+    """Correlated count of the child rows pointing at the outer row"""
+    return Coalesce(Subquery(
+        child._base_manager.filter(**{field: OuterRef("pk")}).order_by(
+        ).values(field).annotate(count=Count("pk")).values("count")
+    ), 0)
+
+
+def reconcile_counters(
+        model: type[models.Model],
+        counters: dict[str, tuple[type[models.Model], str]],
+        batch_size: int = 1000,
+        **extra: Any
+) -> int:
+    """
+    Recount counter columns from the child rows they count, given as
+    `{column: (child model, foreign key field)}`, with one UPDATE per batch
+    of primary keys so no single statement locks the whole table. Only
+    rows whose stored counts drifted are written, along with any extra
+    column values. Returns the number of rows updated.
+    """
+    values = {
+        column: _count_of(child, field)
+        for column, (child, field) in counters.items()
+    }
+    drifted = reduce(operator.or_, (
+        ~Q(**{column: value}) for column, value in values.items()))
+    updated = 0
+    last_pk = 0
+    while True:
+        pks: list[int] = list(model._base_manager.filter(
+            pk__gt=last_pk).order_by("pk").values_list(
+            "pk", flat=True)[:batch_size])
+        if not pks:
+            return updated
+        updated += model._base_manager.filter(
+            drifted, pk__gt=last_pk, pk__lte=pks[-1]
+        ).update(**values, **extra)
+        last_pk = pks[-1]
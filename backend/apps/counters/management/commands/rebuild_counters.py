@@ -0,0 +1,15 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from apps.counters.models import RowCounter
+
+
+class Command(BaseCommand):
+    help = "Recount the rows of every counted model to fix any drift"
+
+    def handle(self, *args, **options) -> None:
+        config = apps.get_app_config("counters")
+        for label in config.counted_models:
+            model = apps.get_model(label)
+            value: int = RowCounter.objects.rebuild(model)
+            self.stdout.write(f"{model._meta.label_lower}: {value}")
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from django.db import models
+from django.db.models import F
+
+
+class RowCounterManager(models.Manager):
+
+    def get_count(self, model: type[models.Model]) -> int:
+        """Read the maintained row count of a model, seeding it if missing"""
+        value = self.filter(label=model._meta.label_lower).values_list(
+            "value", flat=True).first()
+        if value is None:
+            return self.rebuild(model)
+        return value
+
+    def increment(self, model: type[models.Model], amount: int = 1) -> None:
+        """Atomically shift the row count of a model by the given amount"""
+        updated: int = self.filter(label=model._meta.label_lower).update(
+            value=F("value") + amount)
+        if not updated:
+            # No counter yet, so count the table which already includes
+            # the change being recorded.
+            self.rebuild(model)
+
+    def rebuild(self, model: type[models.Model]) -> int:
+        """Recount a model's rows from scratch and store the result"""
+        value: int = model._default_manager.count()
+        self.update_or_create(
+            label=model._meta.label_lower, defaults={"value": value})
+        return value
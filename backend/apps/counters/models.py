@@ -0,0 +1,23 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .managers import RowCounterManager
+
+
+class RowCounter(models.Model):
+    """
+    Store the total number of rows of a model so list endpoints can read it
+    without running a COUNT(*) over the whole table.
+
+    Kept up to date by signals whenever a counted model is created or
+    deleted. Code paths that skip signals, such as `bulk_create`, must call
+    `RowCounter.objects.increment` themselves.
+    """
+
+    label = models.CharField(_("Model label"), max_length=100, unique=True)
+    value = models.BigIntegerField(_("Row count"), default=0)
+
+    objects = RowCounterManager()
+
+    def __str__(self) -> str:
+        return f"{self.label}: {self.value}"
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from django.db import models
+from django.db.models.signals import post_save, post_delete
+
+from .models import RowCounter
+
+
+def count_created(
+        sender: type[models.Model],
+        instance: models.Model,
+        created: bool,
+        raw: bool = False,
+        **kwargs
+) -> None:
+    if created and not raw:
+        RowCounter.objects.increment(sender, 1)
+
+
+def count_deleted(
+        sender: type[models.Model], instance: models.Model, **kwargs) -> None:
+    RowCounter.objects.increment(sender, -1)
+
+
+def connect_counted_models(counted_models: list[type[models.Model]]) -> None:
+    """Keep the row counters of the given models in sync with their tables"""
+    for model in counted_models:
+        post_save.connect(
+            count_created,
+            sender=model,
+            dispatch_uid=f"count_created_{model._meta.label_lower}"
+        )
+        post_delete.connect(
+            count_deleted,
+            sender=model,
+            dispatch_uid=f"count_deleted_{model._meta.label_lower}"
+        )
@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.counters.models import RowCounter
+from apps.recipes.models import Recipe
+from apps.recipes.tests import RecipeTests
+from apps.users.models import User
+from apps.users.tests import UserTests
+
+
+class RowCounterTests(TestCase):
+
+    def test_counts_follow_creates_and_deletes(self):
+        user = UserTests.get_random_user()
+        self.assertEqual(RowCounter.objects.get_count(Recipe), 0)
+
+        recipe_1 = RecipeTests.get_generated_test_recipe(user)
+        RecipeTests.get_generated_test_recipe(user)
+        self.assertEqual(RowCounter.objects.get_count(Recipe), 2)
+
+        # Updates should not change the count.
+        recipe_1.name = "Renamed recipe"
+        recipe_1.save()
+        self.assertEqual(RowCounter.objects.get_count(Recipe), 2)
+
+        recipe_1.delete()
+        self.assertEqual(RowCounter.objects.get_count(Recipe), 1)
+
+        # Cascaded deletes are counted too.
+        user.delete()
+        self.assertEqual(RowCounter.objects.get_count(Recipe), 0)
+        self.assertEqual(RowCounter.objects.get_count(User), 0)
+
+    def test_list_total_count_skips_table_count(self):
+        user = UserTests.get_random_user()
+        RecipeTests.get_generated_test_recipe(user)
+        RowCounter.objects.get_count(Recipe)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get("/api/recipes/")
+        self.assertEqual(response.data["total_count"], 1)
+        for query in queries.captured_queries:
+            self.assertNotIn("COUNT(", query["sql"].upper())
+
+    def test_rebuild_fixes_drift(self):
+        UserTests.get_random_user()
+        UserTests.get_random_user()
+        RowCounter.objects.filter(label="users.user").update(value=40)
+        self.assertEqual(RowCounter.objects.get_count(User), 40)
+
+        call_command("rebuild_counters", stdout=StringIO())
+        self.assertEqual(RowCounter.objects.get_count(User), 2)
@@ -2,4 +2,10 @@ from django.contrib import admin
 
 from .models import Comment
 
-admin.site.register(Comment)
+
+class CommentAdmin(admin.ModelAdmin):
+    # Each row prints its author's username.
+    list_select_related = ["author"]
+
+
+admin.site.register(Comment, CommentAdmin)
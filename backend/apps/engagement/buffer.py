@@ -0,0 +1,223 @@
+"""
+Write-behind buffering of recipe likes.
+
+With `LIKE_WRITE_BEHIND` enabled, liking or unliking a recipe only records
+the wanted state in this process. Repeated taps by the same user on the
+same recipe collapse into their last state. A background thread writes the
+net result every `LIKE_FLUSH_INTERVAL_MS` milliseconds, or the request
+thread does once `LIKE_FLUSH_MAX_EVENTS` events are waiting. Each flush is
+one transaction: bulk inserts and deletes of likes plus a single counter
+update per recipe, so a viral recipe's row is locked once per flush instead
+of once per like.
+
+Until then, reads add the buffered changes on top of the stored counters so
+users always see their own likes.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+Key = tuple[int, int]  # (recipe id, author id)
+
+
+class LikeEvent(NamedTuple):
+    liked: bool
+    existed: bool  # Whether the like is stored, as of the last flush.
+
+    @property
+    def delta(self) -> int:
+        return int(self.liked) - int(self.existed)
+
+
+def write_likes(events: dict[Key, LikeEvent]) -> dict[int, int]:
+    """
+    Store the wanted like states in one transaction and return the net
+    like count change of every recipe that changed
+    """
+    from apps.counters.columns import adjust_counter
+    from apps.recipes.cache import invalidate_recipe_details
+    from apps.recipes.models import Recipe
+    from apps.users.models import User
+    from .counters import suspend_counters
+    from .live import publish_counts
+    from .models import RecipeLike
+
+    recipe_ids = {recipe_id for recipe_id, _ in events}
+    author_ids = {author_id for _, author_id in events}
+    deltas: Counter[int] = Counter()
+
+    with transaction.atomic(), suspend_counters():
+        # Likes of recipes or by users deleted since they were buffered are
+        # dropped, or their inserts would fail every flush from now on.
+        recipe_ids = set(Recipe.objects.filter(
+            pk__in=recipe_ids).values_list("pk", flat=True))
+        author_ids = set(User.objects.filter(
+            pk__in=author_ids).values_list("pk", flat=True))
+        events = {
+            (recipe_id, author_id): event
+            for (recipe_id, author_id), event in events.items()
+            if recipe_id in recipe_ids and author_id in author_ids
+        }
+
+        # Check what is stored now rather than trusting `existed`, which
+        # another process may have changed since.
+        stored: dict[Key, int] = {
+            (recipe_id, author_id): pk
+            for pk, recipe_id, author_id in RecipeLike.objects.filter(
+                recipe_id__in=recipe_ids, author_id__in=author_ids
+            ).values_list("pk", "recipe_id", "author_id")
+        }
+        to_create = [
+            key for key, event in events.items()
+            if event.liked and key not in stored
+        ]
+        to_delete = [
+            key for key, event in events.items()
+            if not event.liked and key in stored
+        ]
+
+        RecipeLike.objects.bulk_create(
+            RecipeLike(recipe_id=recipe_id, author_id=author_id)
+            for recipe_id, author_id in to_create
+        )
+        if to_delete:
+            RecipeLike.objects.filter(
+                pk__in=[stored[key] for key in to_delete]).delete()
+
+        for recipe_id, _ in to_create:
+            deltas[recipe_id] += 1
+        for recipe_id, _ in to_delete:
+            deltas[recipe_id] -= 1
+        now = timezone.now()
+        for recipe_id, delta in deltas.items():
+            if delta:
+                adjust_counter(
+                    Recipe, recipe_id, "like_count", delta,
+                    counts_updated=now)
+                publish_counts(recipe_id)
+
+    invalidate_recipe_details(list(deltas))
+    return dict(deltas)
+
+
+class LikeBuffer:
+    """Per-process queue of recipe like states waiting to be stored"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: dict[Key, LikeEvent] = {}
+        self._pending_deltas: Counter[int] = Counter()
+        # Events being written by a flush stay visible until it commits.
+        self._flushing: dict[Key, LikeEvent] = {}
+        self._flushing_deltas: Counter[int] = Counter()
+        self._event_count: int = 0
+        self._worker: Optional[threading.Thread] = None
+
+    def record(
+            self,
+            recipe_id: int,
+            author_id: int,
+            liked: bool,
+            existed: bool
+    ) -> None:
+        """
+        Queue the wanted like state of a user on a recipe, given whether the
+        like was stored when the caller last looked
+        """
+        key = (recipe_id, author_id)
+        with self._lock:
+            previous = self._pending.pop(key, None)
+            if previous is not None:
+                existed = previous.existed
+                self._pending_deltas[recipe_id] -= previous.delta
+            elif key in self._flushing:
+                existed = self._flushing[key].liked
+            event = LikeEvent(liked, existed)
+            self._pending[key] = event
+            self._pending_deltas[recipe_id] += event.delta
+            self._event_count += 1
+            full = self._event_count >= settings.LIKE_FLUSH_MAX_EVENTS
+
+        self._ensure_worker()
+        if full:
+            self.flush()
+
+    def pending_delta(self, recipe_id: int) -> int:
+        """Like count change of a recipe not stored yet"""
+        with self._lock:
+            return (
+                self._pending_deltas[recipe_id]
+                + self._flushing_deltas[recipe_id]
+            )
+
+    def pending_deltas(self) -> dict[int, int]:
+        """Like count changes not stored yet of every recipe having any"""
+        with self._lock:
+            deltas = self._pending_deltas.copy()
+            deltas.update(self._flushing_deltas)
+        return {
+            recipe_id: delta for recipe_id, delta in deltas.items() if delta}
+
+    def flush(self) -> None:
+        """Store every buffered event now"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._flushing, self._pending = self._pending, {}
+                self._flushing_deltas, self._pending_deltas = (
+                    self._pending_deltas, Counter())
+                self._event_count = 0
+            try:
+                write_likes(self._flushing)
+            except Exception:
+                self._requeue()
+                raise
+            finally:
+                with self._lock:
+                    self._flushing = {}
+                    self._flushing_deltas = Counter()
+
+    def _requeue(self) -> None:
+        """Put the events of a failed flush back in front of newer ones"""
+        with self._lock:
+            for key, event in self._flushing.items():
+                newer = self._pending.pop(key, None)
+                if newer is not None:
+                    self._pending_deltas[key[0]] -= newer.delta
+                    event = LikeEvent(newer.liked, event.existed)
+                self._pending[key] = event
+                self._pending_deltas[key[0]] += event.delta
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="like-buffer", daemon=True)
+                self._worker.start()
+                atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(settings.LIKE_FLUSH_INTERVAL_MS / 1000)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not flush buffered likes")
+
+
+like_buffer = LikeBuffer()
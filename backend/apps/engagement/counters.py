@@ -0,0 +1,33 @@
+"""
+Denormalized engagement counters.
+
+`Recipe.like_count`, `Recipe.comment_count` and `Comment.like_count` are
+shifted with `apps.counters.columns.adjust_counter` by the signals in
+`signals.py` and the like managers. Code paths that skip signals (such as
+`bulk_create`) or run inside `suspend_counters` must shift them
+themselves.
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+_suspended = threading.local()
+
+
+@contextmanager
+def suspend_counters() -> Iterator[None]:
+    """
+    Stop the signals of this thread from shifting counters, for code that
+    applies the net change of many writes at once
+    """
+    _suspended.active = True
+    try:
+        yield
+    finally:
+        _suspended.active = False
+
+
+def counters_suspended() -> bool:
+    return getattr(_suspended, "active", False)
@@ -0,0 +1,221 @@
+"""
+Live recipe engagement pushed to viewers as Server-Sent Events.
+
+Once a transaction changing a recipe's likes or comments commits, signals
+publish a message on the recipe's channel, and `stream_recipe` forwards
+each message of that channel to every viewer connected to it. Streams are
+coroutines waiting on a queue, so idle viewers hold no worker thread when
+served through `core.asgi` by an ASGI server (such as
+`uvicorn core.asgi:application`). WSGI servers, `runserver` included, would
+buffer a whole stream before sending any of it, so the live endpoint
+refuses requests they serve.
+
+Messages travel through the broker named by `LIVE_BROKER`. The default
+`LocalBroker` only reaches viewers connected to the same process; a broker
+backed by a shared message bus can take its place by implementing the same
+methods.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import AsyncIterator, Container, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+def recipe_channel(recipe_id: int) -> str:
+    return f"recipe:{recipe_id}"
+
+
+class Subscription:
+    """Messages of one channel waiting to be sent to one viewer"""
+
+    # Messages kept for a viewer who falls behind; older ones are dropped
+    # since every message carries the latest state.
+    max_queued: int = 100
+
+    def __init__(self, broker: Broker, channel: str) -> None:
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(self.max_queued)
+
+    def put(self, message: dict) -> None:
+        """Queue a message; must run in the subscriber's event loop"""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+    def __enter__(self) -> Subscription:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.broker.unsubscribe(self)
+
+
+class Broker(ABC):
+    """Pub/sub carrying live messages from publishers to subscribers"""
+
+    @abstractmethod
+    def publish(self, channel: str, message: dict) -> None:
+        """Send a message to every subscriber of a channel"""
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> Subscription:
+        """Start receiving the messages of a channel"""
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop a subscription from receiving messages"""
+
+    def has_subscribers(self, channel: str) -> bool:
+        """
+        Whether publishing to a channel can reach anyone, so publishers can
+        skip building messages nobody reads. Brokers that cannot tell
+        answer yes.
+        """
+        return True
+
+
+class LocalBroker(Broker):
+    """Broker reaching the subscribers of this process only"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: dict[str, set[Subscription]] = defaultdict(set)
+
+    def publish(self, channel: str, message: dict) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.put, message)
+            except RuntimeError:
+                pass  # The subscriber's event loop has shut down.
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def has_subscribers(self, channel: str) -> bool:
+        with self._lock:
+            return bool(self._subscriptions.get(channel))
+
+
+_broker: Optional[Broker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> Broker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.LIVE_BROKER)()
+    return _broker
+
+
+def publish_counts(recipe_id: int) -> None:
+    """
+    Send viewers the recipe's like and comment counts once the current
+    transaction commits
+    """
+    from apps.recipes.models import Recipe
+
+    def publish() -> None:
+        channel = recipe_channel(recipe_id)
+        broker = get_broker()
+        if not broker.has_subscribers(channel):
+            return
+        counts = Recipe.objects.filter(pk=recipe_id).values(
+            "like_count", "comment_count").first()
+        if counts is not None:
+            broker.publish(channel, {"event": "counts", "data": counts})
+
+    transaction.on_commit(publish)
+
+
+def publish_comment(recipe_id: int, comment_id: int) -> None:
+    """Send viewers a new comment once the current transaction commits"""
+    from .models import Comment
+    from .serializers import CommentSerializer
+
+    def publish() -> None:
+        channel = recipe_channel(recipe_id)
+        broker = get_broker()
+        if not broker.has_subscribers(channel):
+            return
+        # Whether each viewer liked a brand new comment is known: they
+        # did not.
+        comment = Comment.objects.for_recipe(
+            recipe_id, AnonymousUser()).filter(pk=comment_id).first()
+        if comment is not None:
+            broker.publish(channel, {
+                "event": "comment", "data": CommentSerializer(comment).data})
+
+    transaction.on_commit(publish)
+
+
+def format_event(event: str, data: object) -> str:
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def stream_recipe(
+        recipe_id: int, excluded_author_ids: Container[int] = ()
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events of a recipe: its current counts first, then every
+    message published on its channel except comments by the excluded
+    authors, with a comment line whenever it is idle so proxies keep the
+    connection open.
+
+    The stream ends after `LIVE_STREAM_MAX_SECONDS` and the browser
+    reconnects on its own, which bounds how long a stream can outlive a
+    viewer who left without the server noticing.
+    """
+    from apps.recipes.models import Recipe
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_STREAM_MAX_SECONDS
+    # Subscribe before reading the counts so no change falls in between.
+    with get_broker().subscribe(recipe_channel(recipe_id)) as subscription:
+        counts = await Recipe.objects.filter(pk=recipe_id).values(
+            "like_count", "comment_count").afirst()
+        yield "retry: 1000\n" + format_event("counts", counts)
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.get(),
+                    min(settings.LIVE_HEARTBEAT_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if message["event"] == "comment":
+                author = message["data"]["author"]
+                if author is not None and author["id"] in excluded_author_ids:
+                    continue
+            yield format_event(message["event"], message["data"])
@@ -0,0 +1,71 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.engagement.models import RecipeLike
+from apps.recipes.models import Recipe
+from core.benchmark import (
+    format_latencies, scratch_database, stopwatch, time_call)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark like inserts and per-recipe like queries on a scratch "
+        "database"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--likes", type=int, default=20_000)
+        parser.add_argument("--recipes", type=int, default=200)
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        rng = random.Random(options["seed"])
+        with scratch_database(on_disk=True):
+            User = get_user_model()
+            authors = -(-options["likes"] // options["recipes"])
+            users = User.objects.bulk_create(
+                User(username=f"fan{index}", email=f"fan{index}@example.com")
+                for index in range(authors)
+            )
+            recipes = Recipe.objects.bulk_create(
+                Recipe(
+                    name=f"Recipe {index}",
+                    description="",
+                    prep_time=5,
+                    cook_time=10,
+                    notes="",
+                    servings=2,
+                    author=users[0]
+                )
+                for index in range(options["recipes"])
+            )
+
+            # Inserts go through the same path as the like endpoint.
+            pairs = [
+                (recipe, user) for user in users for recipe in recipes
+            ][:options["likes"]]
+            rng.shuffle(pairs)
+            with stopwatch() as elapsed:
+                for recipe, user in pairs:
+                    RecipeLike.objects.like(recipe.pk, user)
+            self.stdout.write(
+                f"insert: {len(pairs)} likes in {elapsed[0]:.2f}s "
+                f"({len(pairs) / elapsed[0]:.0f}/s)")
+
+            def count() -> None:
+                RecipeLike.objects.filter(
+                    recipe_id=rng.choice(recipes).pk).count()
+
+            def recent() -> None:
+                list(RecipeLike.objects.filter(
+                    recipe_id=rng.choice(recipes).pk
+                ).order_by("-created_at").values_list(
+                    "author_id", "created_at")[:20])
+
+            self.stdout.write(format_latencies(
+                "like count", time_call(count, options["queries"])))
+            self.stdout.write(format_latencies(
+                "recent likers", time_call(recent, options["queries"])))
@@ -0,0 +1,93 @@
+import random
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from apps.engagement.buffer import like_buffer
+from apps.engagement.models import RecipeLike
+from apps.recipes.models import Recipe
+from core.benchmark import scratch_database, stopwatch
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark like/unlike throughput on one viral recipe from several "
+        "threads, writing straight through and with the write-behind buffer"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--events", type=int, default=250)
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        with scratch_database(on_disk=True):
+            User = get_user_model()
+            users = User.objects.bulk_create(
+                User(username=f"fan{index}", email=f"fan{index}@example.com")
+                for index in range(options["users"])
+            )
+            recipe = Recipe.objects.create(
+                name="Viral noodles",
+                description="Everyone is making these",
+                prep_time=5,
+                cook_time=10,
+                notes="",
+                servings=2,
+                author=users[0]
+            )
+            for label, write_behind in (
+                    ("direct", False), ("write-behind", True)):
+                RecipeLike.objects.all().delete()
+                Recipe.objects.filter(pk=recipe.pk).update(like_count=0)
+                with override_settings(LIKE_WRITE_BEHIND=write_behind):
+                    self.run_load(label, recipe, users, options)
+
+    def run_load(
+            self,
+            label: str,
+            recipe: Recipe,
+            users: list,
+            options: dict
+    ) -> None:
+        url = f"/api/recipes/{recipe.pk}/like/"
+        errors: list[int] = []
+
+        def tap(seed: int) -> None:
+            rng = random.Random(seed)
+            client = APIClient()
+            for _ in range(options["events"]):
+                client.force_authenticate(rng.choice(users))
+                try:
+                    if rng.random() < 0.7:
+                        client.post(url)
+                    else:
+                        client.delete(url)
+                except Exception:
+                    errors.append(1)
+            connection.close()
+
+        threads = [
+            threading.Thread(target=tap, args=(options["seed"] + index,))
+            for index in range(options["threads"])
+        ]
+        with stopwatch() as elapsed:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            like_buffer.flush()
+
+        events = options["threads"] * options["events"]
+        recipe.refresh_from_db()
+        stored = RecipeLike.objects.filter(recipe=recipe).count()
+        self.stdout.write(
+            f"{label}: {events} events in {elapsed[0]:.2f}s "
+            f"({events / elapsed[0]:.0f}/s) errors={len(errors)} "
+            f"like_count={recipe.like_count} stored={stored}"
+        )
@@ -0,0 +1,125 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.engagement import trending
+from apps.engagement.models import RecipeLike, TrendingScore
+from apps.recipes.models import Recipe
+from core.benchmark import (
+    format_latencies, scratch_database, stopwatch, time_call)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the trending score refresh job on a scratch database "
+        "filled with synthetic likes"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--likes", type=int, default=10_000_000)
+        parser.add_argument("--new-likes", type=int, default=100_000)
+        parser.add_argument("--recipes", type=int, default=20_000)
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        rng = random.Random(options["seed"])
+        with scratch_database(on_disk=True):
+            total = options["likes"] + options["new_likes"]
+            recipe_ids = self.create_recipes(
+                options["recipes"], -(-total // options["recipes"]))
+
+            with stopwatch() as elapsed:
+                self.insert_likes(
+                    rng, recipe_ids, 0, options["likes"], options["days"])
+            self.stdout.write(
+                f"Inserted {options['likes']} likes in {elapsed[0]:.1f}s")
+
+            with stopwatch() as elapsed:
+                updated = trending.refresh_scores()
+            self.stdout.write(
+                f"full refresh: {updated} scores in {elapsed[0]:.2f}s")
+
+            self.insert_likes(
+                rng, recipe_ids, options["likes"], total, days=0)
+            with stopwatch() as elapsed:
+                updated = trending.refresh_scores()
+            self.stdout.write(
+                f"incremental refresh of {options['new_likes']} likes: "
+                f"{updated} scores in {elapsed[0]:.2f}s")
+
+            with stopwatch() as elapsed:
+                dropped = trending.decay_scores(
+                    timezone.now() + timedelta(hours=1))
+            self.stdout.write(
+                f"decay pass: dropped {dropped} in {elapsed[0]:.2f}s")
+
+            top = TrendingScore.objects.filter(
+                recipe__is_private=False
+            ).order_by("-score").values_list("recipe_id", "score")[:20]
+            self.stdout.write(format_latencies(
+                "top 20 read", time_call(lambda: list(top.all()), 200)))
+
+    def create_recipes(self, count: int, authors: int) -> list[int]:
+        User = get_user_model()
+        User.objects.bulk_create(
+            User(username=f"fan{index}", email=f"fan{index}@example.com")
+            for index in range(authors)
+        )
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    name=f"Recipe {index}",
+                    description="",
+                    prep_time=5,
+                    cook_time=10,
+                    notes="",
+                    servings=2,
+                    author_id=1
+                )
+                for index in range(count)
+            ),
+            batch_size=5000
+        )
+        return list(
+            Recipe.objects.order_by("pk").values_list("pk", flat=True))
+
+    def insert_likes(
+            self,
+            rng: random.Random,
+            recipe_ids: list[int],
+            start: int,
+            stop: int,
+            days: int
+    ) -> None:
+        """
+        Insert the likes numbered start to stop with raw statements, as
+        creating millions of model instances would dwarf the job measured.
+        Like number n has id n + 1 and is by author n // recipes, so every
+        (recipe, author) pair is unique.
+        """
+        now = timezone.now().replace(tzinfo=None)
+        span = max(days, 1 / 24) * 86400
+        table = RecipeLike._meta.db_table
+        for batch_start in range(start, stop, 100_000):
+            batch_stop = min(batch_start + 100_000, stop)
+            numbers = range(batch_start, batch_stop)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO {table} "
+                    f"(id, created_at, recipe_id, author_id) "
+                    f"VALUES (%s, %s, %s, %s)",
+                    [
+                        (
+                            number + 1,
+                            str(now - timedelta(seconds=rng.random() * span)),
+                            recipe_ids[number % len(recipe_ids)],
+                            number // len(recipe_ids) + 1
+                        )
+                        for number in numbers
+                    ]
+                )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.counters.columns import reconcile_counters
+from apps.engagement.models import RecipeLike, CommentLike, Comment
+from apps.recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the like and comment counters of every recipe and comment "
+        "to fix any drift"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options) -> None:
+        recipes: int = reconcile_counters(
+            Recipe,
+            {
+                "like_count": (RecipeLike, "recipe"),
+                "comment_count": (Comment, "recipe"),
+            },
+            options["batch_size"],
+            counts_updated=timezone.now()
+        )
+        self.stdout.write(f"Reconciled {recipes} recipes")
+        comments: int = reconcile_counters(
+            Comment,
+            {"like_count": (CommentLike, "comment")},
+            options["batch_size"]
+        )
+        self.stdout.write(f"Reconciled {comments} comments")
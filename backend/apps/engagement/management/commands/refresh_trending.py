@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.engagement import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Add new likes and comments to the trending recipe scores, decaying "
+        "the stored scores first when they are due"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--decay",
+            action="store_true",
+            help="Decay the stored scores even if they are not due yet"
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["decay"] or trending.needs_decay():
+            dropped: int = trending.decay_scores()
+            self.stdout.write(f"Decayed scores, dropped {dropped}")
+        updated: int = trending.refresh_scores()
+        self.stdout.write(f"Updated {updated} scores")
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.db import connection, models, transaction
+from django.db.models import Exists, OuterRef, Value
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+if TYPE_CHECKING:
+    from apps.users.models import User
+
+
+class LikeManager(models.Manager):
+    """
+    Idempotent likes written in a single statement each, relying on the
+    unique constraint over the liked item and author instead of looking the
+    like up before writing it.
+
+    The statements skip the save and delete signals, so the managers shift
+    the like counters themselves.
+    """
+
+    # Name of the foreign key to the liked item.
+    target: str
+
+    def like(self, target_id: int, author: User) -> bool:
+        """
+        Add the author's like, returning whether it was added: it is not
+        when it existed already or the item does not exist
+        """
+        meta = self.model._meta
+        target = meta.get_field(self.target)
+        created_at = meta.get_field("created_at")
+        qn = connection.ops.quote_name
+        sql = (
+            f"INSERT INTO {qn(meta.db_table)} ({qn(target.column)}, "
+            f"{qn(meta.get_field('author').column)}, {qn(created_at.column)}) "
+            f"SELECT %s, %s, %s WHERE EXISTS (SELECT 1 FROM "
+            f"{qn(target.related_model._meta.db_table)} WHERE "
+            f"{qn(target.target_field.column)} = %s) "
+            f"ON CONFLICT DO NOTHING"
+        )
+        params = [
+            target_id,
+            author.pk,
+            created_at.get_db_prep_value(timezone.now(), connection),
+            target_id,
+        ]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                added = cursor.rowcount > 0
+            if added:
+                self.shift_like_count(target_id, 1)
+        return added
+
+    def unlike(self, target_id: int, author: User) -> bool:
+        """Remove the author's like, returning whether there was one"""
+        with transaction.atomic():
+            deleted = self.filter(
+                **{f"{self.target}_id": target_id}, author=author
+            )._raw_delete(self.db)
+            if deleted:
+                self.shift_like_count(target_id, -deleted)
+        return deleted > 0
+
+    def shift_like_count(self, target_id: int, amount: int) -> None:
+        """Shift the like count of the item by the given amount"""
+        raise NotImplementedError
+
+
+class RecipeLikeManager(LikeManager):
+    target = "recipe"
+
+    def shift_like_count(self, target_id: int, amount: int) -> None:
+        from apps.engagement.signals import count_recipe_engagement
+
+        count_recipe_engagement(target_id, "like_count", amount)
+
+
+class CommentLikeManager(LikeManager):
+    target = "comment"
+
+    def shift_like_count(self, target_id: int, amount: int) -> None:
+        from apps.engagement.signals import count_comment_likes
+
+        count_comment_likes(target_id, amount)
+
+
+class CommentManager(models.Manager):
+
+    def for_recipe(self, recipe_id: int, viewer: User) -> QuerySet:
+        """
+        Comments on a recipe with their authors and whether the viewer
+        liked each one, all in the same query
+        """
+        from apps.engagement.models import CommentLike
+
+        if viewer.is_authenticated:
+            liked_by_me = Exists(CommentLike.objects.filter(
+                comment=OuterRef("pk"), author=viewer))
+        else:
+            liked_by_me = Value(False)
+        return self.filter(recipe_id=recipe_id).select_related(
+            "author").annotate(liked_by_me=liked_by_me)
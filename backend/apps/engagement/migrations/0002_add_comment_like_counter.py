@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:59
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(child, field):
+    """Count of the child rows pointing at the outer row"""
+    return Coalesce(Subquery(
+        child.objects.filter(**{field: OuterRef("pk")}).order_by().values(
+            field).annotate(count=Count("pk")).values("count")
+    ), 0)
+
+
+def count_engagement(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeLike = apps.get_model("engagement", "RecipeLike")
+    CommentLike = apps.get_model("engagement", "CommentLike")
+    Comment = apps.get_model("engagement", "Comment")
+
+    Recipe.objects.update(
+        like_count=count_of(RecipeLike, "recipe"),
+        comment_count=count_of(Comment, "recipe")
+    )
+    Comment.objects.update(like_count=count_of(CommentLike, "comment"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0001_add_engagement_models'),
+        ('recipes', '0010_add_recipe_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Like count'),
+        ),
+        migrations.RunPython(count_engagement, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:00
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(child, field):
+    """Count of the child rows pointing at the outer row"""
+    return Coalesce(Subquery(
+        child.objects.filter(**{field: OuterRef("pk")}).order_by().values(
+            field).annotate(count=Count("pk")).values("count")
+    ), 0)
+
+
+def delete_duplicate_likes(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Comment = apps.get_model("engagement", "Comment")
+
+    for model_name, target, parent in (
+            ("RecipeLike", "recipe", Recipe),
+            ("CommentLike", "comment", Comment)):
+        Like = apps.get_model("engagement", model_name)
+        duplicates = Like.objects.filter(author__isnull=False).values(
+            target, "author").annotate(
+            first_id=Min("pk"), count=Count("pk")).filter(count__gt=1)
+        for duplicate in duplicates:
+            Like.objects.filter(
+                **{target: duplicate[target]},
+                author=duplicate["author"],
+                pk__gt=duplicate["first_id"]
+            ).delete()
+        parent.objects.update(like_count=count_of(Like, target))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0002_add_comment_like_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_likes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='commentlike',
+            constraint=models.UniqueConstraint(fields=('comment', 'author'), name='unique_comment_like'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipelike',
+            constraint=models.UniqueConstraint(fields=('recipe', 'author'), name='unique_recipe_like'),
+        ),
+    ]
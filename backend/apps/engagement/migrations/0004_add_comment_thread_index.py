@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0003_add_unique_like_constraints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['recipe', 'created_at', 'id'], name='comment_recipe_created_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_add_recipe_engagement_counters'),
+        ('engagement', '0004_add_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference_time', models.DateTimeField(verbose_name='Scores decayed to')),
+                ('last_like_id', models.BigIntegerField(default=0, verbose_name='Last counted like')),
+                ('last_comment_id', models.BigIntegerField(default=0, verbose_name='Last counted comment')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending_score', serialize=False, to='recipes.recipe')),
+                ('score', models.FloatField(verbose_name='Score')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score'], name='trending_score_idx')],
+            },
+        ),
+    ]
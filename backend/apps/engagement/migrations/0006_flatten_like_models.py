@@ -0,0 +1,95 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:13
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_likes(apps, schema_editor):
+    """
+    Copy every like into its self-contained table in one statement per
+    kind, keeping ids so the trending refresh watermarks stay valid
+    """
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    new_models = []
+    for kind, target in (
+            ("recipelike", "recipe"), ("commentlike", "comment")):
+        new_model = apps.get_model("engagement", f"flat{kind}")
+        new_models.append(new_model)
+        schema_editor.execute(
+            f"INSERT INTO {quote(new_model._meta.db_table)} "
+            f"(id, created_at, {target}_id, author_id) "
+            f"SELECT parent.id, parent.created_at, "
+            f"child.{target}_id, child.author_id "
+            f"FROM {quote(f'engagement_{kind}')} AS child "
+            f"INNER JOIN {quote('engagement_like')} AS parent "
+            f"ON parent.id = child.like_ptr_id"
+        )
+    for sql in connection.ops.sequence_reset_sql(no_style(), new_models):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0010_add_recipe_engagement_counters'),
+        ('engagement', '0005_add_trending_score_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlatRecipeLike',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipe')),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FlatCommentLike',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='engagement.comment')),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(copy_likes),
+        migrations.DeleteModel(name='RecipeLike'),
+        migrations.DeleteModel(name='CommentLike'),
+        migrations.DeleteModel(name='Like'),
+        migrations.RenameModel(old_name='FlatRecipeLike', new_name='RecipeLike'),
+        migrations.RenameModel(old_name='FlatCommentLike', new_name='CommentLike'),
+        migrations.AlterField(
+            model_name='recipelike',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='likes', to='recipes.recipe'),
+        ),
+        migrations.AlterField(
+            model_name='recipelike',
+            name='author',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recipe_likes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='commentlike',
+            name='comment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='likes', to='engagement.comment'),
+        ),
+        migrations.AlterField(
+            model_name='commentlike',
+            name='author',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='comment_likes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='commentlike',
+            constraint=models.UniqueConstraint(fields=('comment', 'author'), name='unique_comment_like'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipelike',
+            constraint=models.UniqueConstraint(fields=('recipe', 'author'), name='unique_recipe_like'),
+        ),
+    ]
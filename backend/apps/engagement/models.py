@@ -3,6 +3,7 @@ from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
 from apps.recipes.models import Recipe
+from .managers import RecipeLikeManager, CommentLikeManager, CommentManager
 
 
 class Like(models.Model):
@@ -10,6 +11,9 @@ class Like(models.Model):
 
     created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
 
+    class Meta:
+        abstract = True
+
 
 class RecipeLike(Like):
     """Store a like on a recipe"""
@@ -23,6 +27,14 @@ class RecipeLike(Like):
         null=True
     )
 
+    objects = RecipeLikeManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "author"], name="unique_recipe_like"),
+        ]
+
 
 class CommentLike(Like):
     """Store a like on a comment"""
@@ -36,6 +48,14 @@ class CommentLike(Like):
         null=True
     )
 
+    objects = CommentLikeManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["comment", "author"], name="unique_comment_like"),
+        ]
+
 
 class Comment(models.Model):
     """Store a comment by a user on a recipe"""
@@ -43,6 +63,7 @@ class Comment(models.Model):
     text = models.TextField(_("Comment text"), max_length=500)
     created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
     last_updated = models.DateTimeField(_("Last updated"), auto_now=True)
+    like_count = models.PositiveIntegerField(_("Like count"), default=0)
 
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE, related_name="comments")
@@ -53,6 +74,48 @@ class Comment(models.Model):
         null=True
     )
 
+    objects = CommentManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["recipe", "created_at", "id"],
+                name="comment_recipe_created_idx"
+            ),
+        ]
+
     def __str__(self) -> str:
-        return f"User {self.author.username} says... {self.text}"
+        # Lists of comments should select_related("author") to print this.
+        return f"User {self.author} says... {self.text}"
+
+
+class TrendingScore(models.Model):
+    """
+    Time-decayed engagement score of a recipe, kept up to date by the
+    `refresh_trending` command
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="trending_score"
+    )
+    score = models.FloatField(_("Score"))
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-score"], name="trending_score_idx"),
+        ]
+
+
+class TrendingState(models.Model):
+    """
+    Progress of the trending refresh in a single row: the time every stored
+    score is decayed to and the last engagement rows already counted
+    """
 
+    reference_time = models.DateTimeField(_("Scores decayed to"))
+    last_like_id = models.BigIntegerField(_("Last counted like"), default=0)
+    last_comment_id = models.BigIntegerField(
+        _("Last counted comment"), default=0)
@@ -0,0 +1,26 @@
+from rest_framework import serializers
+
+from apps.users.serializers import UserSummarySerializer
+from .models import Comment
+
+
+class CommentSerializer(serializers.ModelSerializer):
+    """
+    A comment in a recipe's thread. Expects a queryset from
+    `Comment.objects.for_recipe()`, which provides `liked_by_me`.
+    """
+
+    author = UserSummarySerializer(read_only=True)
+    liked_by_me = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = [
+            "id",
+            "text",
+            "created_at",
+            "last_updated",
+            "author",
+            "like_count",
+            "liked_by_me"
+        ]
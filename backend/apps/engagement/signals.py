@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.counters.columns import adjust_counter
+from apps.recipes.cache import invalidate_recipe_details
+from apps.recipes.models import Recipe
+from .counters import counters_suspended
+from .live import publish_comment, publish_counts
+from .models import RecipeLike, CommentLike, Comment
+
+
+def count_recipe_engagement(
+        recipe_id: int, field: str, amount: int) -> None:
+    """
+    Shift the like or comment count of the engaged recipe, marking when it
+    changed so the recipe list validators see the new count
+    """
+    if counters_suspended():
+        return
+    adjust_counter(
+        Recipe, recipe_id, field, amount, counts_updated=timezone.now())
+    invalidate_recipe_details([recipe_id])
+    publish_counts(recipe_id)
+
+
+def count_comment_likes(comment_id: int, amount: int) -> None:
+    if not counters_suspended():
+        adjust_counter(Comment, comment_id, "like_count", amount)
+
+
+def _engaged_field(instance: RecipeLike | Comment) -> str:
+    if isinstance(instance, RecipeLike):
+        return "like_count"
+    return "comment_count"
+
+
+@receiver(post_save, sender=RecipeLike, dispatch_uid="count_recipe_like")
+@receiver(post_save, sender=Comment, dispatch_uid="count_comment")
+def count_engaged_recipe(
+        sender: type[RecipeLike | Comment],
+        instance: RecipeLike | Comment,
+        created: bool,
+        raw: bool = False,
+        **kwargs
+) -> None:
+    if created and not raw:
+        count_recipe_engagement(
+            instance.recipe_id, _engaged_field(instance), 1)
+        if isinstance(instance, Comment):
+            publish_comment(instance.recipe_id, instance.pk)
+
+
+@receiver(post_delete, sender=RecipeLike, dispatch_uid="count_recipe_unlike")
+@receiver(post_delete, sender=Comment, dispatch_uid="count_uncomment")
+def count_disengaged_recipe(
+        sender: type[RecipeLike | Comment],
+        instance: RecipeLike | Comment,
+        **kwargs
+) -> None:
+    count_recipe_engagement(instance.recipe_id, _engaged_field(instance), -1)
+
+
+@receiver(post_save, sender=CommentLike, dispatch_uid="count_comment_like")
+def count_comment_like(
+        sender: type[CommentLike],
+        instance: CommentLike,
+        created: bool,
+        raw: bool = False,
+        **kwargs
+) -> None:
+    if created and not raw:
+        count_comment_likes(instance.comment_id, 1)
+
+
+@receiver(
+    post_delete, sender=CommentLike, dispatch_uid="count_comment_unlike")
+def count_comment_unlike(
+        sender: type[CommentLike], instance: CommentLike, **kwargs) -> None:
+    count_comment_likes(instance.comment_id, -1)
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
+from datetime import timedelta
+from io import StringIO
 from typing import TYPE_CHECKING
+from unittest import mock
 
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
 
 from apps.recipes.tests import RecipeTests
 from apps.users.tests import UserTests
-from .models import Comment, CommentLike
+from . import live, trending
+from .buffer import like_buffer
+from .models import Comment, CommentLike, RecipeLike, TrendingScore
 
 if TYPE_CHECKING:
     from apps.recipes.models import Recipe
@@ -85,3 +97,425 @@ class TestEngagement(TestCase):
         # Test if recipe gets deleted.
         pass
 
+
+class EngagementCounterTests(TestCase):
+
+    def setUp(self):
+        self.recipe = RecipeTests.get_generated_test_recipe(
+            UserTests.get_random_user())
+        self.users = [UserTests.get_random_user() for _ in range(3)]
+
+    def test_recipe_counters_follow_likes_and_comments(self):
+        likes = [
+            RecipeLike.objects.create(recipe=self.recipe, author=user)
+            for user in self.users
+        ]
+        comment = TestEngagement.get_random_comment(
+            self.recipe, self.users[0])
+        likes[0].delete()
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.like_count, 2)
+        self.assertEqual(self.recipe.comment_count, 1)
+
+        comment.delete()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.comment_count, 0)
+
+    def test_comment_like_counter(self):
+        comment = TestEngagement.get_random_comment(
+            self.recipe, self.users[0])
+        for user in self.users:
+            CommentLike.objects.create(comment=comment, author=user)
+        comment.likes.first().delete()
+
+        comment.refresh_from_db()
+        self.assertEqual(comment.like_count, 2)
+
+    def test_reconcile_fixes_drift(self):
+        comment = TestEngagement.get_random_comment(
+            self.recipe, self.users[0])
+        RecipeLike.objects.create(recipe=self.recipe, author=self.users[1])
+        CommentLike.objects.create(comment=comment, author=self.users[2])
+        Recipe = type(self.recipe)
+        Recipe.objects.update(like_count=7, comment_count=7)
+        Comment.objects.update(like_count=7)
+        etag = APIClient().get("/api/recipes/").headers["ETag"]
+
+        call_command("reconcile_engagement_counters", batch_size=1,
+                     stdout=StringIO())
+
+        # Clients holding the list with the drifted counts refetch it.
+        response = APIClient().get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        self.recipe.refresh_from_db()
+        comment.refresh_from_db()
+        self.assertEqual(self.recipe.like_count, 1)
+        self.assertEqual(self.recipe.comment_count, 1)
+        self.assertEqual(comment.like_count, 1)
+
+    def test_recipe_cards_do_not_count_rows(self):
+        RecipeLike.objects.create(recipe=self.recipe, author=self.users[0])
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get("/api/recipes/")
+        self.assertEqual(response.data["recipes"][0]["like_count"], 1)
+        self.assertFalse(any(
+            "engagement_" in query["sql"] for query in queries))
+
+
+class LikeEndpointTests(TestCase):
+
+    def setUp(self):
+        self.user = UserTests.get_random_user()
+        self.recipe = RecipeTests.get_generated_test_recipe(self.user)
+        self.comment = TestEngagement.get_random_comment(
+            self.recipe, self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_double_like_is_idempotent(self):
+        url = f"/api/recipes/{self.recipe.pk}/like/"
+        first = self.client.post(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.post(url)
+
+        self.assertEqual(first.data["like_count"], 1)
+        self.assertEqual(second.data["like_count"], 1)
+        self.assertEqual(RecipeLike.objects.count(), 1)
+        # The duplicate is caught by the constraint, not looked up first:
+        # the only read is the count after the write.
+        self.assertEqual(sum(
+            query["sql"].startswith("SELECT") for query in queries), 1)
+
+    def test_count_includes_concurrent_likes(self):
+        other = UserTests.get_random_user()
+        like = RecipeLike.objects.like
+
+        def like_alongside(recipe_id, user):
+            # Another user likes the recipe just before this request writes.
+            like(recipe_id, other)
+            return like(recipe_id, user)
+
+        with mock.patch.object(
+                RecipeLike.objects, "like", side_effect=like_alongside):
+            response = self.client.post(f"/api/recipes/{self.recipe.pk}/like/")
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.like_count, 2)
+        self.assertEqual(response.data["like_count"], 2)
+
+    def test_unlike_is_idempotent(self):
+        url = f"/api/comments/{self.comment.pk}/like/"
+        self.client.post(url)
+        self.assertEqual(self.client.delete(url).data["like_count"], 0)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.delete(url).data["like_count"], 0)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, 0)
+
+        # A single delete, nothing looked up before it.
+        statements = [query["sql"].split()[0] for query in queries]
+        self.assertEqual(statements.count("DELETE"), 1)
+        self.assertEqual(statements.count("SELECT"), 1)
+
+    def test_missing_item_and_anonymous_user(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/recipes/999/like/")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(RecipeLike.objects.exists())
+        self.assertFalse(any(
+            query["sql"].startswith("UPDATE") for query in queries))
+        response = self.client.delete("/api/comments/999/like/")
+        self.assertEqual(response.status_code, 404)
+
+        self.client.force_authenticate(None)
+        response = self.client.post(f"/api/recipes/{self.recipe.pk}/like/")
+        self.assertIn(response.status_code, (401, 403))
+
+
+@override_settings(
+    LIKE_WRITE_BEHIND=True,
+    LIKE_FLUSH_INTERVAL_MS=10 * 60 * 1000,
+    LIKE_FLUSH_MAX_EVENTS=100
+)
+class LikeBufferTests(TestCase):
+
+    def setUp(self):
+        self.users = [UserTests.get_random_user() for _ in range(3)]
+        self.recipe = RecipeTests.get_generated_test_recipe(self.users[0])
+        self.url = f"/api/recipes/{self.recipe.pk}/like/"
+        self.client = APIClient()
+
+    def tearDown(self):
+        like_buffer.flush()
+
+    def tap(self, user: User, method: str = "post") -> int:
+        self.client.force_authenticate(user)
+        return getattr(self.client, method)(self.url).data["like_count"]
+
+    def test_taps_are_coalesced_until_flushed(self):
+        self.assertEqual(self.tap(self.users[0]), 1)
+        self.assertEqual(self.tap(self.users[0], "delete"), 0)
+        self.assertEqual(self.tap(self.users[0]), 1)
+        self.assertEqual(self.tap(self.users[1]), 2)
+        self.assertEqual(RecipeLike.objects.count(), 0)
+
+        # Reads see the buffered likes.
+        response = self.client.get(f"/api/recipes/{self.recipe.pk}/")
+        self.assertEqual(response.data["like_count"], 2)
+        response = self.client.get("/api/recipes/")
+        self.assertEqual(response.data["recipes"][0]["like_count"], 2)
+        etag = response.headers["ETag"]
+        self.tap(self.users[2])
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["recipes"][0]["like_count"], 3)
+        self.tap(self.users[2], "delete")
+
+        like_buffer.flush()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.like_count, 2)
+        self.assertEqual(RecipeLike.objects.count(), 2)
+        self.assertEqual(like_buffer.pending_delta(self.recipe.pk), 0)
+
+        # Unlikes of stored likes are deleted in bulk.
+        self.assertEqual(self.tap(self.users[0], "delete"), 1)
+        self.assertEqual(self.tap(self.users[2], "delete"), 1)
+        like_buffer.flush()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.like_count, 1)
+        self.assertEqual(
+            list(RecipeLike.objects.values_list("author", flat=True)),
+            [self.users[1].pk])
+
+    def test_likes_of_deleted_rows_are_dropped(self):
+        other = RecipeTests.get_generated_test_recipe(self.users[0])
+        self.tap(self.users[1])
+        self.tap(self.users[2])
+        self.client.post(f"/api/recipes/{other.pk}/like/")
+        self.users[2].delete()
+        other.delete()
+        like_buffer.flush()
+        self.assertEqual(
+            list(RecipeLike.objects.values_list("author", flat=True)),
+            [self.users[1].pk])
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.like_count, 1)
+
+    @override_settings(LIKE_FLUSH_MAX_EVENTS=3)
+    def test_flushes_once_full(self):
+        for user in self.users:
+            self.tap(user)
+        self.assertEqual(RecipeLike.objects.count(), 3)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.like_count, 3)
+
+
+class CommentThreadTests(TestCase):
+
+    def setUp(self):
+        self.users = [UserTests.get_random_user() for _ in range(5)]
+        self.recipe = RecipeTests.get_generated_test_recipe(self.users[0])
+        self.comments = [
+            TestEngagement.get_random_comment(self.recipe, user)
+            for user in self.users * 2
+        ]
+        self.url = f"/api/recipes/{self.recipe.pk}/comments/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def test_pages_in_posting_order(self):
+        first = self.client.get(self.url, {"limit": 6})
+        second = self.client.get(
+            self.url, {"limit": 6, "cursor": first.data["next"]})
+
+        ids = [comment["id"] for comment in first.data["comments"]]
+        ids += [comment["id"] for comment in second.data["comments"]]
+        self.assertEqual(ids, [comment.pk for comment in self.comments])
+        self.assertEqual(first.data["total_count"], 10)
+        self.assertIsNone(second.data["next"])
+
+    def test_liked_by_me_and_like_count(self):
+        CommentLike.objects.create(
+            comment=self.comments[1], author=self.users[0])
+        CommentLike.objects.create(
+            comment=self.comments[1], author=self.users[1])
+        CommentLike.objects.create(
+            comment=self.comments[2], author=self.users[1])
+
+        comments = self.client.get(self.url).data["comments"]
+        self.assertEqual(
+            [comment["liked_by_me"] for comment in comments[:3]],
+            [False, True, False])
+        self.assertEqual(comments[1]["like_count"], 2)
+        self.assertEqual(
+            comments[0]["author"]["username"], self.users[0].username)
+
+        self.client.force_authenticate(None)
+        comments = self.client.get(self.url).data["comments"]
+        self.assertFalse(any(comment["liked_by_me"] for comment in comments))
+
+    def test_constant_number_of_queries(self):
+        for user in self.users * 8:
+            TestEngagement.get_random_comment(self.recipe, user)
+        # Looking the recipe up, checking the viewer's block set version
+        # and fetching the page, once the block set is cached.
+        self.client.get(self.url)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {"limit": 50})
+        self.assertEqual(len(response.data["comments"]), 50)
+
+    def test_blocked_comments_are_left_out(self):
+        self.addCleanup(cache.clear)
+        self.users[0].block(self.users[1])
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["total_count"], 8)
+        self.assertNotIn(self.users[1].pk, [
+            comment["author"]["id"] for comment in response.data["comments"]
+        ])
+
+    def test_admin_lists_authors_in_one_query(self):
+        admin_user = get_user_model().objects.create_superuser(
+            "admin", "admin@a.com", "1234")
+        client = Client()
+        client.force_login(admin_user)
+        url = "/admin/engagement/comment/"
+        self.assertContains(
+            client.get(url), f"User {self.users[1].username} says...")
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        TestEngagement.get_random_comment(self.recipe, self.users[2])
+        with self.assertNumQueries(len(queries)):
+            client.get(url)
+
+    def test_missing_recipe(self):
+        response = self.client.get("/api/recipes/999/comments/")
+        self.assertEqual(response.status_code, 404)
+
+
+class TrendingTests(TestCase):
+
+    def setUp(self):
+        self.users = [UserTests.get_random_user() for _ in range(4)]
+        self.recipes = [
+            RecipeTests.get_generated_test_recipe(self.users[0])
+            for _ in range(3)
+        ]
+
+    def like(self, recipe: Recipe, user: User, hours_ago: float = 0):
+        like = RecipeLike.objects.create(recipe=recipe, author=user)
+        RecipeLike.objects.filter(pk=like.pk).update(
+            created_at=timezone.now() - timedelta(hours=hours_ago))
+
+    def get_scores(self) -> dict[int, float]:
+        return dict(TrendingScore.objects.values_list("recipe_id", "score"))
+
+    def test_recent_engagement_ranks_first(self):
+        for user in self.users:
+            self.like(self.recipes[0], user, hours_ago=72)
+        self.like(self.recipes[1], self.users[0])
+        self.like(self.recipes[1], self.users[1])
+        TestEngagement.get_random_comment(self.recipes[2], self.users[0])
+        trending.refresh_scores()
+
+        response = APIClient().get("/api/recipes/trending/")
+        ranked = [
+            result["recipe"]["id"] for result in response.data["results"]]
+        self.assertEqual(ranked, [
+            self.recipes[2].pk, self.recipes[1].pk, self.recipes[0].pk])
+        # Four likes three half-lives ago are worth half a like now.
+        self.assertAlmostEqual(
+            response.data["results"][2]["score"], 0.5, delta=0.05)
+
+    def test_refresh_is_incremental(self):
+        self.like(self.recipes[0], self.users[0])
+        self.assertEqual(trending.refresh_scores(), 1)
+        self.assertEqual(trending.refresh_scores(), 0)
+
+        self.like(self.recipes[0], self.users[1])
+        self.like(self.recipes[1], self.users[1])
+        self.assertEqual(trending.refresh_scores(), 2)
+        scores = self.get_scores()
+        self.assertAlmostEqual(scores[self.recipes[0].pk], 2, delta=0.1)
+        self.assertAlmostEqual(scores[self.recipes[1].pk], 1, delta=0.1)
+
+    def test_decay_rescales_and_drops(self):
+        self.like(self.recipes[0], self.users[0])
+        self.like(self.recipes[1], self.users[0], hours_ago=24 * 6)
+        trending.refresh_scores()
+
+        later = trending.get_state().reference_time + timedelta(hours=24)
+        trending.decay_scores(later)
+        scores = self.get_scores()
+        self.assertAlmostEqual(scores[self.recipes[0].pk], 0.5, delta=0.05)
+        self.assertNotIn(self.recipes[1].pk, scores)
+        self.assertFalse(trending.needs_decay(later))
+
+        # New engagement is scored against the new reference time, which
+        # is a day ahead of it.
+        self.like(self.recipes[0], self.users[1])
+        trending.refresh_scores()
+        self.assertAlmostEqual(
+            self.get_scores()[self.recipes[0].pk], 0.5 + 0.5, delta=0.05)
+
+    def test_top_scores_read_off_the_index(self):
+        plan: str = TrendingScore.objects.order_by(
+            "-score").values_list("recipe_id", "score")[:20].explain()
+        self.assertIn("trending_score_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+@override_settings(LIVE_HEARTBEAT_SECONDS=0.05, LIVE_STREAM_MAX_SECONDS=5)
+class LiveStreamTests(TestCase):
+
+    def setUp(self):
+        self.users = [UserTests.get_random_user() for _ in range(2)]
+        self.recipe = RecipeTests.get_generated_test_recipe(self.users[0])
+
+    def engage(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeLike.objects.create(recipe=self.recipe, author=self.users[1])
+            TestEngagement.get_random_comment(self.recipe, self.users[1])
+
+    async def test_stream_pushes_counts_and_comments(self):
+        stream = live.stream_recipe(self.recipe.pk)
+        self.assertIn('"like_count": 0', await anext(stream))
+
+        await sync_to_async(self.engage)()
+        events = [await anext(stream) for _ in range(3)]
+        await stream.aclose()
+
+        self.assertTrue(events[0].startswith("event: counts"))
+        self.assertIn('"like_count": 1', events[0])
+        self.assertIn('"comment_count": 1', events[1])
+        self.assertTrue(events[2].startswith("event: comment"))
+        self.assertIn(self.users[1].username, events[2])
+        self.assertFalse(live.get_broker().has_subscribers(
+            live.recipe_channel(self.recipe.pk)))
+
+    async def test_idle_stream_sends_keep_alives(self):
+        stream = live.stream_recipe(self.recipe.pk)
+        await anext(stream)
+        self.assertEqual(await anext(stream), ": ping\n\n")
+        await stream.aclose()
+
+    async def test_missing_recipe(self):
+        response = await self.async_client.get("/api/recipes/999/live/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_refused_under_wsgi(self):
+        response = self.client.get(f"/api/recipes/{self.recipe.pk}/live/")
+        self.assertEqual(response.status_code, 501)
+
+    def test_brokers_implement_every_method(self):
+        class HalfBroker(live.Broker):
+            def publish(self, channel: str, message: dict) -> None:
+                pass
+
+        with self.assertRaises(TypeError):
+            HalfBroker()
+
+    def test_nothing_is_read_without_viewers(self):
+        # Only the two inserts and their counter updates.
+        with self.assertNumQueries(4):
+            self.engage()
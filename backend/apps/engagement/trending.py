@@ -0,0 +1,148 @@
+"""
+Trending recipes ranked by exponentially decayed engagement.
+
+Each like or comment adds its weight to a recipe's score, halving every
+`TRENDING_HALF_LIFE_HOURS`. Scores are materialized in `TrendingScore`,
+all decayed to the same reference time, so the top recipes are read
+straight off the score index.
+
+`refresh_scores` only reads engagement rows past the ids it counted last
+time, grouped per recipe and hour by the database. `decay_scores`
+periodically rescales every stored score to the current time, which keeps
+the numbers small and drops recipes that stopped trending. Taking back a
+like does not lower a score; trending measures activity, not totals.
+"""
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import CharField, Count, F, Max
+from django.db.models.functions import Cast, Substr
+from django.utils import timezone
+
+from .models import RecipeLike, Comment, TrendingScore, TrendingState
+
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 3.0
+
+# Scores below this are dropped by the decay pass. A single like falls
+# under it after about a week with the default half-life.
+MIN_SCORE = 0.01
+
+# Engagement rows aggregated per query, to keep each scan bounded.
+BATCH_SIZE = 1_000_000
+
+
+def decay_rate() -> float:
+    """Exponential decay constant per second"""
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def get_state() -> TrendingState:
+    state, _ = TrendingState.objects.get_or_create(
+        pk=1, defaults={"reference_time": timezone.now()})
+    return state
+
+
+def _hourly_counts(
+        model: type[models.Model],
+        after_id: int,
+        upto_id: int
+) -> Iterator[tuple[int, str, int]]:
+    """
+    Engagement rows in an id range counted per recipe and hour, the hour
+    given as a "YYYY-MM-DD HH" string. Cutting the stored timestamp text
+    keeps the grouping in plain SQL, where `TruncHour` would call back into
+    Python for every row on SQLite.
+    """
+    hour = Substr(Cast("created_at", CharField()), 1, 13)
+    for start in range(after_id, upto_id, BATCH_SIZE):
+        rows = model.objects.filter(
+            pk__gt=start, pk__lte=min(start + BATCH_SIZE, upto_id)
+        ).order_by().annotate(hour=hour).values(
+            "recipe_id", "hour").annotate(count=Count("pk"))
+        yield from rows.values_list("recipe_id", "hour", "count")
+
+
+def refresh_scores() -> int:
+    """
+    Add the engagement created since the last refresh to the stored
+    scores, returning how many recipes changed
+    """
+    rate = decay_rate()
+    weights: dict[str, float] = {}
+    with transaction.atomic():
+        state = TrendingState.objects.select_for_update().get(
+            pk=get_state().pk)
+        sources = (
+            (RecipeLike, "last_like_id", LIKE_WEIGHT),
+            (Comment, "last_comment_id", COMMENT_WEIGHT),
+        )
+        deltas: dict[int, float] = defaultdict(float)
+        for model, watermark, weight in sources:
+            last_id: int = getattr(state, watermark)
+            upto_id = model.objects.aggregate(last=Max("pk"))["last"] or 0
+            for recipe_id, hour, count in _hourly_counts(
+                    model, last_id, upto_id):
+                if hour not in weights:
+                    # Rows of an hour count as if made half way through.
+                    middle = datetime.strptime(hour, "%Y-%m-%d %H").replace(
+                        minute=30, tzinfo=dt_timezone.utc)
+                    age = (state.reference_time - middle).total_seconds()
+                    weights[hour] = math.exp(-rate * age)
+                deltas[recipe_id] += weight * count * weights[hour]
+            setattr(state, watermark, max(last_id, upto_id))
+
+        recipe_ids = list(deltas)
+        scores: list[TrendingScore] = []
+        for start in range(0, len(recipe_ids), 10_000):
+            chunk = recipe_ids[start:start + 10_000]
+            stored = dict(TrendingScore.objects.filter(
+                recipe_id__in=chunk).values_list("recipe_id", "score"))
+            scores += [
+                TrendingScore(
+                    recipe_id=recipe_id,
+                    score=stored.get(recipe_id, 0.0) + deltas[recipe_id]
+                )
+                for recipe_id in chunk
+            ]
+        TrendingScore.objects.bulk_create(
+            scores,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["recipe"],
+            update_fields=["score"]
+        )
+        state.save(update_fields=["last_like_id", "last_comment_id"])
+    return len(scores)
+
+
+def decay_scores(now: Optional[datetime] = None) -> int:
+    """
+    Rescale every stored score to the given time and drop the ones too
+    small to matter, returning how many were dropped
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        state = TrendingState.objects.select_for_update().get(
+            pk=get_state().pk)
+        elapsed = (now - state.reference_time).total_seconds()
+        TrendingScore.objects.update(
+            score=F("score") * math.exp(-decay_rate() * elapsed))
+        dropped, _ = TrendingScore.objects.filter(
+            score__lt=MIN_SCORE).delete()
+        state.reference_time = now
+        state.save(update_fields=["reference_time"])
+    return dropped
+
+
+def needs_decay(now: Optional[datetime] = None) -> bool:
+    """Whether the stored scores are older than the decay interval"""
+    now = now or timezone.now()
+    interval = timedelta(minutes=settings.TRENDING_DECAY_INTERVAL_MINUTES)
+    return now - get_state().reference_time >= interval
@@ -1,3 +1,192 @@
-from django.shortcuts import render
+from __future__ import annotations
 
-# Create your views here.
+from typing import TYPE_CHECKING, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Exists, OuterRef
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from apps.recipes.models import Recipe
+from apps.recipes.serializers import RecipeSerializer
+from apps.users.blocks import exclude_blocked, get_block_set
+from core.pagination import KeysetPaginator, get_limit
+from .buffer import like_buffer
+from .live import stream_recipe
+from .models import RecipeLike, CommentLike, Comment, TrendingScore
+from .serializers import CommentSerializer
+
+if TYPE_CHECKING:
+    from django.db import models
+    from django.http import HttpRequest, HttpResponse
+    from rest_framework.request import Request
+
+
+class TrendingRecipesView(APIView):
+    default_limit: int = 20
+    max_limit: int = 50
+
+    def get(self, request: Request) -> Response:
+        """
+        List the public recipes with the most recent likes and comments,
+        best first, as scored by the `refresh_trending` command. Recipes by
+        users blocked in either direction are left out.
+        """
+        limit = get_limit(request, self.default_limit, self.max_limit)
+
+        scores = exclude_blocked(
+            TrendingScore.objects.filter(recipe__is_private=False),
+            request.user,
+            field="recipe__author"
+        )
+        scores = list(scores.order_by("-score").values_list(
+            "recipe_id", "score")[:limit])
+        recipes_by_id = Recipe.objects.prefetch_related("tags").in_bulk(
+            [recipe_id for recipe_id, _ in scores])
+
+        results = [
+            {
+                "score": round(score, 3),
+                "recipe": RecipeSerializer(recipes_by_id[recipe_id]).data
+            }
+            for recipe_id, score in scores if recipe_id in recipes_by_id
+        ]
+        return Response(data={"results": results}, status=status.HTTP_200_OK)
+
+
+class RecipeCommentsView(APIView):
+    paginator = KeysetPaginator(
+        ordering=("created_at", "id"), default_limit=50)
+
+    def get(self, request: Request, pk: int) -> Response:
+        """
+        List a page of a recipe's comments, oldest first, paginated with
+        `?limit=` and `?cursor=` like the recipe list. Comments by users
+        blocked in either direction are left out.
+        """
+        comment_count = Recipe.objects.filter(pk=pk).values_list(
+            "comment_count", flat=True).first()
+        if comment_count is None:
+            return Response(data={"message": "Recipe does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        comments = Comment.objects.for_recipe(pk, request.user)
+        block_set = get_block_set(request.user)
+        if block_set:
+            comment_count -= Comment.objects.filter(
+                recipe_id=pk, author_id__in=block_set).count()
+            comments = comments.exclude(author__in=block_set)
+
+        page, cursors = self.paginator.paginate(comments, request)
+        serializer = CommentSerializer(page, many=True)
+        return Response(data={
+            "total_count": comment_count,
+            **cursors,
+            "comments": serializer.data
+        }, status=status.HTTP_200_OK)
+
+
+class LikeView(APIView):
+    """
+    Like an item with POST and unlike it with DELETE. Both are idempotent
+    and answer with the item's new like count.
+    """
+
+    permission_classes = [IsAuthenticated]
+    item_model: type[models.Model]
+    like_model: type[RecipeLike | CommentLike]
+
+    def get_like_count(self, pk: int) -> Optional[int]:
+        return self.item_model.objects.filter(pk=pk).values_list(
+            "like_count", flat=True).first()
+
+    def post(self, request: Request, pk: int) -> Response:
+        """
+        Like the item as the requesting user. The insert itself checks that
+        the item exists, so a missing one writes nothing.
+        """
+        self.like_model.objects.like(pk, request.user)
+        return self.answer(pk, liked=True)
+
+    def delete(self, request: Request, pk: int) -> Response:
+        """Take back the requesting user's like of the item"""
+        self.like_model.objects.unlike(pk, request.user)
+        return self.answer(pk, liked=False)
+
+    def answer(self, pk: int, liked: bool) -> Response:
+        """
+        Answer with the like count stored after the write, which includes
+        the likes of concurrent requests
+        """
+        like_count = self.get_like_count(pk)
+        if like_count is None:
+            return self.not_found()
+        return Response(data={"liked": liked, "like_count": like_count}, status=status.HTTP_200_OK)
+
+    def not_found(self) -> Response:
+        name = self.item_model._meta.verbose_name.capitalize()
+        return Response(data={"message": f"{name} does not exist"}, status=status.HTTP_404_NOT_FOUND)
+
+
+class RecipeLikeView(LikeView):
+    item_model = Recipe
+    like_model = RecipeLike
+
+    def post(self, request: Request, pk: int) -> Response:
+        if settings.LIKE_WRITE_BEHIND:
+            return self.buffer_like(request, pk, liked=True)
+        return super().post(request, pk)
+
+    def delete(self, request: Request, pk: int) -> Response:
+        if settings.LIKE_WRITE_BEHIND:
+            return self.buffer_like(request, pk, liked=False)
+        return super().delete(request, pk)
+
+    def buffer_like(self, request: Request, pk: int, liked: bool) -> Response:
+        """
+        Queue the like instead of writing it, answering with the stored
+        count plus every change still waiting in the buffer
+        """
+        row = Recipe.objects.filter(pk=pk).order_by().annotate(
+            liked=Exists(RecipeLike.objects.filter(
+                recipe=OuterRef("pk"), author=request.user))
+        ).values_list("like_count", "liked").first()
+        if row is None:
+            return self.not_found()
+        like_count, existed = row
+        like_buffer.record(pk, request.user.pk, liked, existed)
+        like_count += like_buffer.pending_delta(pk)
+        return Response(data={"liked": liked, "like_count": like_count}, status=status.HTTP_200_OK)
+
+
+class CommentLikeView(LikeView):
+    item_model = Comment
+    like_model = CommentLike
+
+
+class RecipeLiveView(View):
+    """
+    Stream a recipe's like and comment counts and its new comments as
+    Server-Sent Events, so viewers see them without polling the detail.
+
+    A plain async Django view, as DRF views are synchronous and would hold
+    a worker thread for as long as the viewer stays.
+    """
+
+    async def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        if not isinstance(request, ASGIRequest):
+            # A WSGI server would send nothing until the stream ended.
+            return JsonResponse(data={"message": "Live updates are only served through core.asgi"}, status=501)
+        if not await Recipe.objects.filter(pk=pk).aexists():
+            return JsonResponse(data={"message": "Recipe does not exist"}, status=404)
+        block_set = await sync_to_async(get_block_set)(request.user)
+        response = StreamingHttpResponse(
+            stream_recipe(pk, block_set), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx from buffering events.
+        response["X-Accel-Buffering"] = "no"
+        return response
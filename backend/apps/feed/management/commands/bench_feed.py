@@ -0,0 +1,155 @@
+import itertools
+import random
+from typing import Iterator
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.feed import timelines
+from apps.feed.models import PulledAuthor
+from apps.feed.views import FeedView
+from apps.recipes.models import Recipe
+from core.benchmark import (
+    format_latencies, scratch_database, stopwatch, time_call)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark home feed fan-out and reads on a scratch database with "
+        "a power-law follower graph"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--users", type=int, default=20_000)
+        parser.add_argument(
+            "--follows", type=int, default=50,
+            help="Average number of authors each user follows")
+        parser.add_argument(
+            "--skew", type=float, default=1.0,
+            help="Zipf exponent of author popularity")
+        parser.add_argument("--recipes", type=int, default=20_000)
+        parser.add_argument("--reads", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        rng = random.Random(options["seed"])
+        with scratch_database(on_disk=True):
+            user_ids = self.create_users(options["users"])
+            self.create_follows(
+                rng, user_ids, options["follows"], options["skew"])
+            recipes = self.create_recipes(rng, user_ids, options["recipes"])
+
+            # Publishing goes through the same path as the save signal.
+            written: list[int] = []
+            samples = time_call(
+                lambda: written.append(timelines.push_recipe(next(recipes))),
+                options["recipes"]
+            )
+            self.stdout.write(format_latencies("fan-out per recipe", samples))
+            self.stdout.write(
+                f"{sum(written)} feed entries written, "
+                f"{PulledAuthor.objects.count()} authors pulled, "
+                f"largest fan-out {max(written)}")
+
+            User = get_user_model()
+            viewers = list(User.objects.filter(
+                pk__in=rng.sample(user_ids, min(len(user_ids), 1000))))
+            view = FeedView.as_view()
+            factory = APIRequestFactory()
+
+            def read_feed() -> None:
+                request = factory.get("/api/feed/")
+                force_authenticate(request, rng.choice(viewers))
+                view(request).render()
+
+            def read_page() -> None:
+                viewer = rng.choice(viewers)
+                FeedView.paginator.paginate_union(
+                    timelines.feed_querysets(
+                        viewer, viewer.blocked_user_ids()),
+                    Request(factory.get("/api/feed/"))
+                )
+
+            def read_pull_only() -> None:
+                viewer = rng.choice(viewers)
+                list(Recipe.objects.filter(
+                    author__followers=viewer, is_private=False
+                ).exclude(
+                    author_id__in=viewer.blocked_user_ids()
+                ).order_by("-created_at", "-id").values_list("pk")[:20])
+
+            self.stdout.write(format_latencies(
+                "feed request", time_call(read_feed, options["reads"])))
+            self.stdout.write(format_latencies(
+                "feed page query", time_call(read_page, options["reads"])))
+            self.stdout.write(format_latencies(
+                "pull-only page query (baseline)",
+                time_call(read_pull_only, options["reads"])))
+
+    def create_users(self, count: int) -> list[int]:
+        User = get_user_model()
+        with stopwatch() as elapsed:
+            User.objects.bulk_create(
+                (
+                    User(username=f"cook{index}", email=f"cook{index}@a.com")
+                    for index in range(count)
+                ),
+                batch_size=5000
+            )
+        self.stdout.write(f"Created {count} users in {elapsed[0]:.1f}s")
+        return list(User.objects.order_by("pk").values_list("pk", flat=True))
+
+    def create_follows(
+            self,
+            rng: random.Random,
+            user_ids: list[int],
+            follows: int,
+            skew: float
+    ) -> None:
+        """
+        Let every user follow about `follows` authors drawn by Zipf
+        popularity, so a handful of authors are followed by most users and
+        most authors by a few
+        """
+        Follow = get_user_model().following.through
+        authors = user_ids[:]
+        rng.shuffle(authors)
+        weights = list(itertools.accumulate(
+            1 / (rank + 1) ** skew for rank in range(len(authors))))
+
+        rows = []
+        for user_id in user_ids:
+            picked = set(rng.choices(
+                authors, cum_weights=weights, k=rng.randint(1, 2 * follows)))
+            picked.discard(user_id)
+            rows.extend(
+                Follow(from_user_id=user_id, to_user_id=author_id)
+                for author_id in picked
+            )
+        with stopwatch() as elapsed:
+            Follow.objects.bulk_create(rows, batch_size=10_000)
+        self.stdout.write(f"Created {len(rows)} follows in {elapsed[0]:.1f}s")
+
+    def create_recipes(
+            self, rng: random.Random, user_ids: list[int], count: int
+    ) -> Iterator[Recipe]:
+        """Insert recipes by random authors, returned oldest first"""
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    name=f"Recipe {index}",
+                    description="",
+                    prep_time=5,
+                    cook_time=10,
+                    notes="",
+                    servings=2,
+                    is_private=rng.random() < 0.1,
+                    author_id=rng.choice(user_ids)
+                )
+                for index in range(count)
+            ),
+            batch_size=5000
+        )
+        return iter(Recipe.objects.order_by("created_at", "pk"))
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db import models
+from django.db.models.query import QuerySet
+
+
+class FeedEntryManager(models.Manager):
+
+    def for_owner(
+            self, owner_id: int, excluded_author_ids: Iterable[int]
+    ) -> QuerySet:
+        """
+        Entries of a user's feed carrying only what pagination needs, so a
+        page is read from the feed index alone
+        """
+        return self.filter(owner_id=owner_id).exclude(
+            author_id__in=excluded_author_ids
+        ).only("created_at", "recipe_id")
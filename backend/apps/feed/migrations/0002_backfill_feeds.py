@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:00
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill_feeds(apps, schema_editor):
+    """
+    Fill the feeds of follows made before feeds existed, as following an
+    author does now: their latest public recipes are copied into their
+    followers' feeds, unless they have too many followers to copy to and
+    are pulled instead
+    """
+    User = apps.get_model("users", "User")
+    Recipe = apps.get_model("recipes", "Recipe")
+    FeedEntry = apps.get_model("feed", "FeedEntry")
+    PulledAuthor = apps.get_model("feed", "PulledAuthor")
+    Follow = User.following.through
+
+    authors = Follow.objects.order_by().values("to_user_id").annotate(
+        follower_count=Count("pk"))
+    for author in list(authors):
+        author_id = author["to_user_id"]
+        if author["follower_count"] > settings.FEED_FANOUT_MAX_FOLLOWERS:
+            PulledAuthor.objects.get_or_create(author_id=author_id)
+            continue
+        recipes = list(Recipe.objects.filter(
+            author_id=author_id, is_private=False
+        ).order_by("-created_at").values_list("pk", "created_at")[
+            :settings.FEED_BACKFILL_RECIPES])
+        if not recipes:
+            continue
+        follower_ids = Follow.objects.filter(
+            to_user_id=author_id).values_list("from_user_id", flat=True)
+        FeedEntry.objects.bulk_create(
+            (
+                FeedEntry(
+                    owner_id=follower_id,
+                    recipe_id=recipe_id,
+                    author_id=author_id,
+                    created_at=created_at
+                )
+                for follower_id in list(follower_ids)
+                for recipe_id, created_at in recipes
+            ),
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0001_add_feed_models'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from apps.recipes.models import Recipe
+from .managers import FeedEntryManager
+
+
+class FeedEntry(models.Model):
+    """
+    Store a public recipe in the home feed of one follower of its author,
+    copied there when the recipe is published or the author followed
+    """
+
+    # Copied from the recipe so a feed page is one scan of the index below.
+    created_at = models.DateTimeField(_("Recipe created at"))
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        db_index=False
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, related_name="feed_entries")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+
+    objects = FeedEntryManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "recipe"], name="unique_feed_entry"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["owner", "-created_at", "-recipe"],
+                name="feed_owner_created_idx"
+            ),
+        ]
+
+
+class PulledAuthor(models.Model):
+    """
+    Mark an author with too many followers to copy their recipes into every
+    follower's feed; feeds pull their recipes when read instead. Marks are
+    never removed.
+    """
+
+    author = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+"
+    )
+    created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
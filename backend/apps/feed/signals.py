@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_save, m2m_changed
+from django.dispatch import receiver
+
+from apps.recipes.models import Recipe
+from apps.users.models import User
+from . import timelines
+from .models import FeedEntry
+
+
+@receiver(post_save, sender=Recipe, dispatch_uid="push_saved_recipe")
+def push_saved_recipe(
+        sender: type[Recipe],
+        instance: Recipe,
+        created: bool,
+        raw: bool = False,
+        **kwargs
+) -> None:
+    """
+    Copy new public recipes into followers' feeds, and move recipes in or
+    out of feeds when their privacy changes. Saves that keep the privacy
+    as it was loaded touch no feed.
+    """
+    if raw:
+        return
+    stored_is_private = getattr(instance, "stored_is_private", None)
+    instance.stored_is_private = instance.is_private
+    if instance.is_private:
+        if not created and stored_is_private is not True:
+            timelines.remove_recipe(instance.pk)
+    elif created or stored_is_private is not False:
+        # Recipes already in feeds are skipped by the unique constraint.
+        timelines.push_recipe(instance)
+
+
+@receiver(
+    m2m_changed, sender=User.following.through, dispatch_uid="follow_feed")
+def update_followers_feeds(
+        sender: type,
+        instance: User,
+        action: str,
+        reverse: bool,
+        pk_set: set[int] | None,
+        **kwargs
+) -> None:
+    """
+    `user.following` changes pass the followed ids, `user.followers`
+    changes the follower ids
+    """
+    if action == "post_add":
+        if reverse:
+            for follower_id in pk_set:
+                timelines.add_followed(follower_id, [instance.pk])
+        else:
+            timelines.add_followed(instance.pk, pk_set)
+    elif action == "post_remove":
+        if reverse:
+            FeedEntry.objects.filter(
+                owner_id__in=pk_set, author_id=instance.pk).delete()
+        else:
+            timelines.remove_followed(instance.pk, pk_set)
+    elif action == "pre_clear":
+        if reverse:
+            FeedEntry.objects.filter(author_id=instance.pk).delete()
+        else:
+            FeedEntry.objects.filter(owner_id=instance.pk).delete()
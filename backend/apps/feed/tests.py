@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.recipes.tests import RecipeTests
+from apps.users.tests import UserTests
+from .models import FeedEntry, PulledAuthor
+
+if TYPE_CHECKING:
+    from apps.recipes.models import Recipe
+    from apps.users.models import User
+
+
+class FeedTests(TestCase):
+
+    def setUp(self):
+        # Cached block sets would outlive the users of earlier tests.
+        cache.clear()
+        self.viewer = UserTests.get_random_user()
+        self.author = UserTests.get_random_user()
+        self.viewer.follow(self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def get_feed(self, **params) -> dict:
+        response = self.client.get("/api/feed/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def feed_ids(self, **params) -> list[int]:
+        return [recipe["id"] for recipe in self.get_feed(**params)["recipes"]]
+
+    def publish(self, author: User, **fields) -> Recipe:
+        recipe = RecipeTests.get_generated_test_recipe(author)
+        if fields:
+            for field, value in fields.items():
+                setattr(recipe, field, value)
+            recipe.save()
+        return recipe
+
+    def test_fan_out_on_write(self):
+        stranger = UserTests.get_random_user()
+        recipes = [self.publish(self.author) for _ in range(3)]
+        self.publish(stranger)
+
+        self.assertEqual(FeedEntry.objects.filter(
+            owner=self.viewer).count(), 3)
+        self.assertEqual(
+            self.feed_ids(), [recipe.pk for recipe in reversed(recipes)])
+
+    def test_privacy(self):
+        recipe = self.publish(self.author)
+        self.publish(self.author, is_private=True)
+        self.assertEqual(self.feed_ids(), [recipe.pk])
+
+        recipe.is_private = True
+        recipe.save()
+        self.assertEqual(self.feed_ids(), [])
+        recipe.is_private = False
+        recipe.save()
+        self.assertEqual(self.feed_ids(), [recipe.pk])
+
+    def test_edits_keeping_privacy_skip_feeds(self):
+        recipe = self.publish(self.author)
+        for recipe in (recipe, type(recipe).objects.get(pk=recipe.pk)):
+            recipe.name = "Renamed"
+            with CaptureQueriesContext(connection) as queries:
+                recipe.save()
+            self.assertFalse(any(
+                "feed_" in query["sql"] for query in queries))
+
+        # Privacy changes still move the recipe, however it was loaded.
+        recipe.is_private = True
+        recipe.save()
+        self.assertEqual(self.feed_ids(), [])
+        recipe = type(recipe).objects.get(pk=recipe.pk)
+        recipe.is_private = False
+        recipe.save()
+        self.assertEqual(self.feed_ids(), [recipe.pk])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        other = UserTests.get_random_user()
+        recipes = [self.publish(other) for _ in range(2)]
+        self.assertEqual(self.feed_ids(), [])
+
+        self.viewer.follow(other)
+        self.assertEqual(
+            self.feed_ids(), [recipe.pk for recipe in reversed(recipes)])
+        self.viewer.unfollow(other)
+        self.assertEqual(self.feed_ids(), [])
+
+    def test_blocked_users_are_left_out(self):
+        recipe = self.publish(self.author)
+        self.author.block(self.viewer)
+        self.assertEqual(self.feed_ids(), [])
+        # Blocking ended the follow, so following again is needed.
+        self.author.unblock(self.viewer)
+        self.viewer.follow(self.author)
+        self.assertEqual(self.feed_ids(), [recipe.pk])
+        self.viewer.block(self.author)
+        self.assertEqual(self.feed_ids(), [])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=2)
+    def test_pulled_authors_are_merged_on_read(self):
+        celebrity = UserTests.get_random_user()
+        self.viewer.follow(celebrity)
+        for _ in range(2):
+            UserTests.get_random_user().follow(celebrity)
+
+        published = []
+        for index in range(6):
+            author = celebrity if index % 2 else self.author
+            published.append(self.publish(author))
+        self.assertTrue(
+            PulledAuthor.objects.filter(author=celebrity).exists())
+        self.assertFalse(
+            FeedEntry.objects.filter(author=celebrity).exists())
+
+        # Pages merge both sources in order without gaps or repeats.
+        expected = [recipe.pk for recipe in reversed(published)]
+        first = self.get_feed(limit=4)
+        self.assertEqual(
+            [recipe["id"] for recipe in first["recipes"]], expected[:4])
+        second = self.get_feed(limit=4, cursor=first["next"])
+        self.assertEqual(
+            [recipe["id"] for recipe in second["recipes"]], expected[4:])
+        self.assertIsNone(second["next"])
+        back = self.get_feed(limit=4, cursor=second["previous"])
+        self.assertEqual(
+            [recipe["id"] for recipe in back["recipes"]], expected[:4])
+
+    def test_requires_login(self):
+        self.assertEqual(APIClient().get("/api/feed/").status_code, 403)
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_migration_backfills_existing_follows(self):
+        recipes = [self.publish(self.author) for _ in range(2)]
+        self.publish(self.author, is_private=True)
+        celebrity = UserTests.get_random_user()
+        for follower in (self.viewer, UserTests.get_random_user()):
+            follower.follow(celebrity)
+        FeedEntry.objects.all().delete()
+        PulledAuthor.objects.all().delete()
+
+        migration = import_module("apps.feed.migrations.0002_backfill_feeds")
+        migration.backfill_feeds(apps, None)
+        self.assertEqual(
+            self.feed_ids(), [recipe.pk for recipe in reversed(recipes)])
+        self.assertEqual(
+            list(PulledAuthor.objects.values_list("pk", flat=True)),
+            [celebrity.pk])
@@ -0,0 +1,120 @@
+"""
+Home feeds of recipes by followed users.
+
+Publishing a public recipe copies it into the feed of every follower of its
+author (fan-out on write), so reading a feed is one scan of the owner's
+feed index. Authors with more than `FEED_FANOUT_MAX_FOLLOWERS` followers are
+marked as pulled instead: copying each of their recipes would write that
+many rows, so feeds read their recent recipes at request time and merge
+them in (fan-out on read). Authors stay pulled once marked, even if
+followers leave: demoting them would mean copying their recent recipes
+into every follower's feed at once.
+
+Following an author copies their latest `FEED_BACKFILL_RECIPES` recipes
+into the follower's feed, and unfollowing removes them. Recipes made
+private leave every feed.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.query import QuerySet
+
+from apps.recipes.models import Recipe
+from apps.users.models import User
+from .models import FeedEntry, PulledAuthor
+
+if TYPE_CHECKING:
+    from collections.abc import Collection
+
+Follow = User.following.through
+
+
+def is_pulled(author_id: int) -> bool:
+    return PulledAuthor.objects.filter(pk=author_id).exists()
+
+
+def push_recipe(recipe: Recipe) -> int:
+    """
+    Copy a public recipe into its author's followers' feeds unless the
+    author is pulled, marking them pulled once they have too many
+    followers. Returns the number of feeds written to.
+    """
+    if recipe.is_private or is_pulled(recipe.author_id):
+        return 0
+    follower_ids = list(Follow.objects.filter(
+        to_user_id=recipe.author_id
+    ).values_list("from_user_id", flat=True)[
+        :settings.FEED_FANOUT_MAX_FOLLOWERS + 1])
+    if len(follower_ids) > settings.FEED_FANOUT_MAX_FOLLOWERS:
+        PulledAuthor.objects.get_or_create(author_id=recipe.author_id)
+        return 0
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                owner_id=follower_id,
+                recipe_id=recipe.pk,
+                author_id=recipe.author_id,
+                created_at=recipe.created_at
+            )
+            for follower_id in follower_ids
+        ),
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+    return len(follower_ids)
+
+
+def remove_recipe(recipe_id: int) -> None:
+    FeedEntry.objects.filter(recipe_id=recipe_id).delete()
+
+
+def add_followed(owner_id: int, author_ids: Iterable[int]) -> None:
+    """Copy the latest public recipes of newly followed authors"""
+    author_ids = set(author_ids)
+    pulled = PulledAuthor.objects.filter(
+        pk__in=author_ids).values_list("pk", flat=True)
+    entries = []
+    for author_id in author_ids - set(pulled):
+        recipes = Recipe.objects.filter(
+            author_id=author_id, is_private=False
+        ).order_by("-created_at").values_list("pk", "created_at")[
+            :settings.FEED_BACKFILL_RECIPES]
+        entries.extend(
+            FeedEntry(
+                owner_id=owner_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                created_at=created_at
+            )
+            for recipe_id, created_at in recipes
+        )
+    FeedEntry.objects.bulk_create(
+        entries, batch_size=1000, ignore_conflicts=True)
+
+
+def remove_followed(owner_id: int, author_ids: Iterable[int]) -> None:
+    FeedEntry.objects.filter(
+        owner_id=owner_id, author_id__in=author_ids).delete()
+
+
+def feed_querysets(
+        viewer: User, excluded_author_ids: Collection[int]
+) -> list[QuerySet]:
+    """
+    Querysets whose rows, merged by `created_at` and `recipe_id`, make up a
+    user's feed: their feed entries, then the public recipes of pulled
+    authors they follow
+    """
+    followed_pulled = PulledAuthor.objects.filter(
+        author__followers=viewer).values("pk")
+    return [
+        FeedEntry.objects.for_owner(viewer.pk, excluded_author_ids),
+        Recipe.objects.filter(
+            author_id__in=followed_pulled, is_private=False
+        ).exclude(
+            author_id__in=excluded_author_ids
+        ).annotate(recipe_id=F("pk")).only("created_at"),
+    ]
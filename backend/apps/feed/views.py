@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from apps.recipes.models import Recipe
+from apps.recipes.serializers import RecipeSerializer
+from apps.users.blocks import get_block_set
+from core.pagination import KeysetPaginator
+from .timelines import feed_querysets
+
+if TYPE_CHECKING:
+    from rest_framework.request import Request
+
+
+class FeedView(APIView):
+    permission_classes = [IsAuthenticated]
+    paginator = KeysetPaginator(ordering=("-created_at", "-recipe_id"))
+
+    def get(self, request: Request) -> Response:
+        """
+        List a page of the latest public recipes by users the requesting
+        user follows, leaving out users blocked in either direction.
+
+        Paginated with `?limit=` and the opaque `?cursor=` returned as `next`
+        or `previous` by an earlier page.
+        """
+        page, cursors = self.paginator.paginate_union(
+            feed_querysets(request.user, get_block_set(request.user)),
+            request
+        )
+
+        recipes_by_id = Recipe.objects.filter(
+            is_private=False
+        ).prefetch_related("tags").in_bulk(
+            [row.recipe_id for row in page])
+        recipes = [
+            recipes_by_id[row.recipe_id]
+            for row in page if row.recipe_id in recipes_by_id
+        ]
+        serializer = RecipeSerializer(recipes, many=True)
+
+        return Response(data={
+            **cursors, "recipes": serializer.data
+        }, status=status.HTTP_200_OK)
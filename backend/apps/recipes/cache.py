@@ -0,0 +1,73 @@
+"""
+Cache of serialized recipe details.
+
+Entries are keyed by recipe id and store the ETag of the recipe they were
+built from. A lookup only hits when that ETag still matches the current
+one, so a process never serves a body that another process has already
+invalidated. Signals drop entries as soon as the recipe, its children, its
+tags or its likes and comments change. The author's username is part of
+the ETag, so entries stop matching once the author is renamed.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class CacheStats:
+    """Thread-safe hit and miss counters of this process"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+stats = CacheStats()
+
+
+def detail_key(recipe_id: int) -> str:
+    return f"recipe-detail:{recipe_id}"
+
+
+def get_recipe_detail(
+        recipe_id: int,
+        etag: str,
+        build: Callable[[], Optional[dict]]
+) -> Optional[dict]:
+    """
+    Return the cached detail of a recipe for the given ETag, building and
+    storing it on a miss. `build` returns `None` for missing recipes.
+    """
+    entry = cache.get(detail_key(recipe_id))
+    if entry is not None and entry[0] == etag:
+        stats.record(hit=True)
+        return entry[1]
+
+    stats.record(hit=False)
+    data = build()
+    if data is not None:
+        cache.set(
+            detail_key(recipe_id),
+            (etag, data),
+            settings.RECIPE_DETAIL_CACHE_TIMEOUT
+        )
+    return data
+
+
+def invalidate_recipe_details(recipe_ids: Iterable[int]) -> None:
+    cache.delete_many([detail_key(recipe_id) for recipe_id in recipe_ids])
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from apps.recipes.cache import stats
+from apps.recipes.models import Recipe, Instruction, Ingredient, Tag
+from core.benchmark import format_latencies, scratch_database, time_call
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark recipe detail latency with a cold and a warm serialized "
+        "response cache on a scratch database"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--ingredients", type=int, default=20)
+        parser.add_argument("--instructions", type=int, default=15)
+
+    def handle(self, *args, **options) -> None:
+        with scratch_database():
+            recipe = self.create_recipe(options)
+            url = f"/api/recipes/{recipe.pk}/"
+            client = Client()
+
+            def cold() -> None:
+                cache.clear()
+                client.get(url)
+
+            cold_samples = time_call(cold, options["requests"])
+            client.get(url)
+            stats.reset()
+            warm_samples = time_call(
+                lambda: client.get(url), options["requests"])
+
+            self.stdout.write(format_latencies("uncached", cold_samples))
+            self.stdout.write(format_latencies("cached", warm_samples))
+            self.stdout.write(f"hits={stats.hits} misses={stats.misses}")
+
+    def create_recipe(self, options: dict) -> Recipe:
+        author = get_user_model().objects.create_user(
+            username="bench", email="bench@example.com", password="bench")
+        recipe = Recipe.objects.create(
+            name="Benchmark lasagna",
+            description="Layered and slow",
+            prep_time=30,
+            cook_time=60,
+            notes="Rest before slicing",
+            servings=8,
+            author=author
+        )
+        Instruction.objects.bulk_create(
+            Instruction(step=step, description=f"Step {step}", recipe=recipe)
+            for step in range(1, options["instructions"] + 1)
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(
+                position=position,
+                name=f"Ingredient {position}",
+                quantity=0.5,
+                measurement="CUP",
+                recipe=recipe
+            )
+            for position in range(1, options["ingredients"] + 1)
+        )
+        recipe.tags.add(*Tag.objects.bulk_create(
+            Tag(name=f"tag{index}") for index in range(5)))
+        return recipe
@@ -0,0 +1,95 @@
+import itertools
+import random
+import sqlite3
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from apps.recipes import search
+from core.benchmark import format_latencies, stopwatch, time_call
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark full-text recipe search on a scratch SQLite database "
+        "filled with synthetic recipes"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--recipes", type=int, default=100_000)
+        parser.add_argument("--vocabulary", type=int, default=20_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        rng = random.Random(options["seed"])
+        words = [f"w{index}" for index in range(options["vocabulary"])]
+        # Zipf-like weights so a few words are very common, like real text.
+        cum_weights = list(itertools.accumulate(
+            1 / (rank + 1) for rank in range(len(words))))
+
+        def text(length: int) -> str:
+            return " ".join(
+                rng.choices(words, cum_weights=cum_weights, k=length))
+
+        with tempfile.NamedTemporaryFile(suffix=".sqlite3") as db_file:
+            db = sqlite3.connect(db_file.name)
+            db.execute(
+                "CREATE TABLE recipes_recipe "
+                "(id INTEGER PRIMARY KEY, is_private BOOL NOT NULL)")
+            db.execute(search.CREATE_FTS_TABLE)
+            db.execute(search.CREATE_VOCAB_TABLE)
+
+            with stopwatch() as elapsed:
+                batch: list[tuple] = []
+                for recipe_id in range(1, options["recipes"] + 1):
+                    batch.append((
+                        recipe_id, text(3), text(15), text(8),
+                        text(10), text(40)))
+                    if len(batch) == 10_000:
+                        self._insert(db, batch, rng)
+                        batch = []
+                self._insert(db, batch, rng)
+                db.commit()
+            self.stdout.write(
+                f"Indexed {options['recipes']} recipes "
+                f"in {elapsed[0]:.1f}s")
+
+            def execute(sql: str, params: list) -> list[tuple]:
+                return db.execute(sql.replace("%s", "?"), params).fetchall()
+
+            # The top of the vocabulary plays the role of stop words, so
+            # "common" picks words the way an ingredient like "garlic" is
+            # common.
+            cases = {
+                "common word": lambda: rng.choice(words[50:500]),
+                "rare word": lambda: rng.choice(words[-5000:]),
+                "two words": lambda: f"{rng.choice(words[50:2000])} "
+                                     f"{rng.choice(words[50:2000])}",
+                "prefix": lambda: rng.choice(words[50:2000])[:-1],
+            }
+            for label, make_query in cases.items():
+                samples = time_call(
+                    lambda: search.ranked_ids(
+                        execute,
+                        search.build_match_expression(make_query()),
+                        20
+                    ),
+                    options["queries"]
+                )
+                self.stdout.write(format_latencies(label, samples))
+            db.close()
+
+    def _insert(
+            self,
+            db: sqlite3.Connection,
+            batch: list[tuple],
+            rng: random.Random
+    ) -> None:
+        db.executemany(
+            "INSERT INTO recipes_recipe (id, is_private) VALUES (?, ?)",
+            [(row[0], rng.random() < 0.1) for row in batch])
+        db.executemany(
+            f"INSERT INTO {search.FTS_TABLE} (rowid, name, description, "
+            f"notes, ingredients, instructions) VALUES (?, ?, ?, ?, ?, ?)",
+            batch)
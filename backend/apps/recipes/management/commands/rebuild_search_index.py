@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.recipes import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text recipe search index from scratch"
+
+    def handle(self, *args, **options) -> None:
+        if not search.is_available():
+            self.stderr.write("Full-text search needs the SQLite backend")
+            return
+        search.rebuild_index()
+        self.stdout.write("Search index rebuilt")
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 from django.db import models
+from django.db.models import Count, Q
 from django.db.models.query import QuerySet
 
 if TYPE_CHECKING:
-    from apps.recipes.models import Tag
+    from apps.recipes.models import Tag, CanonicalIngredient
 
 
 class RecipeManager(models.Manager):
@@ -15,6 +16,27 @@ class RecipeManager(models.Manager):
         """Sort recipes by latest first"""
         return super().get_queryset().order_by("-created_at")
 
+    def with_details(self) -> QuerySet:
+        """
+        Load a recipe with its author, ordered instructions and ingredients,
+        and tags in a fixed number of queries
+        """
+        return self.select_related("author").prefetch_related(
+            "instructions", "ingredients", "tags")
+
+    def with_tags(self, tag_groups: list[list[int]]) -> QuerySet:
+        """
+        Filter recipes having at least one tag out of every group, using a
+        semi-join per group so no duplicate rows come back
+        """
+        from apps.recipes.models import Recipe
+
+        recipes = self.all()
+        for tag_ids in tag_groups:
+            recipes = recipes.filter(id__in=Recipe.tags.through.objects.filter(
+                tag_id__in=tag_ids).values("recipe_id"))
+        return recipes
+
 
 class InstructionManager(models.Manager):
     
@@ -30,12 +52,129 @@ class IngredientManager(models.Manager):
         return super().get_queryset().order_by("position")
 
 
+class CanonicalIngredientManager(models.Manager):
+
+    def resolve(
+            self, names: Iterable[str]) -> dict[str, CanonicalIngredient]:
+        """
+        Map free-text ingredient names to their canonical ingredients,
+        creating any that are missing, in a fixed number of queries
+        """
+        from apps.recipes.pantry import normalize_ingredient_name
+
+        normalized = {name: normalize_ingredient_name(name) for name in names}
+        wanted = {value for value in normalized.values() if value}
+        existing = {
+            canonical.name: canonical
+            for canonical in self.filter(name__in=wanted)
+        }
+        missing = wanted - existing.keys()
+        if missing:
+            self.bulk_create(
+                [self.model(name=name) for name in missing],
+                ignore_conflicts=True
+            )
+            existing.update({
+                canonical.name: canonical
+                for canonical in self.filter(name__in=missing)
+            })
+        return {
+            name: existing[value]
+            for name, value in normalized.items() if value
+        }
+
+
 class TagManager(models.Manager):
     
     def by_type(self, tag_type: Tag.Type) -> QuerySet:
         """Return tags sorted by type"""
         return self.filter(tag_type=tag_type)
 
+    def get_or_create_by_names(self, names: Iterable[str]) -> list[Tag]:
+        """
+        Bulk version of `get_or_create(name__iexact=<tag_name>)`, reusing
+        existing tags case-insensitively and creating the rest in a single
+        insert. New tags named after a predefined option get its type.
+        """
+        wanted: dict[str, str] = {}
+        for name in names:
+            wanted.setdefault(name.lower(), name)
+        if not wanted:
+            return []
+
+        condition = Q()
+        for name in wanted.values():
+            condition |= Q(name__iexact=name)
+        found: dict[str, Tag] = {}
+        for tag in self.filter(condition).order_by("id"):
+            found.setdefault(tag.name.lower(), tag)
+
+        Tag = self.model
+        predefined_types = {
+            value.lower(): tag_type
+            for tag_type, options in (
+                (Tag.Type.DIETARY_PREFERENCE, Tag.DietaryPreferenceOptions),
+                (Tag.Type.COURSE, Tag.CoursesOptions),
+                (Tag.Type.DIFFICULTY, Tag.DifficultyOptions),
+            )
+            for value in options.values
+        }
+        created = self.bulk_create([
+            Tag(
+                name=name,
+                tag_type=predefined_types.get(key, Tag.Type.CUSTOM)
+            )
+            for key, name in wanted.items() if key not in found
+        ])
+        found.update({tag.name.lower(): tag for tag in created})
+        return [found[key] for key in wanted]
+
+    def resolve_filters(
+            self, terms: list[tuple[str, str | None]]
+    ) -> list[list[int]] | None:
+        """
+        Look up the tag ids matching each `(name, tag_type)` filter term in
+        one query. Names match case-insensitively and a `None` type matches
+        any type. Returns `None` when a term matches no tag at all.
+        """
+        condition = Q()
+        for name, tag_type in terms:
+            term = Q(name__iexact=name)
+            if tag_type is not None:
+                term &= Q(tag_type=tag_type)
+            condition |= term
+        tags = list(self.filter(condition).values_list(
+            "id", "name", "tag_type"))
+
+        groups: list[list[int]] = []
+        for name, tag_type in terms:
+            group = [
+                tag_id for tag_id, tag_name, type_ in tags
+                if tag_name.lower() == name.lower()
+                and tag_type in (None, type_)
+            ]
+            if not group:
+                return None
+            groups.append(group)
+        return groups
+
+    def facet_counts(
+            self, recipes: QuerySet, exclude_ids: Iterable[int] = ()
+    ) -> QuerySet:
+        """
+        Count the recipes carrying each tag within the given recipes, in a
+        single grouped aggregate query
+        """
+        return self.filter(
+            recipes__in=recipes.order_by().values("id")
+        ).exclude(
+            id__in=exclude_ids
+        ).values(
+            "id", "name", "tag_type"
+        ).annotate(
+            count=Count("recipes")
+        ).order_by("tag_type", "-count", "name")
+
 
 class CookbookManager(models.Manager):
     pass
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_add_user_engagement_models'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['recipe', 'position'], name='ingredient_recipe_pos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='instruction',
+            index=models.Index(fields=['recipe', 'step'], name='instruction_recipe_step_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-created_at', '-id'], name='recipe_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-created_at'], name='recipe_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['is_private', '-created_at'], name='recipe_private_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('is_private', False)), fields=['-created_at', '-id'], name='recipe_public_created_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+CREATE_FTS_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts USING fts5(
+        name,
+        description,
+        notes,
+        ingredients,
+        instructions,
+        tokenize = 'porter unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+"""
+
+POPULATE_FTS_TABLE = """
+    INSERT INTO recipes_recipe_fts (
+        rowid, name, description, notes, ingredients, instructions)
+    SELECT
+        recipe.id,
+        recipe.name,
+        recipe.description,
+        recipe.notes,
+        (SELECT group_concat(name, ' ') FROM recipes_ingredient
+            WHERE recipe_id = recipe.id),
+        (SELECT group_concat(description, ' ') FROM recipes_instruction
+            WHERE recipe_id = recipe.id)
+    FROM recipes_recipe AS recipe
+"""
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(CREATE_FTS_TABLE)
+    schema_editor.execute(POPULATE_FTS_TABLE)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS recipes_recipe_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_add_recipe_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:52
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# A frozen copy of apps.recipes.pantry.normalize_ingredient_name as it was
+# when this migration was written, so later changes to it don't change
+# what this migration does.
+_DESCRIPTORS = frozenset((
+    "chopped", "diced", "fresh", "freshly", "grated", "large", "medium",
+    "minced", "peeled", "shredded", "sliced", "small", "softened",
+))
+_PARENTHESES_RE = re.compile(r"\([^)]*\)")
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def _singular(word):
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient_name(name):
+    name = unicodedata.normalize("NFKD", name).encode(
+        "ascii", "ignore").decode().lower()
+    name = _PARENTHESES_RE.sub(" ", name)
+    words = [
+        _singular(word) for word in _WORD_RE.findall(name)
+        if word not in _DESCRIPTORS
+    ]
+    return " ".join(words)
+
+
+def link_canonical_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    CanonicalIngredient = apps.get_model("recipes", "CanonicalIngredient")
+
+    canonical_ids: dict[str, int] = {}
+    batch = []
+    for ingredient in Ingredient.objects.only("id", "name").iterator():
+        name = normalize_ingredient_name(ingredient.name)
+        if not name:
+            continue
+        if name not in canonical_ids:
+            canonical_ids[name] = CanonicalIngredient.objects.create(
+                name=name).pk
+        ingredient.canonical_id = canonical_ids[name]
+        batch.append(ingredient)
+    Ingredient.objects.bulk_update(batch, ["canonical"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_add_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CanonicalIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Canonical ingredient name')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='canonical',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ingredients', to='recipes.canonicalingredient'),
+        ),
+        migrations.RunPython(
+            link_canonical_ingredients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_add_canonical_ingredient_model'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['last_updated'], name='recipe_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_add_recipe_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='counts_updated',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Counts last updated'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['counts_updated'], name='recipe_counts_updated_idx'),
+        ),
+    ]
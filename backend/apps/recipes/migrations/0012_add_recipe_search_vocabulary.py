@@ -0,0 +1,30 @@
+from django.db import migrations
+
+CREATE_VOCAB_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts_vocab
+    USING fts5vocab(recipes_recipe_fts, 'row')
+"""
+
+
+def create_search_vocabulary(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(CREATE_VOCAB_TABLE)
+
+
+def drop_search_vocabulary(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS recipes_recipe_fts_vocab")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_add_recipe_counts_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_search_vocabulary, drop_search_vocabulary),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+# Queries never use prefixes shorter than 3 characters, so only those get
+# a prefix index.
+CREATE_FTS_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts USING fts5(
+        name,
+        description,
+        notes,
+        ingredients,
+        instructions,
+        tokenize = 'porter unicode61 remove_diacritics 2',
+        prefix = '{prefix}'
+    )
+"""
+
+POPULATE_FTS_TABLE = """
+    INSERT INTO recipes_recipe_fts (
+        rowid, name, description, notes, ingredients, instructions)
+    SELECT
+        recipe.id,
+        recipe.name,
+        recipe.description,
+        recipe.notes,
+        (SELECT group_concat(name, ' ') FROM recipes_ingredient
+            WHERE recipe_id = recipe.id),
+        (SELECT group_concat(description, ' ') FROM recipes_instruction
+            WHERE recipe_id = recipe.id)
+    FROM recipes_recipe AS recipe
+"""
+
+
+def rebuild_search_index(prefix: str):
+    def rebuild(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        schema_editor.execute("DROP TABLE IF EXISTS recipes_recipe_fts")
+        schema_editor.execute(CREATE_FTS_TABLE.format(prefix=prefix))
+        schema_editor.execute(POPULATE_FTS_TABLE)
+
+    return rebuild
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_add_recipe_search_vocabulary'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rebuild_search_index("3"), rebuild_search_index("2 3")),
+    ]
@@ -5,7 +5,12 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from .managers import (
-    RecipeManager, InstructionManager, IngredientManager, TagManager)
+    RecipeManager,
+    InstructionManager,
+    IngredientManager,
+    CanonicalIngredientManager,
+    TagManager
+)
 
 
 class Recipe(models.Model):
@@ -25,6 +30,13 @@ class Recipe(models.Model):
     is_private = models.BooleanField(_("Recipe is private"), default=False)
     created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
     last_updated = models.DateTimeField(_("Last updated"), auto_now=True)
+    like_count = models.PositiveIntegerField(_("Like count"), default=0)
+    comment_count = models.PositiveIntegerField(
+        _("Comment count"), default=0)
+    # When either count last changed, for the validators of lists showing
+    # them. Engagement leaves `last_updated` alone.
+    counts_updated = models.DateTimeField(
+        _("Counts last updated"), null=True, blank=True)
 
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -35,9 +47,39 @@ class Recipe(models.Model):
 
     objects = RecipeManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"], name="recipe_created_idx"),
+            models.Index(
+                fields=["author", "-created_at"],
+                name="recipe_author_created_idx"
+            ),
+            models.Index(
+                fields=["is_private", "-created_at"],
+                name="recipe_private_created_idx"
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(is_private=False),
+                name="recipe_public_created_idx"
+            ),
+            models.Index(fields=["last_updated"], name="recipe_updated_idx"),
+            models.Index(
+                fields=["counts_updated"], name="recipe_counts_updated_idx"),
+        ]
+
     def __str__(self) -> str:
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values) -> Recipe:
+        recipe = super().from_db(db, field_names, values)
+        # Lets save signals tell whether the privacy changed without a
+        # query; `None` when unknown.
+        recipe.stored_is_private = recipe.__dict__.get("is_private")
+        return recipe
+
 
 class Instruction(models.Model):
     """
@@ -54,6 +96,12 @@ class Instruction(models.Model):
 
     objects = InstructionManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["recipe", "step"], name="instruction_recipe_step_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"({self.step}) {self.description}"
 
@@ -99,9 +147,24 @@ class Ingredient(models.Model):
 
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE, related_name="ingredients")
+    canonical = models.ForeignKey(
+        "CanonicalIngredient",
+        on_delete=models.SET_NULL,
+        related_name="ingredients",
+        blank=True,
+        null=True
+    )
 
     objects = IngredientManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["recipe", "position"],
+                name="ingredient_recipe_pos_idx"
+            ),
+        ]
+
     @property
     def f_quantity(self) -> str:
         """
@@ -137,10 +200,32 @@ class Ingredient(models.Model):
         }
         return mapping.get(self.measurement, self.measurement)
     
+    def save(self, *args, **kwargs) -> None:
+        """Link the ingredient to its canonical form before saving"""
+        self.canonical = CanonicalIngredient.objects.resolve(
+            [self.name]).get(self.name)
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return f"{self.f_quantity} {self.f_measurement} {self.name}"
 
 
+class CanonicalIngredient(models.Model):
+    """
+    Stores the normalized form of an ingredient name, such as "tomato" for
+    "Fresh Tomatoes (diced)", so recipes can be matched by what they need
+    rather than by how their authors spelled it.
+    """
+
+    name = models.CharField(
+        _("Canonical ingredient name"), max_length=50, unique=True)
+
+    objects = CanonicalIngredientManager()
+
+    def __str__(self) -> str:
+        return self.name
+
+
 class Tag(models.Model):
     """
     Stores a tag which attaches to a recipe in order to categorize them by
@@ -0,0 +1,181 @@
+"""
+"What can I cook" matching of a user's pantry against recipe ingredients.
+
+Free-text ingredient names are normalized into `CanonicalIngredient` ids.
+Each process keeps an in-memory index of which canonical ingredients every
+public recipe needs, plus the inverted posting lists of which recipes use
+each ingredient. A pantry query only walks the posting lists of the
+ingredients in the pantry, so its cost does not depend on how many
+ingredient rows exist.
+
+The index is refreshed one recipe at a time by the signals in `signals.py`
+and fully reloaded after `PANTRY_INDEX_MAX_AGE` seconds to pick up writes
+made by other processes.
+"""
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from typing import Container, Iterable, NamedTuple
+
+from django.conf import settings
+
+# Preparation words that don't change what the ingredient is.
+_DESCRIPTORS = frozenset((
+    "chopped", "diced", "fresh", "freshly", "grated", "large", "medium",
+    "minced", "peeled", "shredded", "sliced", "small", "softened",
+))
+_PARENTHESES_RE = re.compile(r"\([^)]*\)")
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def _singular(word: str) -> str:
+    """Cheap English singular form, good enough for ingredient names"""
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient_name(name: str) -> str:
+    """
+    Reduce a free-text ingredient name to its canonical form, e.g.
+    "Fresh Tomatoes (diced)" becomes "tomato".
+    """
+    name = unicodedata.normalize("NFKD", name).encode(
+        "ascii", "ignore").decode().lower()
+    name = _PARENTHESES_RE.sub(" ", name)
+    words = [
+        _singular(word) for word in _WORD_RE.findall(name)
+        if word not in _DESCRIPTORS
+    ]
+    return " ".join(words)
+
+
+class PantryMatch(NamedTuple):
+    recipe_id: int
+    matched_count: int
+    ingredient_count: int
+
+    @property
+    def coverage(self) -> float:
+        return self.matched_count / self.ingredient_count
+
+
+class PantryIndex:
+    """In-memory index of the canonical ingredients of public recipes"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._recipe_ingredients: dict[int, frozenset[int]] = {}
+        self._postings: dict[int, set[int]] = {}
+        self._loaded_at: float | None = None
+
+    def _is_stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at
+            > settings.PANTRY_INDEX_MAX_AGE
+        )
+
+    def load(self) -> None:
+        """Build the whole index from the database in a single query"""
+        from .models import Ingredient
+
+        recipe_ingredients: dict[int, set[int]] = {}
+        rows = Ingredient.objects.filter(
+            canonical__isnull=False, recipe__is_private=False
+        ).order_by().values_list("recipe_id", "canonical_id")
+        for recipe_id, canonical_id in rows.iterator(chunk_size=10_000):
+            recipe_ingredients.setdefault(recipe_id, set()).add(canonical_id)
+
+        postings: dict[int, set[int]] = {}
+        for recipe_id, canonical_ids in recipe_ingredients.items():
+            for canonical_id in canonical_ids:
+                postings.setdefault(canonical_id, set()).add(recipe_id)
+
+        with self._lock:
+            self._recipe_ingredients = {
+                recipe_id: frozenset(canonical_ids)
+                for recipe_id, canonical_ids in recipe_ingredients.items()
+            }
+            self._postings = postings
+            self._loaded_at = time.monotonic()
+
+    def refresh_recipe(self, recipe_id: int) -> None:
+        """Re-read one recipe's ingredients after it or its children change"""
+        if self._loaded_at is None:
+            return  # Nothing to keep up to date until the first query.
+        from .models import Ingredient
+
+        canonical_ids = frozenset(Ingredient.objects.filter(
+            recipe_id=recipe_id,
+            canonical__isnull=False,
+            recipe__is_private=False
+        ).order_by().values_list("canonical_id", flat=True))
+
+        with self._lock:
+            previous = self._recipe_ingredients.pop(recipe_id, frozenset())
+            for canonical_id in previous - canonical_ids:
+                self._postings[canonical_id].discard(recipe_id)
+            for canonical_id in canonical_ids - previous:
+                self._postings.setdefault(canonical_id, set()).add(recipe_id)
+            if canonical_ids:
+                self._recipe_ingredients[recipe_id] = canonical_ids
+
+    def remove_recipe(self, recipe_id: int) -> None:
+        """Forget a deleted recipe"""
+        with self._lock:
+            previous = self._recipe_ingredients.pop(recipe_id, frozenset())
+            for canonical_id in previous:
+                self._postings[canonical_id].discard(recipe_id)
+
+    def match(
+            self,
+            canonical_ids: Iterable[int],
+            limit: int,
+            excluded_ids: Container[int] = ()
+    ) -> list[PantryMatch]:
+        """
+        Rank recipes by the share of their ingredients found in the pantry,
+        breaking ties by the fewest missing ingredients, skipping the
+        excluded recipe ids
+        """
+        if self._is_stale():
+            self.load()
+
+        matched: Counter[int] = Counter()
+        with self._lock:
+            for canonical_id in set(canonical_ids):
+                matched.update(self._postings.get(canonical_id, ()))
+            matches = [
+                PantryMatch(
+                    recipe_id,
+                    matched_count,
+                    len(self._recipe_ingredients[recipe_id])
+                )
+                for recipe_id, matched_count in matched.items()
+                if recipe_id not in excluded_ids
+            ]
+
+        return heapq.nlargest(
+            limit,
+            matches,
+            key=lambda match: (
+                match.coverage,
+                match.matched_count - match.ingredient_count,
+                match.recipe_id
+            )
+        )
+
+
+pantry_index = PantryIndex()
@@ -0,0 +1,248 @@
+"""
+Full-text recipe search backed by an SQLite FTS5 index.
+
+Each recipe has one row in the `recipes_recipe_fts` virtual table, keyed by
+the recipe id, holding its name, description, notes, ingredient names and
+instruction text. Rows are kept in sync by the signals in `signals.py`;
+code paths that skip signals (such as `bulk_create`) must call
+`index_recipe` themselves.
+"""
+from __future__ import annotations
+
+import re
+from typing import Callable, Collection, Optional
+
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = "recipes_recipe_fts"
+VOCAB_TABLE = "recipes_recipe_fts_vocab"
+
+CREATE_FTS_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name,
+        description,
+        notes,
+        ingredients,
+        instructions,
+        tokenize = 'porter unicode61 remove_diacritics 2',
+        prefix = '3'
+    )
+"""
+# One row per indexed term, to see how far a prefix expands.
+CREATE_VOCAB_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE}
+    USING fts5vocab({FTS_TABLE}, 'row')
+"""
+POPULATE_FTS_TABLE = f"""
+    INSERT INTO {FTS_TABLE} (
+        rowid, name, description, notes, ingredients, instructions)
+    SELECT
+        recipe.id,
+        recipe.name,
+        recipe.description,
+        recipe.notes,
+        (SELECT group_concat(name, ' ') FROM recipes_ingredient
+            WHERE recipe_id = recipe.id),
+        (SELECT group_concat(description, ' ') FROM recipes_instruction
+            WHERE recipe_id = recipe.id)
+    FROM recipes_recipe AS recipe
+"""
+
+# bm25 weights for each column in the order they are declared above.
+COLUMN_WEIGHTS = (10.0, 4.0, 1.0, 3.0, 1.0)
+
+SEARCH_FTS_TABLE = f"""
+    SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE}
+    INNER JOIN recipes_recipe AS recipe ON recipe.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s AND NOT recipe.is_private{{exclusion}}
+    ORDER BY bm25({FTS_TABLE}, {", ".join(map(str, COLUMN_WEIGHTS))})
+    LIMIT %s
+"""
+
+COUNT_PREFIX_TERMS = f"""
+    SELECT count(*) FROM (
+        SELECT 1 FROM {VOCAB_TABLE} WHERE term >= %s AND term < %s LIMIT %s
+    )
+"""
+
+# Words too common in recipe text to narrow down a search.
+STOP_WORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "into", "is", "it", "of", "on", "or", "the", "to", "with",
+))
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Shorter prefixes expand to too many terms to match cheaply, as do
+# prefixes of more terms than the maximum.
+MIN_PREFIX_LENGTH = 3
+MAX_PREFIX_TERMS = 50
+
+
+def is_available() -> bool:
+    """FTS5 is only available on the SQLite backend"""
+    return connection.vendor == "sqlite"
+
+
+def build_match_expression(query: str) -> Optional[str]:
+    """
+    Turn free user input into a safe FTS5 query matching every word, with
+    the last word treated as a prefix so results show up while typing. It
+    is not when it is shorter than `MIN_PREFIX_LENGTH`, followed by
+    whitespace or dropped as a stop word. `ranked_ids` may still match it
+    exactly.
+    """
+    words: list[str] = _TOKEN_RE.findall(query.lower())
+    if not words:
+        return None
+    tokens = [word for word in words if word not in STOP_WORDS] or words
+    terms = [f'"{token}"' for token in tokens]
+    if (not query[-1].isspace()
+            and tokens[-1] == words[-1]
+            and len(tokens[-1]) >= MIN_PREFIX_LENGTH):
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _document_for(recipe_id: int) -> Optional[tuple]:
+    """Collect the searchable text of a recipe and its children"""
+    from .models import Recipe, Ingredient, Instruction
+
+    recipe = Recipe.objects.filter(pk=recipe_id).values_list(
+        "name", "description", "notes").first()
+    if recipe is None:
+        return None
+    ingredients = Ingredient.objects.filter(recipe_id=recipe_id).values_list(
+        "name", flat=True)
+    instructions = Instruction.objects.filter(
+        recipe_id=recipe_id).values_list("description", flat=True)
+    return (*recipe, " ".join(ingredients), " ".join(instructions))
+
+
+def index_recipe(recipe_id: int) -> None:
+    """Insert or replace the search document of a recipe"""
+    if not is_available():
+        return
+    document = _document_for(recipe_id)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [recipe_id])
+        if document is not None:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description, notes, "
+                f"ingredients, instructions) VALUES (%s, %s, %s, %s, %s, %s)",
+                [recipe_id, *document]
+            )
+
+
+def remove_recipe(recipe_id: int) -> None:
+    """Drop the search document of a deleted recipe"""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [recipe_id])
+
+
+def search_recipe_ids(
+        query: str,
+        limit: int,
+        excluded_author_ids: Collection[int] = ()
+) -> list[int]:
+    """
+    Return the ids of the best matching public recipes, best first, leaving
+    out recipes by the excluded authors
+    """
+    from .models import Recipe
+
+    match = build_match_expression(query)
+    if match is None:
+        return []
+
+    if not is_available():
+        # Unindexed fallback for other backends.
+        condition = Q()
+        for token in _TOKEN_RE.findall(query):
+            condition &= (
+                Q(name__icontains=token) | Q(description__icontains=token))
+        return list(Recipe.objects.filter(
+            condition, is_private=False
+        ).exclude(
+            author_id__in=excluded_author_ids
+        ).values_list("id", flat=True)[:limit])
+
+    with connection.cursor() as cursor:
+        def execute(sql: str, params: list) -> list[tuple]:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+        return ranked_ids(execute, match, limit, excluded_author_ids)
+
+
+def search_sql(excluded_author_ids: Collection[int]) -> tuple[str, list]:
+    """The ranking statement and its extra parameters for an exclusion"""
+    if not excluded_author_ids:
+        return SEARCH_FTS_TABLE.format(exclusion=""), []
+    placeholders = ", ".join(["%s"] * len(excluded_author_ids))
+    return SEARCH_FTS_TABLE.format(
+        exclusion=f" AND recipe.author_id NOT IN ({placeholders})"
+    ), list(excluded_author_ids)
+
+
+def ranked_ids(
+        execute: Callable[[str, list], list[tuple]],
+        match: str,
+        limit: int,
+        excluded_author_ids: Collection[int] = ()
+) -> list[int]:
+    """
+    Rank matches in two tiers so common words stay cheap.
+
+    bm25 has to score every matching row before the best ones are known, so
+    recipes matching in their name are ranked first on their own. That set
+    is far smaller than the full match set, and name hits would outrank the
+    rest anyway given the name column's weight. The full match set is only
+    scored when the name tier cannot fill the page.
+    """
+    match = limit_prefix(execute, match)
+    sql, excluded = search_sql(excluded_author_ids)
+    recipe_ids = [
+        row[0] for row in execute(
+            sql, [f"name : ({match})", *excluded, limit])
+    ]
+    if len(recipe_ids) < limit:
+        seen = set(recipe_ids)
+        for (recipe_id,) in execute(
+                sql, [match, *excluded, limit + len(recipe_ids)]):
+            if recipe_id not in seen and len(recipe_ids) < limit:
+                recipe_ids.append(recipe_id)
+    return recipe_ids
+
+
+def limit_prefix(
+        execute: Callable[[str, list], list[tuple]], match: str) -> str:
+    """
+    Match the last word of a match expression exactly when it is a prefix
+    of more than `MAX_PREFIX_TERMS` indexed terms, as merging that many
+    term lists costs more than a single common word
+    """
+    if not match.endswith("*"):
+        return match
+    head, _, last = match.rpartition(" ")
+    prefix = last[1:-2]
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    (term_count,), = execute(
+        COUNT_PREFIX_TERMS, [prefix, upper, MAX_PREFIX_TERMS + 1])
+    if term_count <= MAX_PREFIX_TERMS:
+        return match
+    return f"{head} {last[:-1]}".lstrip()
+
+
+def rebuild_index() -> None:
+    """Reindex every recipe from scratch in a single statement"""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(POPULATE_FTS_TABLE)
@@ -1,9 +1,149 @@
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
-from .models import Recipe
+from apps.users.serializers import UserSummarySerializer
+from . import search
+from .models import Recipe, Instruction, Ingredient, CanonicalIngredient, Tag
+from .pantry import pantry_index
 
 
 class RecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+        read_only_fields = ["like_count", "comment_count"]
+
+
+class InstructionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Instruction
+        fields = ["id", "step", "description"]
+
+
+class IngredientSerializer(serializers.ModelSerializer):
+    f_quantity = serializers.ReadOnlyField()
+    f_measurement = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Ingredient
+        fields = [
+            "id",
+            "position",
+            "name",
+            "quantity",
+            "measurement",
+            "f_quantity",
+            "f_measurement"
+        ]
+
+
+class RecipeDetailSerializer(serializers.ModelSerializer):
+    """
+    Full representation of a recipe with its children embedded.
+
+    Expects a queryset from `Recipe.objects.with_details()` so that nothing
+    below triggers extra queries.
+    """
+
+    author = UserSummarySerializer(read_only=True)
+    instructions = InstructionSerializer(many=True, read_only=True)
+    ingredients = IngredientSerializer(many=True, read_only=True)
+    tags = serializers.SlugRelatedField(
+        many=True, read_only=True, slug_field="name")
+
+    class Meta:
+        model = Recipe
+        fields = [
+            "id",
+            "name",
+            "description",
+            "prep_time",
+            "cook_time",
+            "notes",
+            "servings",
+            "is_private",
+            "created_at",
+            "last_updated",
+            "author",
+            "instructions",
+            "ingredients",
+            "tags",
+            "like_count",
+            "comment_count"
+        ]
+        read_only_fields = ["like_count", "comment_count"]
+
+
+class RecipeCreateSerializer(serializers.ModelSerializer):
+    """
+    Create a recipe with all of its instructions, ingredients and tags.
+
+    Everything is written in one transaction with a fixed number of
+    statements however many children the recipe has.
+    """
+
+    instructions = InstructionSerializer(many=True)
+    ingredients = IngredientSerializer(many=True)
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=15),
+        required=False,
+        default=list
+    )
+
+    class Meta:
+        model = Recipe
+        fields = [
+            "id",
+            "name",
+            "description",
+            "prep_time",
+            "cook_time",
+            "notes",
+            "servings",
+            "is_private",
+            "instructions",
+            "ingredients",
+            "tags"
+        ]
+
+    def validate_instructions(self, instructions: list[dict]) -> list[dict]:
+        steps = [instruction["step"] for instruction in instructions]
+        if len(steps) != len(set(steps)):
+            raise serializers.ValidationError(_("Steps must be unique"))
+        return instructions
+
+    def validate_ingredients(self, ingredients: list[dict]) -> list[dict]:
+        positions = [ingredient["position"] for ingredient in ingredients]
+        if len(positions) != len(set(positions)):
+            raise serializers.ValidationError(_("Positions must be unique"))
+        return ingredients
+
+    def create(self, validated_data: dict) -> Recipe:
+        instructions = validated_data.pop("instructions")
+        ingredients = validated_data.pop("ingredients")
+        tag_names = validated_data.pop("tags")
+
+        with transaction.atomic():
+            recipe = Recipe.objects.create(**validated_data)
+            Instruction.objects.bulk_create(
+                Instruction(recipe=recipe, **instruction)
+                for instruction in instructions
+            )
+            canonical = CanonicalIngredient.objects.resolve(
+                ingredient["name"] for ingredient in ingredients)
+            Ingredient.objects.bulk_create(
+                Ingredient(
+                    recipe=recipe,
+                    canonical=canonical.get(ingredient["name"]),
+                    **ingredient
+                )
+                for ingredient in ingredients
+            )
+            recipe.tags.add(*Tag.objects.get_or_create_by_names(tag_names))
+
+            # Bulk inserts skip the signals that keep these up to date.
+            search.index_recipe(recipe.pk)
+            transaction.on_commit(
+                lambda: pantry_index.refresh_recipe(recipe.pk))
+        return recipe
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from django.db.models.signals import (
+    post_save, post_delete, pre_delete, m2m_changed)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import search
+from .cache import invalidate_recipe_details
+from .models import Recipe, Instruction, Ingredient, Tag
+from .pantry import pantry_index
+
+
+@receiver(post_save, sender=Recipe, dispatch_uid="index_saved_recipe")
+def index_saved_recipe(
+        sender: type[Recipe], instance: Recipe, raw: bool = False, **kwargs
+) -> None:
+    if not raw:
+        search.index_recipe(instance.pk)
+        # Privacy changes add or remove the recipe from pantry matches.
+        pantry_index.refresh_recipe(instance.pk)
+        invalidate_recipe_details([instance.pk])
+
+
+@receiver(post_delete, sender=Recipe, dispatch_uid="unindex_deleted_recipe")
+def unindex_deleted_recipe(
+        sender: type[Recipe], instance: Recipe, **kwargs) -> None:
+    search.remove_recipe(instance.pk)
+    pantry_index.remove_recipe(instance.pk)
+    invalidate_recipe_details([instance.pk])
+
+
+@receiver(post_save, sender=Instruction, dispatch_uid="reindex_instruction")
+@receiver(post_save, sender=Ingredient, dispatch_uid="reindex_ingredient")
+@receiver(post_delete, sender=Instruction, dispatch_uid="reindex_instruction")
+@receiver(post_delete, sender=Ingredient, dispatch_uid="reindex_ingredient")
+def reindex_recipe_of_child(
+        sender: type[Instruction | Ingredient],
+        instance: Instruction | Ingredient,
+        raw: bool = False,
+        **kwargs
+) -> None:
+    """Keep a recipe's search document in step with its children"""
+    if not raw:
+        search.index_recipe(instance.recipe_id)
+
+
+@receiver(post_save, sender=Ingredient, dispatch_uid="refresh_pantry_index")
+@receiver(post_delete, sender=Ingredient, dispatch_uid="refresh_pantry_index")
+def refresh_pantry_index(
+        sender: type[Ingredient],
+        instance: Ingredient,
+        raw: bool = False,
+        **kwargs
+) -> None:
+    if not raw:
+        pantry_index.refresh_recipe(instance.recipe_id)
+
+
+def touch_recipes(recipe_ids) -> None:
+    """
+    Bump `last_updated` of recipes whose children changed so HTTP validators
+    derived from it change too, and drop their cached details. Uses
+    `update()` so no save signals fire.
+    """
+    recipe_ids = list(recipe_ids)
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        last_updated=timezone.now())
+    invalidate_recipe_details(recipe_ids)
+
+
+@receiver(post_save, sender=Instruction, dispatch_uid="touch_instruction")
+@receiver(post_save, sender=Ingredient, dispatch_uid="touch_ingredient")
+@receiver(post_delete, sender=Instruction, dispatch_uid="touch_instruction")
+@receiver(post_delete, sender=Ingredient, dispatch_uid="touch_ingredient")
+def touch_recipe_of_child(
+        sender: type[Instruction | Ingredient],
+        instance: Instruction | Ingredient,
+        raw: bool = False,
+        **kwargs
+) -> None:
+    if not raw:
+        touch_recipes([instance.recipe_id])
+
+
+@receiver(
+    m2m_changed, sender=Recipe.tags.through, dispatch_uid="touch_tagged")
+def touch_tagged_recipes(
+        sender: type,
+        instance: Recipe | Tag,
+        action: str,
+        reverse: bool,
+        pk_set: set[int] | None,
+        **kwargs
+) -> None:
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        touch_recipes([instance.pk])
+    elif reverse and action in ("post_add", "post_remove"):
+        touch_recipes(pk_set)
+    elif reverse and action == "pre_clear":
+        touch_recipes(instance.recipes.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Tag, dispatch_uid="touch_renamed_tag")
+@receiver(pre_delete, sender=Tag, dispatch_uid="touch_deleted_tag")
+def touch_recipes_of_tag(
+        sender: type[Tag], instance: Tag, raw: bool = False, **kwargs
+) -> None:
+    """
+    Recipes show their tag names, and deleting a tag removes it from its
+    recipes without sending `m2m_changed`
+    """
+    if not raw and not kwargs.get("created"):
+        touch_recipes(instance.recipes.values_list("pk", flat=True))
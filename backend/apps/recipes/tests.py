@@ -1,13 +1,24 @@
 from __future__ import annotations
 
 from typing import TYPE_CHECKING
+from unittest import mock, skipUnless
 
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.db.utils import IntegrityError
+from rest_framework.test import APIClient
 
+from django.core.cache import cache
+
+from apps.engagement.models import RecipeLike
+from apps.recipes import search
+from apps.recipes.cache import stats as detail_cache_stats
 from apps.recipes.models import (
-    Recipe, Instruction, Ingredient, Tag, Cookbook)
+    Recipe, Instruction, Ingredient, CanonicalIngredient, Tag, Cookbook)
+from apps.recipes.pantry import pantry_index, normalize_ingredient_name
+from apps.recipes.views import RecipesListView
 
 if TYPE_CHECKING:
     from apps.users.models import User
@@ -278,3 +289,674 @@ class TestCookbooks(TestCase):
     def setUp(self):
         pass
 
+
+class RecipesListViewTests(BaseRecipeTests):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        for _ in range(5):
+            RecipeTests.get_generated_test_recipe(self.user)
+        self.expected_ids = list(
+            Recipe.objects.order_by("-created_at", "-id")
+            .values_list("id", flat=True))
+
+    def test_pages_follow_cursors(self):
+        seen_ids: list[int] = []
+        response = self.client.get("/api/recipes/", {"limit": 2})
+        self.assertIsNone(response.data["previous"])
+        while True:
+            seen_ids += [recipe["id"] for recipe in response.data["recipes"]]
+            if response.data["next"] is None:
+                break
+            response = self.client.get(
+                "/api/recipes/",
+                {"limit": 2, "cursor": response.data["next"]})
+        self.assertEqual(seen_ids, self.expected_ids)
+
+        # Walk back from the last page.
+        response = self.client.get(
+            "/api/recipes/",
+            {"limit": 2, "cursor": response.data["previous"]})
+        self.assertEqual(
+            [recipe["id"] for recipe in response.data["recipes"]],
+            self.expected_ids[2:4])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_no_offset_scan(self):
+        first_page = self.client.get("/api/recipes/", {"limit": 2})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                "/api/recipes/",
+                {"limit": 2, "cursor": first_page.data["next"]})
+        for query in queries.captured_queries:
+            self.assertNotIn("OFFSET", query["sql"].upper())
+
+    def test_limit_and_invalid_cursor(self):
+        response = self.client.get("/api/recipes/", {"limit": 1000})
+        self.assertEqual(len(response.data["recipes"]), 5)
+        self.assertEqual(response.data["total_count"], 5)
+
+        response = self.client.get("/api/recipes/", {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+
+class RecipeDetailViewTests(BaseRecipeTests):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+
+    def get_full_recipe(self, size: int) -> Recipe:
+        recipe = RecipeTests.get_generated_test_recipe(self.user)
+        for position in range(size, 0, -1):
+            InstructionTests.get_generated_test_instruction(recipe, position)
+            IngredientTests.get_generated_test_ingredient(recipe, position)
+            tag = Tag.objects.create(name=f"tag{position}")
+            recipe.tags.add(tag)
+        return recipe
+
+    def test_nested_representation(self):
+        recipe = self.get_full_recipe(3)
+        response = self.client.get(f"/api/recipes/{recipe.pk}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["author"],
+            {"id": self.user.pk, "username": self.user.username})
+        self.assertEqual(
+            [step["step"] for step in response.data["instructions"]],
+            [1, 2, 3])
+        self.assertEqual(
+            [item["position"] for item in response.data["ingredients"]],
+            [1, 2, 3])
+        self.assertEqual(response.data["ingredients"][0]["f_quantity"], "1/2")
+        self.assertEqual(
+            response.data["ingredients"][0]["f_measurement"], "cup")
+        self.assertCountEqual(
+            response.data["tags"], ["tag1", "tag2", "tag3"])
+        self.assertEqual(response.data["like_count"], 0)
+        self.assertEqual(response.data["comment_count"], 0)
+
+        response = self.client.get("/api/recipes/0/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_constant_query_count(self):
+        small_recipe = self.get_full_recipe(1)
+        large_recipe = self.get_full_recipe(25)
+
+        # HTTP validators, recipe with author and counts, then instructions,
+        # ingredients and tags prefetched.
+        with self.assertNumQueries(5):
+            self.client.get(f"/api/recipes/{small_recipe.pk}/")
+        with self.assertNumQueries(5):
+            self.client.get(f"/api/recipes/{large_recipe.pk}/")
+
+
+@skipUnless(connection.vendor == "sqlite", "Checks SQLite query plans")
+class RecipeQueryPlanTests(BaseRecipeTests):
+    """
+    Ensure the hot recipe queries are served by an index in their sort order
+    instead of sorting rows in a temporary B-tree.
+    """
+
+    def setUp(self):
+        super().setUp()
+        recipe = RecipeTests.get_generated_test_recipe(self.user)
+        InstructionTests.get_generated_test_instruction(recipe, 1)
+        IngredientTests.get_generated_test_ingredient(recipe, 1)
+        self.recipe = recipe
+
+    def assertIndexedScan(self, queryset, index_name: str):
+        plan: str = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_list_plans(self):
+        paginator = RecipesListView.paginator
+        recipes = Recipe.objects.order_by(*paginator.ordering)
+        self.assertIndexedScan(recipes[:21], "recipe_created_idx")
+
+        seek = paginator.seek_filter(
+            [self.recipe.created_at, self.recipe.pk], reverse=False)
+        self.assertIndexedScan(
+            recipes.filter(seek)[:21], "recipe_created_idx")
+        # Deep pages must start searching at the cursor, not scan up to it.
+        self.assertIn("SEARCH", recipes.filter(seek)[:21].explain())
+
+        public_recipes = Recipe.objects.filter(is_private=False).order_by(
+            "-created_at", "-id")
+        self.assertIndexedScan(
+            public_recipes[:21], "recipe_public_created_idx")
+
+    def test_per_author_plan(self):
+        self.assertIndexedScan(
+            Recipe.objects.filter(author=self.user)[:21],
+            "recipe_author_created_idx")
+
+    def test_detail_plans(self):
+        self.assertIndexedScan(
+            Instruction.objects.filter(recipe=self.recipe),
+            "instruction_recipe_step_idx")
+        self.assertIndexedScan(
+            Ingredient.objects.filter(recipe=self.recipe),
+            "ingredient_recipe_pos_idx")
+
+
+class RecipeSearchTests(BaseRecipeTests):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.soup = Recipe.objects.create(
+            name="Tomato soup",
+            description="A warm bowl for cold days",
+            prep_time=10,
+            cook_time=30,
+            notes="Freezes well",
+            servings=4,
+            author=self.user
+        )
+        self.salad = Recipe.objects.create(
+            name="Summer salad",
+            description="Crunchy and fresh",
+            prep_time=15,
+            cook_time=0,
+            notes="Add tomato if you like",
+            servings=2,
+            author=self.user
+        )
+
+    def search(self, query: str) -> list[int]:
+        response = self.client.get("/api/recipes/search/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [recipe["id"] for recipe in response.data["recipes"]]
+
+    def test_match_expression(self):
+        self.assertIsNone(search.build_match_expression("  ?! "))
+        self.assertEqual(
+            search.build_match_expression('Tomato "soup'),
+            '"tomato" "soup"*')
+        # Only a word still being typed and long enough is a prefix.
+        self.assertEqual(
+            search.build_match_expression("tomato soup "), '"tomato" "soup"')
+        self.assertEqual(
+            search.build_match_expression("tomato so"), '"tomato" "so"')
+        self.assertEqual(
+            search.build_match_expression("soup with"), '"soup"')
+
+    def test_ranks_by_relevance(self):
+        # A match in the name outranks a match in the notes.
+        self.assertEqual(
+            self.search("tomatoes"), [self.soup.pk, self.salad.pk])
+        self.assertEqual(self.search("crun"), [self.salad.pk])
+        self.assertEqual(self.search(""), [])
+
+    def test_wide_prefixes_match_exactly(self):
+        self.assertEqual(self.search("tom"), [self.soup.pk, self.salad.pk])
+        with mock.patch.object(search, "MAX_PREFIX_TERMS", 0):
+            self.assertEqual(self.search("tom"), [])
+            self.assertEqual(
+                self.search("summer salad"), [self.salad.pk])
+
+    def test_index_follows_children_and_privacy(self):
+        Ingredient.objects.create(
+            position=1, name="Basil", recipe=self.salad)
+        Instruction.objects.create(
+            step=1, description="Simmer gently", recipe=self.soup)
+        self.assertEqual(self.search("basil"), [self.salad.pk])
+        self.assertEqual(self.search("simmer"), [self.soup.pk])
+
+        self.salad.ingredients.all().delete()
+        self.assertEqual(self.search("basil"), [])
+
+        self.soup.is_private = True
+        self.soup.save()
+        self.assertEqual(self.search("soup"), [])
+
+        self.salad.delete()
+        self.assertEqual(self.search("salad"), [])
+
+
+class PantryTests(BaseRecipeTests):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.omelette = self.get_recipe_with(["Eggs", "Butter", "Salt"])
+        self.pancakes = self.get_recipe_with(
+            ["Flour", "eggs", "Milk", "Butter (softened)"])
+        pantry_index.load()
+
+    def get_recipe_with(self, ingredient_names: list[str]) -> Recipe:
+        recipe = RecipeTests.get_generated_test_recipe(self.user)
+        for position, name in enumerate(ingredient_names, start=1):
+            Ingredient.objects.create(
+                position=position, name=name, recipe=recipe)
+        return recipe
+
+    def match(self, ingredients: str) -> list[tuple[int, int]]:
+        response = self.client.get(
+            "/api/recipes/pantry/", {"ingredients": ingredients})
+        self.assertEqual(response.status_code, 200)
+        return [
+            (result["recipe"]["id"], result["matched_count"])
+            for result in response.data["results"]
+        ]
+
+    def test_normalize_ingredient_name(self):
+        self.assertEqual(
+            normalize_ingredient_name("Fresh Tomatoes (diced)"), "tomato")
+        self.assertEqual(normalize_ingredient_name("Cherries"), "cherry")
+        self.assertEqual(normalize_ingredient_name("Potatoes"), "potato")
+        self.assertEqual(normalize_ingredient_name("Swiss Cheese"),
+                         "swiss cheese")
+        self.assertEqual(normalize_ingredient_name("Jalapeño"), "jalapeno")
+
+        # Spelling variants share one canonical ingredient.
+        self.assertEqual(CanonicalIngredient.objects.filter(
+            name="egg").count(), 1)
+        self.assertEqual(
+            self.omelette.ingredients.get(name="Eggs").canonical,
+            self.pancakes.ingredients.get(name="eggs").canonical)
+
+    def test_ranks_by_coverage(self):
+        self.assertEqual(
+            self.match("egg, butter, salt"),
+            [(self.omelette.pk, 3), (self.pancakes.pk, 2)])
+        self.assertEqual(
+            self.match("flour,milk,eggs"),
+            [(self.pancakes.pk, 3), (self.omelette.pk, 1)])
+        self.assertEqual(self.match("caviar"), [])
+
+    def test_index_refreshes_on_writes(self):
+        Ingredient.objects.create(
+            position=4, name="Chives", recipe=self.omelette)
+        self.assertEqual(self.match("chive"), [(self.omelette.pk, 1)])
+
+        self.omelette.ingredients.filter(name="Chives").delete()
+        self.assertEqual(self.match("chive"), [])
+
+        self.pancakes.is_private = True
+        self.pancakes.save()
+        self.assertEqual(self.match("flour"), [])
+
+        self.omelette.delete()
+        self.assertEqual(self.match("salt"), [])
+
+
+class BlockedContentTests(BaseRecipeTests):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.other = get_user_model().objects.create_user(
+            username="other_user", email="other@gmail.com", password="123")
+        self.own = self.get_tomato_recipe(self.user)
+        self.others = self.get_tomato_recipe(self.other)
+        pantry_index.load()
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_tomato_recipe(self, author: User) -> Recipe:
+        recipe = RecipeTests.get_generated_test_recipe(author)
+        recipe.name = "Tomato soup"
+        recipe.save()
+        Ingredient.objects.create(position=1, name="Tomato", recipe=recipe)
+        return recipe
+
+    def listed_ids(self) -> dict[str, list[int]]:
+        listing = self.client.get("/api/recipes/").data
+        found = self.client.get("/api/recipes/search/", {"q": "tomato"})
+        matched = self.client.get(
+            "/api/recipes/pantry/", {"ingredients": "tomato"})
+        return {
+            "list": [recipe["id"] for recipe in listing["recipes"]],
+            "search": sorted(
+                recipe["id"] for recipe in found.data["recipes"]),
+            "pantry": sorted(
+                result["recipe"]["id"]
+                for result in matched.data["results"]
+            ),
+        }
+
+    def assert_listed(self, recipes: list[Recipe]) -> None:
+        ids = sorted(recipe.pk for recipe in recipes)
+        self.assertEqual(self.listed_ids(), {
+            "list": ids[::-1],
+            "search": ids,
+            "pantry": ids,
+        })
+
+    def test_blocks_in_either_direction_hide_recipes(self):
+        self.assert_listed([self.own, self.others])
+        self.other.block(self.user)
+        self.assert_listed([self.own])
+        self.other.unblock(self.user)
+        self.assert_listed([self.own, self.others])
+        self.user.block(self.other)
+        self.assert_listed([self.own])
+
+    def test_list_etag_follows_block_set(self):
+        etag = self.client.get("/api/recipes/")["ETag"]
+        self.user.block(self.other)
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class RecipeFacetTests(BaseRecipeTests):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        vegan = Tag.objects.create(
+            name="VEGAN", tag_type=Tag.Type.DIETARY_PREFERENCE)
+        easy = Tag.objects.create(name="EASY", tag_type=Tag.Type.DIFFICULTY)
+        dinner = Tag.objects.create(name="DINNER", tag_type=Tag.Type.COURSE)
+        lunch = Tag.objects.create(name="LUNCH", tag_type=Tag.Type.COURSE)
+
+        self.vegan_dinner = self.get_recipe_with([vegan, easy, dinner])
+        self.vegan_lunch = self.get_recipe_with([vegan, easy, lunch])
+        self.hard_dinner = self.get_recipe_with([vegan, dinner])
+        self.plain = self.get_recipe_with([])
+
+    def get_recipe_with(self, tags: list[Tag]) -> Recipe:
+        recipe = RecipeTests.get_generated_test_recipe(self.user)
+        recipe.tags.add(*tags)
+        return recipe
+
+    def get_ids(self, response) -> set[int]:
+        return {recipe["id"] for recipe in response.data["recipes"]}
+
+    def test_filters_by_every_tag(self):
+        response = self.client.get(
+            "/api/recipes/", {"tags": "vegan,Easy", "course": "DINNER"})
+        self.assertEqual(self.get_ids(response), {self.vegan_dinner.pk})
+        self.assertEqual(response.data["total_count"], 1)
+
+        response = self.client.get("/api/recipes/", {"tags": "vegan"})
+        self.assertEqual(
+            self.get_ids(response),
+            {self.vegan_dinner.pk, self.vegan_lunch.pk, self.hard_dinner.pk})
+
+        # Right name, wrong type.
+        response = self.client.get("/api/recipes/", {"difficulty": "DINNER"})
+        self.assertEqual(self.get_ids(response), set())
+        self.assertEqual(response.data["total_count"], 0)
+
+    def test_facet_counts(self):
+        response = self.client.get("/api/recipes/", {"tags": "VEGAN"})
+        self.assertEqual(response.data["facets"], {
+            "dietary_preference": [],
+            "course": [
+                {"name": "DINNER", "count": 2},
+                {"name": "LUNCH", "count": 1}
+            ],
+            "difficulty": [{"name": "EASY", "count": 2}],
+            "custom": []
+        })
+
+        response = self.client.get("/api/recipes/")
+        self.assertNotIn("facets", response.data)
+        response = self.client.get("/api/recipes/", {"facets": "true"})
+        self.assertEqual(
+            response.data["facets"]["dietary_preference"],
+            [{"name": "VEGAN", "count": 3}])
+
+    def test_facets_use_one_aggregate_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/recipes/", {"tags": "VEGAN,EASY"})
+        facet_queries = [
+            query for query in queries.captured_queries
+            if "GROUP BY" in query["sql"]
+        ]
+        self.assertEqual(len(facet_queries), 1)
+
+
+class RecipeConditionalGetTests(BaseRecipeTests):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.recipe = RecipeTests.get_generated_test_recipe(self.user)
+        self.url = f"/api/recipes/{self.recipe.pk}/"
+
+    def test_detail_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        self.assertNotIn("Last-Modified", response.headers)
+
+        # Answered from the validators query alone.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Editing a child must invalidate the parent's validators.
+        IngredientTests.get_generated_test_ingredient(self.recipe, 1)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_children_and_tags_touch_recipe(self):
+        last_updated = self.recipe.last_updated
+        instruction = InstructionTests.get_generated_test_instruction(
+            self.recipe, 1)
+        self.recipe.refresh_from_db()
+        self.assertGreater(self.recipe.last_updated, last_updated)
+
+        last_updated = self.recipe.last_updated
+        instruction.delete()
+        self.recipe.refresh_from_db()
+        self.assertGreater(self.recipe.last_updated, last_updated)
+
+        last_updated = self.recipe.last_updated
+        tag = TagTests.get_generated_test_tag()
+        tag.recipes.add(self.recipe)
+        self.recipe.refresh_from_db()
+        self.assertGreater(self.recipe.last_updated, last_updated)
+
+        last_updated = self.recipe.last_updated
+        tag.recipes.clear()
+        self.recipe.refresh_from_db()
+        self.assertGreater(self.recipe.last_updated, last_updated)
+
+    def test_list_validators(self):
+        response = self.client.get("/api/recipes/")
+        etag = response.headers["ETag"]
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Other query strings are other representations.
+        response = self.client.get(
+            "/api/recipes/", {"limit": 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        RecipeTests.get_generated_test_recipe(self.user)
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response.headers["ETag"]
+        self.recipe.delete()
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response.headers)
+
+    def test_engagement_changes_list_but_not_last_updated(self):
+        response = self.client.get("/api/recipes/")
+        etag = response.headers["ETag"]
+        last_updated = self.recipe.last_updated
+
+        like = RecipeLike.objects.create(recipe=self.recipe, author=self.user)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.last_updated, last_updated)
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["recipes"][0]["like_count"], 1)
+
+        # Unlikes change the list too.
+        etag = response.headers["ETag"]
+        like.delete()
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class RecipeDetailCacheTests(BaseRecipeTests):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        detail_cache_stats.reset()
+        self.client = APIClient()
+        self.recipe = RecipeTests.get_generated_test_recipe(self.user)
+        self.tag = TagTests.get_generated_test_tag()
+        self.recipe.tags.add(self.tag)
+        self.url = f"/api/recipes/{self.recipe.pk}/"
+
+    def assertCounts(self, hits: int, misses: int):
+        self.assertEqual(
+            (detail_cache_stats.hits, detail_cache_stats.misses),
+            (hits, misses))
+
+    def test_hits_skip_serialization(self):
+        self.client.get(self.url)
+        self.assertCounts(hits=0, misses=1)
+
+        # Only the validators query runs on a hit.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertCounts(hits=1, misses=1)
+        self.assertEqual(response.data["name"], self.recipe.name)
+
+        response = self.client.get("/api/recipes/0/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalidation(self):
+        self.client.get(self.url)
+
+        IngredientTests.get_generated_test_ingredient(self.recipe, 1)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data["ingredients"]), 1)
+
+        self.tag.name = "renamed"
+        self.tag.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["tags"], ["renamed"])
+
+        RecipeLike.objects.create(recipe=self.recipe, author=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["like_count"], 1)
+
+        self.tag.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["tags"], [])
+
+        self.recipe.name = "New name"
+        self.recipe.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["name"], "New name")
+        self.assertCounts(hits=0, misses=6)
+        self.assertIsNotNone(cache.get(f"recipe-detail:{self.recipe.pk}"))
+
+        recipe_id = self.recipe.pk
+        self.recipe.delete()
+        self.assertIsNone(cache.get(f"recipe-detail:{recipe_id}"))
+
+    def test_author_rename(self):
+        response = self.client.get(self.url)
+        etag = response.headers["ETag"]
+
+        self.user.username = "renamed_user"
+        self.user.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["author"]["username"], "renamed_user")
+        # No timestamp moves, so none is offered for If-Modified-Since.
+        self.assertNotIn("Last-Modified", response.headers)
+
+
+class RecipeCreateTests(BaseRecipeTests):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Tag.objects.create(name="Vegan", tag_type=Tag.Type.DIETARY_PREFERENCE)
+
+    def get_payload(self, size: int) -> dict:
+        return {
+            "name": "Veggie chili",
+            "description": "Hearty and smoky",
+            "prep_time": 15,
+            "cook_time": 45,
+            "notes": "Better the next day",
+            "servings": 6,
+            "instructions": [
+                {"step": step, "description": f"Do step {step}"}
+                for step in range(1, size + 1)
+            ],
+            "ingredients": [
+                {
+                    "position": position,
+                    "name": f"Bean {position}",
+                    "quantity": 0.5,
+                    "measurement": "CUP"
+                }
+                for position in range(1, size + 1)
+            ],
+            "tags": ["VEGAN", "dinner", "smoky"]
+        }
+
+    def test_create_nested_recipe(self):
+        response = self.client.post(
+            "/api/recipes/", self.get_payload(3), format="json")
+        self.assertEqual(response.status_code, 201)
+
+        recipe = Recipe.objects.get(pk=response.data["recipe"]["id"])
+        self.assertEqual(recipe.author, self.user)
+        self.assertEqual(
+            [step.step for step in recipe.instructions.all()], [1, 2, 3])
+        self.assertEqual(
+            response.data["recipe"]["ingredients"][0]["f_quantity"], "1/2")
+        self.assertIsNotNone(recipe.ingredients.first().canonical)
+
+        # Existing tags are reused case-insensitively, new ones get typed.
+        self.assertEqual(Tag.objects.filter(name__iexact="vegan").count(), 1)
+        self.assertEqual(
+            Tag.objects.get(name="dinner").tag_type, Tag.Type.COURSE)
+        self.assertEqual(
+            Tag.objects.get(name="smoky").tag_type, Tag.Type.CUSTOM)
+        self.assertEqual(recipe.tags.count(), 3)
+
+        # Bulk inserted children are searchable.
+        self.assertEqual(
+            search.search_recipe_ids("bean", 10), [recipe.pk])
+
+    def test_constant_statement_count(self):
+        # The first post creates the tags, canonical ingredients and row
+        # counter, so only compare posts made after it.
+        self.client.post("/api/recipes/", self.get_payload(20), format="json")
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(
+                "/api/recipes/", self.get_payload(2), format="json")
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(
+                "/api/recipes/", self.get_payload(20), format="json")
+        self.assertEqual(len(small), len(large))
+
+    def test_rejects_bad_payloads(self):
+        payload = self.get_payload(2)
+        payload["instructions"][1]["step"] = 1
+        response = self.client.post("/api/recipes/", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Recipe.objects.count(), 0)
+
+        self.client.force_authenticate(None)
+        response = self.client.post(
+            "/api/recipes/", self.get_payload(2), format="json")
+        self.assertIn(response.status_code, (401, 403))
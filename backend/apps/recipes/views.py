@@ -1,49 +1,284 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import hashlib
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
 
+from django.conf import settings
+from django.db.models import Max
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import status
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from .models import Recipe
-from .serializers import RecipeSerializer
+from apps.counters.models import RowCounter
+from apps.engagement.buffer import like_buffer
+from apps.users.blocks import exclude_blocked, get_block_set
+from core.pagination import KeysetPaginator, get_limit
+from . import search
+from .cache import get_recipe_detail
+from .models import Recipe, CanonicalIngredient, Tag
+from .pantry import pantry_index, normalize_ingredient_name
+from .serializers import (
+    RecipeSerializer, RecipeDetailSerializer, RecipeCreateSerializer)
 
 if TYPE_CHECKING:
+    from django.db.models.query import QuerySet
     from rest_framework.request import Request
 
 
+def _validators(request: Request, key: str, compute) -> Optional[str]:
+    """Compute a request's ETag once for the decorator and the view"""
+    cache: dict = request.__dict__.setdefault("_validators", {})
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+
+def _hash(*parts: object) -> str:
+    return hashlib.md5(
+        "|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def recipe_list_etag(request: Request, *args, **kwargs) -> str:
+    """
+    ETag of the recipe list from the newest edit, the newest change of
+    engagement counts and the maintained row count, which together change
+    whenever any recipe card does, and from the block set of the user,
+    which decides whose recipes are left out.
+
+    The list has no Last-Modified: deleted recipes, block changes and
+    buffered likes change it without leaving a timestamp behind.
+    """
+    latest: dict[str, Optional[datetime]] = Recipe.objects.order_by(
+    ).aggregate(
+        last_updated=Max("last_updated"),
+        counts_updated=Max("counts_updated")
+    )
+    count: int = RowCounter.objects.get_count(Recipe)
+    etag = _hash(
+        latest["last_updated"],
+        latest["counts_updated"],
+        count,
+        request.GET.urlencode(),
+        sorted(get_block_set(request.user))
+    )
+    if not settings.LIKE_WRITE_BEHIND:
+        return etag
+    # As for the detail, buffered likes of any recipe may show up on a page.
+    return _hash(etag, sorted(like_buffer.pending_deltas().items()))
+
+
+def _recipe_detail_etag(request: Request, pk: int) -> Optional[str]:
+    """
+    Stored ETag of a recipe from its last edit and the engagement counts
+    and author name shown with it; `None` when the recipe does not exist.
+
+    The detail has no Last-Modified: renaming the author and buffered likes
+    change it without moving any of its timestamps.
+    """
+    def compute() -> Optional[str]:
+        row = Recipe.objects.filter(pk=pk).order_by().values_list(
+            "last_updated", "counts_updated", "like_count", "comment_count",
+            "author__username"
+        ).first()
+        if row is None:
+            return None
+        return _hash(pk, *row)
+
+    return _validators(request, f"recipe_detail_{pk}", compute)
+
+
+def recipe_detail_etag(request: Request, pk: int, *args, **kwargs) -> str:
+    etag = _recipe_detail_etag(request, pk)
+    if etag is None or not settings.LIKE_WRITE_BEHIND:
+        return etag
+    # Buffered likes show up in the response without changing what is
+    # stored, so only the response's ETag accounts for them.
+    return _hash(etag, like_buffer.pending_delta(pk))
+
+
+@method_decorator(condition(etag_func=recipe_list_etag), name="get")
 class RecipesListView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    paginator = KeysetPaginator(ordering=("-created_at", "-id"))
     
     def get(self, request: Request) -> Response:
-        """List all the recipes in the database with additional meta"""
-        recipes = Recipe.objects.all()
-        total_count: int = Recipe.objects.count()
+        """
+        List a page of recipes, latest first, with additional meta.
+
+        Paginated with `?limit=` and the opaque `?cursor=` returned as `next`
+        or `previous` by an earlier page.
+
+        Filtered with `?tags=` for tag names of any type, or with one
+        parameter per tag type such as `?course=DINNER`, each taking a
+        comma-separated list. A recipe must carry every requested tag.
+        Facet counts for the other tags under the current filter are
+        included when filtering or when `?facets=true` is given.
+
+        Recipes by users blocked in either direction are left out.
+        """
+        terms = self.get_filter_terms(request)
+        with_facets = bool(terms) or request.query_params.get(
+            "facets", "").lower() in ("1", "true")
+
+        tag_groups = Tag.objects.resolve_filters(terms) if terms else []
+        if tag_groups is None:
+            recipes = Recipe.objects.none()
+        else:
+            recipes = Recipe.objects.with_tags(tag_groups)
+        recipes = exclude_blocked(recipes, request.user)
+
+        page, cursors = self.paginator.paginate(
+            recipes.prefetch_related("tags"), request)
+        if terms:
+            total_count: int = recipes.count()
+        else:
+            total_count = RowCounter.objects.get_count(Recipe)
+        serializer = RecipeSerializer(page, many=True)
+        recipe_cards = serializer.data
+        if settings.LIKE_WRITE_BEHIND:
+            deltas = like_buffer.pending_deltas()
+            for card in recipe_cards:
+                card["like_count"] += deltas.get(card["id"], 0)
+
+        data = {
+            "total_count": total_count,
+            **cursors,
+            "recipes": recipe_cards
+        }
+        if with_facets:
+            data["facets"] = self.get_facets(recipes, tag_groups or [])
+        return Response(data=data, status=status.HTTP_200_OK)
+
+    def post(self, request: Request) -> Response:
+        """
+        Store a new recipe by the requesting user along with its nested
+        instructions, ingredients and tag names
+        """
+        serializer = RecipeCreateSerializer(data=request.data)
+        if serializer.is_valid():
+            recipe = serializer.save(author=request.user)
+            detail = RecipeDetailSerializer(
+                Recipe.objects.with_details().get(pk=recipe.pk))
+            return Response(data={"message": "Recipe created successfully", "recipe": detail.data}, status=status.HTTP_201_CREATED)
+
+        return Response(data={"message": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    def get_filter_terms(
+            self, request: Request) -> list[tuple[str, str | None]]:
+        """Collect `(tag name, tag type)` pairs from the query parameters"""
+        params = {"tags": None}
+        params.update({value.lower(): value for value in Tag.Type.values})
+
+        terms: list[tuple[str, str | None]] = []
+        for param, tag_type in params.items():
+            for name in request.query_params.get(param, "").split(","):
+                if name.strip():
+                    terms.append((name.strip(), tag_type))
+        return terms
+
+    def get_facets(
+            self, recipes: QuerySet, tag_groups: list[list[int]]) -> dict:
+        """Group the facet counts of the filtered recipes by tag type"""
+        facets: dict[str, list[dict]] = {
+            value.lower(): [] for value in Tag.Type.values}
+        if not recipes.query.is_empty():
+            selected_ids = [tag_id for group in tag_groups for tag_id in group]
+            for tag in Tag.objects.facet_counts(recipes, selected_ids):
+                facets[tag["tag_type"].lower()].append(
+                    {"name": tag["name"], "count": tag["count"]})
+        return facets
+
+
+class RecipeSearchView(APIView):
+    default_limit: int = 20
+    max_limit: int = 50
+
+    def get(self, request: Request) -> Response:
+        """
+        Rank public recipes by relevance to `?q=` across their name,
+        description, notes, ingredients and instructions, leaving out users
+        blocked in either direction
+        """
+        query: str = request.query_params.get("q", "")
+        limit = get_limit(request, self.default_limit, self.max_limit)
+
+        recipe_ids = search.search_recipe_ids(
+            query, limit, get_block_set(request.user))
+        recipes_by_id = Recipe.objects.prefetch_related("tags").in_bulk(
+            recipe_ids)
+        recipes = [
+            recipes_by_id[recipe_id]
+            for recipe_id in recipe_ids if recipe_id in recipes_by_id
+        ]
         serializer = RecipeSerializer(recipes, many=True)
 
         return Response(data={
-            "total_count": total_count, "recipes": serializer.data
+            "query": query, "recipes": serializer.data
         }, status=status.HTTP_200_OK)
 
 
+class RecipePantryView(APIView):
+    default_limit: int = 20
+    max_limit: int = 50
+
+    def get(self, request: Request) -> Response:
+        """
+        Rank public recipes by how much of their ingredient list is covered
+        by the comma-separated `?ingredients=` the user has at hand, leaving
+        out users blocked in either direction
+        """
+        names = [
+            normalize_ingredient_name(name)
+            for name in request.query_params.get("ingredients", "").split(",")
+        ]
+        limit = get_limit(request, self.default_limit, self.max_limit)
+
+        canonical_ids = CanonicalIngredient.objects.filter(
+            name__in=[name for name in names if name]
+        ).values_list("id", flat=True)
+        block_set = get_block_set(request.user)
+        excluded_ids = set(Recipe.objects.filter(
+            author_id__in=block_set
+        ).values_list("id", flat=True)) if block_set else ()
+        matches = pantry_index.match(canonical_ids, limit, excluded_ids)
+        recipes_by_id = Recipe.objects.prefetch_related("tags").in_bulk(
+            [match.recipe_id for match in matches])
+
+        results = [
+            {
+                "matched_count": match.matched_count,
+                "ingredient_count": match.ingredient_count,
+                "coverage": round(match.coverage, 3),
+                "recipe": RecipeSerializer(recipes_by_id[match.recipe_id]).data
+            }
+            for match in matches if match.recipe_id in recipes_by_id
+        ]
+        return Response(data={"results": results}, status=status.HTTP_200_OK)
+
+
+@method_decorator(condition(etag_func=recipe_detail_etag), name="get")
 class RecipeDetailView(APIView):
 
     def get(self, request: Request, pk: int, *args, **kwargs) -> Response:
         """Get a detailed view of a recipe's info"""
-        try:
-            recipe = Recipe.objects.get(pk=pk)
-            serializer = RecipeSerializer(recipe)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except Recipe.DoesNotExist:
-            return Response(data={"message": "Recipe does not exist"}, status=status.HTTP_404_NOT_FOUND)
-    
-    def post(self, request: Request) -> Response:
-        """Store a new user into the database"""
-        serializer = RecipeSerializer(request.data)
-        if serializer.is_valid(raise_exception=True):
-            serializer.save()
-            return Response(data={"message": "Recipe created successfully", "recipe": serializer.data}, status=status.HTTP_201_CREATED)
-
-        return Response(data={"message": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
-
+        def build() -> Optional[dict]:
+            recipe = Recipe.objects.with_details().filter(pk=pk).first()
+            if recipe is None:
+                return None
+            return dict(RecipeDetailSerializer(recipe).data)
 
+        etag = _recipe_detail_etag(request, pk)
+        data = None if etag is None else get_recipe_detail(pk, etag, build)
+        if data is None:
+            return Response(data={"message": "Recipe does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        if settings.LIKE_WRITE_BEHIND:
+            data = {
+                **data,
+                "like_count": data["like_count"]
+                + like_buffer.pending_delta(pk)
+            }
+        return Response(data, status=status.HTTP_200_OK)
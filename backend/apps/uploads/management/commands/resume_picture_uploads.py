@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.uploads.processing import resume_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Make the variants of picture uploads left pending, such as those "
+        "queued in a process that stopped before making them"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--minutes", type=int, default=10,
+            help="Only resume uploads pending for longer than this")
+
+    def handle(self, *args, **options) -> None:
+        resumed = resume_pending(timedelta(minutes=options["minutes"]))
+        self.stdout.write(f"Resumed {resumed} uploads")
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:30
+
+import apps.uploads.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0010_add_recipe_engagement_counters'),
+        ('uploads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pictureupload',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Created at'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='pictureupload',
+            name='original',
+            field=models.ImageField(default='', upload_to=apps.uploads.models._upload_path, verbose_name='Original'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='pictureupload',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=7, verbose_name='Status'),
+        ),
+        migrations.AddField(
+            model_name='pictureupload',
+            name='uploader',
+            field=models.ForeignKey(default=None, on_delete=django.db.models.deletion.CASCADE, related_name='picture_uploads', to=settings.AUTH_USER_MODEL),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='pictureupload',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Variants'),
+        ),
+        migrations.AddField(
+            model_name='recipepictureupload',
+            name='recipe',
+            field=models.ForeignKey(default=None, on_delete=django.db.models.deletion.CASCADE, related_name='pictures', to='recipes.recipe'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='userprofilepictureupload',
+            name='user',
+            field=models.ForeignKey(default=None, on_delete=django.db.models.deletion.CASCADE, related_name='profile_pictures', to=settings.AUTH_USER_MODEL),
+            preserve_default=False,
+        ),
+    ]
@@ -1,33 +1,82 @@
 from __future__ import annotations
 
+import posixpath
 from typing import TYPE_CHECKING
 
 from django.conf import settings
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 
-from core.storage_backends import PublicMediaStorage, PrivateMediaStorage
+from core.storage_backends import PublicMediaStorage
 
 if TYPE_CHECKING:
     from storages.backends.s3boto3 import S3Boto3Storage
 
-    from apps.recipes.models import Recipe
-    from apps.users.models import User
+
+def _upload_path_recipes(
+        instance: RecipePictureUpload, filename: str) -> str:
+    """Upload path for recipe pictures"""
+    id: int = instance.recipe_id
+    return f"{settings.RECIPE_PICTURES_LOCATION}/recipe-{id}-{filename}"
+
+
+def _upload_path_profiles(
+        instance: UserProfilePictureUpload, filename: str) -> str:
+    """Upload path for profile pictures"""
+    username: str = instance.user.username
+    return f"{settings.PROFILE_PICTURES_LOCATION}/user-{username}-{filename}"
+
+
+def _upload_path(instance: PictureUpload, filename: str) -> str:
+    return instance.upload_path(filename)
 
 
 class PictureUpload(models.Model):
-    """Store an image uploader by a user"""
-    
-    def _upload_path_recipes(self, instance: Recipe, filename: str) -> str:
-        """Local upload path for recipe pictures"""
-        id: int = instance.id
-        return f"{settings.RECIPE_PICTURES_LOCATION}/recipe-{id}-{filename}"
-
-    def _upload_path_profiles(self, instance: User, filename: str) -> str:
-        """Local upload path for profile pictures"""
-        username: str = instance.username
-        return (
-            f"{settings.PROFILE_PICTURES_LOCATION}/user-{username}-{filename}")
-    
+    """
+    Store an image uploaded by a user, along with the resized variants of it
+    listed in `PICTURE_VARIANTS` once `apps.uploads.processing` made them.
+
+    Files go through the default storage: the local media folder in
+    development and S3 in production.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", _("Pending")
+        READY = "READY", _("Ready")
+        FAILED = "FAILED", _("Failed")
+
+    created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
+    original = models.ImageField(_("Original"), upload_to=_upload_path)
+    status = models.CharField(
+        _("Status"),
+        max_length=7,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    # Variant name to the storage name of its file.
+    variants = models.JSONField(_("Variants"), default=dict, blank=True)
+
+    uploader = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="picture_uploads"
+    )
+
+    def upload_path(self, filename: str) -> str:
+        """Upload path of pictures not tied to a recipe or profile"""
+        return f"{settings.PICTURES_LOCATION}/upload-{filename}"
+
+    def variant_path(self, variant: str) -> str:
+        """Storage name of a variant, next to the original"""
+        stem = posixpath.splitext(self.original.name)[0]
+        return f"{stem}-{variant}.jpg"
+
+    def delete_files(self) -> None:
+        """Delete the original and the variants from the storage"""
+        storage = self.original.storage
+        for name in (self.original.name, *self.variants.values()):
+            storage.delete(name)
+
     @property
     def external_storage(self) -> S3Boto3Storage:
         """Image file location for production environment"""
@@ -36,10 +85,43 @@ class PictureUpload(models.Model):
 
 class RecipePictureUpload(PictureUpload):
     """Store the recipe picture (or pictures) by a user"""
-    pass
+
+    recipe = models.ForeignKey(
+        "recipes.Recipe",
+        on_delete=models.CASCADE,
+        related_name="pictures"
+    )
+
+    def upload_path(self, filename: str) -> str:
+        return _upload_path_recipes(self, filename)
 
 
 class UserProfilePictureUpload(PictureUpload):
-    """Store the profile picture of a user"""
-    pass
+    """
+    Store the profile picture of a user. It is the user's newest ready
+    upload, which replaces the earlier ones once its variants are made.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="profile_pictures"
+    )
+
+    def upload_path(self, filename: str) -> str:
+        return _upload_path_profiles(self, filename)
 
+    @classmethod
+    def replace_earlier(cls, upload_id: int) -> None:
+        """
+        Delete the profile pictures of the uploader older than the given
+        ready upload, along with their files; other uploads are left alone
+        """
+        user_id = cls.objects.filter(
+            pk=upload_id, status=PictureUpload.Status.READY
+        ).values_list("user_id", flat=True).first()
+        if user_id is None:
+            return
+        for earlier in cls.objects.filter(user_id=user_id, pk__lt=upload_id):
+            earlier.delete()
+            earlier.delete_files()
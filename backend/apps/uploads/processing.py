@@ -0,0 +1,147 @@
+"""
+Resized variants of uploaded pictures, made outside of requests.
+
+Once the transaction storing an upload commits, `schedule_variants` hands
+it to a pool of `PICTURE_WORKERS` threads, so a request only pays for
+checking and storing the original. Pillow lets go of the GIL while it
+decodes, resizes and encodes, so the threads do run side by side.
+
+Each picture is decoded once, at the lowest JPEG scale still covering
+every variant, and each variant is shrunk from that decoded picture.
+
+Uploads queued in a process that stops are left pending;
+`resume_picture_uploads` makes their variants.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import PictureUpload, UserProfilePictureUpload
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    settings.PICTURE_WORKERS, thread_name_prefix="pictures")
+    return _pool
+
+
+def render_variants(
+        file, sizes: dict[str, tuple[int, int]]) -> dict[str, bytes]:
+    """JPEG bytes of a picture shrunk to fit each size, never enlarged"""
+    covering = (
+        max(width for width, _ in sizes.values()),
+        max(height for _, height in sizes.values())
+    )
+    with Image.open(file) as image:
+        # Let the JPEG decoder skip detail no variant needs.
+        image.draft("RGB", covering)
+        image = ImageOps.exif_transpose(image).convert("RGB")
+
+    rendered = {}
+    for name, size in sizes.items():
+        variant = image.copy()
+        variant.thumbnail(size, Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        variant.save(output, "JPEG", quality=85, optimize=True)
+        rendered[name] = output.getvalue()
+    return rendered
+
+
+def make_variants(upload_id: int) -> None:
+    """
+    Store the variants of an upload and mark it ready, or failed whatever
+    went wrong, so no upload is left pending by an error
+    """
+    upload = PictureUpload.objects.filter(pk=upload_id).first()
+    if upload is None:
+        return
+    try:
+        with upload.original.open("rb") as file:
+            rendered = render_variants(file, settings.PICTURE_VARIANTS)
+        storage = upload.original.storage
+        variants = {
+            name: storage.save(upload.variant_path(name), ContentFile(data))
+            for name, data in rendered.items()
+        }
+    except (OSError, Image.DecompressionBombError):
+        # Unreadable pictures are the uploader's doing, not an error here.
+        _mark_failed(upload_id)
+        return
+    except Exception:
+        logger.exception(
+            "Could not make the variants of upload %s", upload_id)
+        _mark_failed(upload_id)
+        return
+
+    updated = PictureUpload.objects.filter(pk=upload_id).update(
+        status=PictureUpload.Status.READY, variants=variants)
+    if not updated:
+        # Deleted while its variants were being made.
+        upload.variants = variants
+        upload.delete_files()
+        return
+    UserProfilePictureUpload.replace_earlier(upload_id)
+
+
+def _mark_failed(upload_id: int) -> None:
+    PictureUpload.objects.filter(pk=upload_id).update(
+        status=PictureUpload.Status.FAILED)
+
+
+def resume_pending(older_than: timedelta) -> int:
+    """
+    Make the variants of uploads pending for longer than the given time,
+    such as those whose process stopped before making them. Returns the
+    number of uploads resumed.
+    """
+    upload_ids = list(PictureUpload.objects.filter(
+        status=PictureUpload.Status.PENDING,
+        created_at__lt=timezone.now() - older_than
+    ).order_by("pk").values_list("pk", flat=True))
+    for upload_id in upload_ids:
+        make_variants(upload_id)
+    return len(upload_ids)
+
+
+def _make_variants_in_pool(upload_id: int) -> None:
+    try:
+        make_variants(upload_id)
+    finally:
+        # Pool threads outlive requests, so nothing else closes this.
+        connection.close()
+
+
+def schedule_variants(upload: PictureUpload) -> None:
+    """
+    Make the variants of an upload once the current transaction commits,
+    in the pool, or right away when `PICTURE_WORKERS` is 0
+    """
+    upload_id = upload.pk
+
+    def schedule() -> None:
+        if settings.PICTURE_WORKERS:
+            get_pool().submit(_make_variants_in_pool, upload_id)
+        else:
+            make_variants(upload_id)
+
+    transaction.on_commit(schedule)
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
+from rest_framework import serializers
+
+from .models import PictureUpload
+
+
+class PictureUploadSerializer(serializers.ModelSerializer):
+    """
+    An uploaded picture with the URL of each of its variants, which stay
+    empty while the upload is pending
+    """
+
+    variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PictureUpload
+        fields = ["id", "created_at", "status", "original", "variants"]
+        read_only_fields = ["status"]
+
+    def validate_original(self, image: UploadedFile) -> UploadedFile:
+        if image.size > settings.PICTURE_MAX_BYTES:
+            limit = filesizeformat(settings.PICTURE_MAX_BYTES)
+            raise serializers.ValidationError(
+                f"Pictures cannot be larger than {limit}")
+        return image
+
+    def get_variants(self, upload: PictureUpload) -> dict[str, str]:
+        storage = upload.original.storage
+        return {
+            variant: storage.url(name)
+            for variant, name in upload.variants.items()
+        }
@@ -1,3 +1,167 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.recipes.tests import RecipeTests
+from apps.users.tests import UserTests
+from .models import PictureUpload, RecipePictureUpload
+from .processing import make_variants, render_variants
+
+
+def picture(
+        width: int, height: int, name: str = "dish.jpg"
+) -> SimpleUploadedFile:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "orange").save(output, "JPEG")
+    return SimpleUploadedFile(name, output.getvalue(), "image/jpeg")
+
+
+@override_settings(PICTURE_WORKERS=0)
+class PictureUploadTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = UserTests.get_random_user()
+        self.recipe = RecipeTests.get_generated_test_recipe(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, url: str, image) -> dict:
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                url, {"original": image}, format="multipart")
+        return response
+
+    def variant_sizes(self, upload: PictureUpload) -> dict:
+        sizes = {}
+        for variant, name in upload.variants.items():
+            with upload.original.storage.open(name) as file:
+                sizes[variant] = Image.open(file).size
+        return sizes
+
+    def test_recipe_picture(self):
+        url = f"/api/recipes/{self.recipe.pk}/pictures/"
+        response = self.upload(url, picture(2000, 1000))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["upload"]["status"], "PENDING")
+
+        upload = RecipePictureUpload.objects.get(recipe=self.recipe)
+        self.assertEqual(upload.status, PictureUpload.Status.READY)
+        self.assertTrue(upload.original.name.startswith(
+            f"recipe_pictures/recipe-{self.recipe.pk}-dish"))
+        self.assertEqual(self.variant_sizes(upload), {
+            "full": (1600, 800), "card": (600, 300), "thumbnail": (150, 75)})
+
+        response = self.client.get(f"/api/uploads/{upload.pk}/")
+        self.assertEqual(response.data["status"], "READY")
+        self.assertEqual(
+            set(response.data["variants"]), {"full", "card", "thumbnail"})
+
+        # Small pictures are never enlarged.
+        self.upload(url, picture(100, 50))
+        upload = RecipePictureUpload.objects.latest("pk")
+        self.assertEqual(self.variant_sizes(upload)["full"], (100, 50))
+
+    def test_profile_picture(self):
+        response = self.upload(
+            f"/api/users/{self.user.pk}/picture/", picture(300, 300))
+        self.assertEqual(response.status_code, 202)
+        upload = self.user.profile_pictures.get()
+        self.assertTrue(upload.original.name.startswith(
+            f"profile_pictures/user-{self.user.username}-dish"))
+        self.assertEqual(self.variant_sizes(upload)["thumbnail"], (150, 150))
+
+        # A new picture replaces the earlier one once it is ready.
+        earlier = upload
+        self.upload(f"/api/users/{self.user.pk}/picture/", picture(20, 20))
+        upload = self.user.profile_pictures.get()
+        self.assertNotEqual(upload.pk, earlier.pk)
+        self.assertFalse(
+            earlier.original.storage.exists(earlier.original.name))
+
+        # Missing users look the same as other users.
+        other = UserTests.get_random_user()
+        for pk in (other.pk, other.pk + 1):
+            response = self.upload(
+                f"/api/users/{pk}/picture/", picture(300, 300))
+            self.assertEqual(response.status_code, 403)
+
+    def test_rejected_uploads(self):
+        url = f"/api/recipes/{self.recipe.pk}/pictures/"
+        text = SimpleUploadedFile("dish.jpg", b"not a picture", "image/jpeg")
+        self.assertEqual(self.upload(url, text).status_code, 400)
+        with override_settings(PICTURE_MAX_BYTES=100):
+            self.assertEqual(
+                self.upload(url, picture(200, 200)).status_code, 400)
+        response = self.upload(
+            f"/api/recipes/{self.recipe.pk + 1}/pictures/", picture(10, 10))
+        self.assertEqual(response.status_code, 404)
+
+        self.client.force_authenticate(UserTests.get_random_user())
+        self.assertEqual(self.upload(url, picture(10, 10)).status_code, 403)
+        self.assertFalse(PictureUpload.objects.exists())
+
+    def test_variants_are_independent(self):
+        sizes = {"wide": (800, 200), "tall": (400, 600)}
+        original = picture(1200, 900)
+        rendered = render_variants(original, sizes)
+        self.assertEqual(
+            {name: Image.open(io.BytesIO(data)).size
+             for name, data in rendered.items()},
+            {"wide": (267, 200), "tall": (400, 300)})
+
+    def test_plain_upload(self):
+        upload = PictureUpload.objects.create(
+            uploader=self.user, original=picture(10, 10))
+        self.assertTrue(upload.original.name.startswith(
+            "pictures/upload-dish"))
+
+    def test_unreadable_original_fails(self):
+        self.upload(
+            f"/api/recipes/{self.recipe.pk}/pictures/", picture(10, 10))
+        upload = PictureUpload.objects.get()
+        with upload.original.storage.open(upload.original.name, "wb") as file:
+            file.write(b"truncated")
+        make_variants(upload.pk)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, PictureUpload.Status.FAILED)
+
+    def test_unexpected_errors_fail(self):
+        upload = PictureUpload.objects.create(
+            uploader=self.user, original=picture(10, 10))
+        with mock.patch(
+                "apps.uploads.processing.render_variants",
+                side_effect=ValueError), \
+                self.assertLogs("apps.uploads.processing", "ERROR"):
+            make_variants(upload.pk)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, PictureUpload.Status.FAILED)
+
+    def test_resume_pending(self):
+        # Queued in a process that stopped before making the variants.
+        stale = PictureUpload.objects.create(
+            uploader=self.user, original=picture(10, 10))
+        PictureUpload.objects.filter(pk=stale.pk).update(
+            created_at=timezone.now() - timedelta(hours=1))
+        recent = PictureUpload.objects.create(
+            uploader=self.user, original=picture(10, 10))
+
+        call_command("resume_picture_uploads", stdout=io.StringIO())
+        stale.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(stale.status, PictureUpload.Status.READY)
+        self.assertEqual(recent.status, PictureUpload.Status.PENDING)
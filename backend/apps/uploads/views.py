@@ -1,3 +1,73 @@
-from django.shortcuts import render
+from __future__ import annotations
 
-# Create your views here.
+from typing import TYPE_CHECKING
+
+from django.db import transaction
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.recipes.models import Recipe
+from .models import (
+    PictureUpload, RecipePictureUpload, UserProfilePictureUpload)
+from .processing import schedule_variants
+from .serializers import PictureUploadSerializer
+
+if TYPE_CHECKING:
+    from rest_framework.request import Request
+
+
+def store_upload(request: Request, upload: PictureUpload) -> Response:
+    """
+    Check and store the picture sent as `original` on the given upload and
+    answer right away, its variants being made in the background
+    """
+    serializer = PictureUploadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(data={"message": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    upload.uploader = request.user
+    upload.original = serializer.validated_data["original"]
+    with transaction.atomic():
+        upload.save()
+        schedule_variants(upload)
+    return Response(data={"message": "Picture uploaded successfully", "upload": PictureUploadSerializer(upload).data}, status=status.HTTP_202_ACCEPTED)
+
+
+class RecipePicturesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request: Request, pk: int) -> Response:
+        """Add a picture to a recipe of the requesting user"""
+        author_id = Recipe.objects.filter(pk=pk).values_list(
+            "author_id", flat=True).first()
+        if author_id is None:
+            return Response(data={"message": "Recipe does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        if author_id != request.user.pk:
+            return Response(data={"message": "Only the author can add pictures to a recipe"}, status=status.HTTP_403_FORBIDDEN)
+        return store_upload(request, RecipePictureUpload(recipe_id=pk))
+
+
+class UserProfilePictureView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request: Request, pk: int) -> Response:
+        """
+        Set the profile picture of the requesting user. Other users are
+        refused before anything is looked up, so no user ids are revealed.
+        """
+        if pk != request.user.pk:
+            return Response(data={"message": "Users can only set their own profile picture"}, status=status.HTTP_403_FORBIDDEN)
+        return store_upload(
+            request, UserProfilePictureUpload(user=request.user))
+
+
+class PictureUploadDetailView(APIView):
+
+    def get(self, request: Request, pk: int) -> Response:
+        """Get an upload, to see whether its variants are ready"""
+        upload = PictureUpload.objects.filter(pk=pk).first()
+        if upload is None:
+            return Response(data={"message": "Upload does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data=PictureUploadSerializer(upload).data, status=status.HTTP_200_OK)
@@ -0,0 +1,112 @@
+"""
+The follow graph as compact integer adjacency arrays, and the ranking of
+friends-of-friends candidates over it.
+
+Nothing here touches the database or the models, so the process pool of
+`rank_all` needs no Django setup in its workers, whichever start method
+they use.
+"""
+from __future__ import annotations
+
+import heapq
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+# (user index, [(candidate index, mutual count), ...] best first)
+Ranking = tuple[int, list[tuple[int, int]]]
+
+
+class Adjacency(NamedTuple):
+    """Neighbours of node i are `targets[offsets[i]:offsets[i + 1]]`"""
+
+    offsets: array
+    targets: array
+
+    def neighbours(self, node: int) -> array:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+
+class FollowGraph(NamedTuple):
+    user_ids: array  # Dense index to user id.
+    follows: Adjacency  # Who each user follows.
+    blocks: Adjacency  # Who each user blocked or was blocked by.
+    follower_counts: array
+
+
+def build_adjacency(
+        node_count: int, edges: Iterable[tuple[int, int]]) -> Adjacency:
+    """Build the adjacency arrays of edges given as (source, target)"""
+    degrees = array("i", bytes(4 * node_count))
+    sources = array("i")
+    targets = array("i")
+    for source, target in edges:
+        sources.append(source)
+        targets.append(target)
+        degrees[source] += 1
+
+    offsets = array("q", bytes(8 * (node_count + 1)))
+    for node in range(node_count):
+        offsets[node + 1] = offsets[node] + degrees[node]
+    placed = array("i", bytes(4 * len(targets)))
+    cursor = offsets[:-1]
+    for source, target in zip(sources, targets):
+        placed[cursor[source]] = target
+        cursor[source] += 1
+    return Adjacency(offsets, placed)
+
+
+_graph: Optional[FollowGraph] = None
+
+
+def _set_graph(graph: FollowGraph) -> None:
+    """Pool initializer giving each worker the graph once"""
+    global _graph
+    _graph = graph
+
+
+def rank_candidates(
+        graph: FollowGraph, node: int, limit: int) -> list[tuple[int, int]]:
+    """Top candidates of one user as (candidate index, mutual count)"""
+    followed = graph.follows.neighbours(node)
+    mutuals: Counter[int] = Counter()
+    for followee in followed:
+        mutuals.update(graph.follows.neighbours(followee))
+    if not mutuals:
+        return []
+    for excluded in (*followed, *graph.blocks.neighbours(node), node):
+        mutuals.pop(excluded, None)
+    counts = graph.follower_counts
+    return heapq.nlargest(
+        limit,
+        mutuals.items(),
+        key=lambda item: (item[1], counts[item[0]], -item[0])
+    )
+
+
+def _rank_chunk(nodes: range, limit: int) -> list[Ranking]:
+    return [(node, rank_candidates(_graph, node, limit)) for node in nodes]
+
+
+def rank_all(
+        graph: FollowGraph,
+        limit: int,
+        workers: int,
+        chunk_size: int = 2000
+) -> Iterator[list[Ranking]]:
+    """Rankings of every user, a chunk at a time, in a process pool"""
+    chunks = [
+        range(start, min(start + chunk_size, len(graph.user_ids)))
+        for start in range(0, len(graph.user_ids), chunk_size)
+    ]
+    if workers <= 1:
+        _set_graph(graph)
+        yield from (_rank_chunk(chunk, limit) for chunk in chunks)
+        return
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_set_graph,
+            initargs=(graph,)
+    ) as pool:
+        yield from pool.map(_rank_chunk, chunks, [limit] * len(chunks))
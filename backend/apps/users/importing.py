@@ -0,0 +1,227 @@
+"""
+Bulk creation of user accounts from CSV or JSON Lines files.
+
+`import_users` streams rows in batches. For every batch it normalizes the
+emails, validates each row with the user model's field validators, drops
+rows clashing with each other or with existing accounts on email or
+username, hashes the remaining passwords in a process pool and inserts
+the users with one `bulk_create`. Hashing is what `create_user` spends
+nearly all its time on, and each hash runs on one core, so a pool brings
+imports close to one hash per core at a time.
+
+Rows that cannot be read or fail validation are reported with their line
+number and skipped; they never stop the import.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import IO, Iterable, Iterator, NamedTuple, Optional, Union
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from apps.counters.models import RowCounter
+from core.workers import setup_worker
+from .models import User
+
+# Columns copied from each row; any other column is ignored.
+IMPORTED_FIELDS = (
+    "username", "email", "password", "first_name", "last_name", "bio",
+    "country"
+)
+
+
+class InvalidRow(NamedTuple):
+    """A row of the file that could not be read"""
+
+    reason: str
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    duplicates: int = 0
+    invalid: list[tuple[int, str]] = field(default_factory=list)
+
+
+def read_rows(
+        file: IO[str], file_format: str
+) -> Iterator[Union[dict, InvalidRow]]:
+    """
+    Rows of a "csv" file with a header line or of a "jsonl" file, one per
+    data line, those that cannot be parsed being `InvalidRow`
+    """
+    if file_format == "csv":
+        rows = csv.DictReader(file)
+        while True:
+            try:
+                yield next(rows)
+            except StopIteration:
+                return
+            except csv.Error as error:
+                yield InvalidRow(f"unreadable CSV: {error}")
+    elif file_format == "jsonl":
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                yield InvalidRow(f"unreadable JSON: {error}")
+    else:
+        raise ValueError(f"Unknown user file format {file_format!r}")
+
+
+def hash_passwords(
+        passwords: list[str],
+        pool: Optional[Executor],
+        workers: int = 1
+) -> list[str]:
+    """Hash passwords, empty ones becoming unusable passwords"""
+    if pool is None:
+        return [make_password(password or None) for password in passwords]
+    chunk_size = max(1, len(passwords) // (4 * workers))
+    return list(pool.map(
+        make_password, [password or None for password in passwords],
+        chunksize=chunk_size))
+
+
+def _row_values(row: Union[dict, InvalidRow]) -> dict:
+    """
+    Normalized values of the imported fields of a row, raising
+    `ValidationError` if they cannot make a valid user
+    """
+    if isinstance(row, InvalidRow):
+        raise ValidationError(row.reason)
+    if not isinstance(row, dict):
+        raise ValidationError("not an object")
+    values = {}
+    for name in IMPORTED_FIELDS:
+        value = row.get(name)
+        if value is not None and not isinstance(value, str):
+            raise ValidationError(f"{name} is not text")
+        values[name] = (value or "").strip()
+    if not values["username"] or not values["email"]:
+        raise ValidationError("missing username or email")
+    values["email"] = User.objects.normalize_email(values["email"])
+    User(**values).clean_fields(exclude=["password"])
+    # Text fields only apply max_length to forms, not to clean_fields().
+    for name in IMPORTED_FIELDS:
+        limit = User._meta.get_field(name).max_length
+        if limit is not None and len(values[name]) > limit:
+            raise ValidationError(
+                {name: f"Ensure this value has at most {limit} characters."})
+    return values
+
+
+def _taken(field: str, values: Iterable[str]) -> set[str]:
+    """Values of a unique user field already used by existing users"""
+    return set(User.objects.filter(
+        **{f"{field}__in": set(values)}).values_list(field, flat=True))
+
+
+def _clean_rows(
+        rows: Iterable[tuple[int, Union[dict, InvalidRow]]],
+        report: ImportReport
+) -> list[dict]:
+    """
+    Normalize and validate a batch and keep the rows whose email and
+    username are not taken by an existing user or an earlier row of the
+    batch
+    """
+    candidates = []
+    for line, row in rows:
+        try:
+            candidates.append(_row_values(row))
+        except ValidationError as error:
+            if hasattr(error, "error_dict"):
+                reason = "; ".join(
+                    f"{name}: {' '.join(messages)}"
+                    for name, messages in error.message_dict.items()
+                )
+            else:
+                reason = " ".join(error.messages)
+            report.invalid.append((line, reason))
+
+    taken_emails = _taken("email", (values["email"] for values in candidates))
+    taken_usernames = _taken(
+        "username", (values["username"] for values in candidates))
+
+    kept = []
+    for values in candidates:
+        email, username = values["email"], values["username"]
+        if email in taken_emails or username in taken_usernames:
+            report.duplicates += 1
+            continue
+        taken_emails.add(email)
+        taken_usernames.add(username)
+        kept.append(values)
+    return kept
+
+
+def _insert(users: list[User], report: ImportReport) -> None:
+    """
+    Insert a batch of users in one statement, or one by one if a user
+    signed up with one of their emails or usernames since they were
+    checked
+    """
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            # bulk_create skips the signals keeping the count.
+            RowCounter.objects.increment(User, len(users))
+        report.created += len(users)
+        return
+    except IntegrityError:
+        pass
+
+    created = 0
+    for user in users:
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user])
+        except IntegrityError:
+            report.duplicates += 1
+        else:
+            created += 1
+    if created:
+        RowCounter.objects.increment(User, created)
+    report.created += created
+
+
+def import_users(
+        rows: Iterable[Union[dict, InvalidRow]],
+        batch_size: int = 1000,
+        workers: Optional[int] = None
+) -> ImportReport:
+    """
+    Create a user for every valid row not clashing with an existing user.
+    Each batch is inserted in its own transaction.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    report = ImportReport()
+    numbered = enumerate(rows, 1)
+    pool = ProcessPoolExecutor(
+        workers, initializer=setup_worker) if workers > 1 else None
+    try:
+        while batch := list(islice(numbered, batch_size)):
+            kept = _clean_rows(batch, report)
+            if not kept:
+                continue
+            hashes = hash_passwords(
+                [values.pop("password") for values in kept], pool, workers)
+            _insert([
+                User(password=password, **values)
+                for values, password in zip(kept, hashes)
+            ], report)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return report
@@ -0,0 +1,100 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.recipes.models import Recipe
+from apps.recipes.views import RecipesListView
+from apps.users.blocks import exclude_blocked, get_block_set
+from core.benchmark import format_latencies, scratch_database, time_call
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the cost of leaving blocked users out of the recipe list "
+        "on a scratch database"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--users", type=int, default=5000)
+        parser.add_argument("--recipes", type=int, default=50_000)
+        parser.add_argument(
+            "--blocks", type=int, default=100,
+            help="Users the viewer blocked plus users who blocked them")
+        parser.add_argument("--repeat", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        rng = random.Random(options["seed"])
+        with scratch_database(on_disk=True):
+            User = get_user_model()
+            users = User.objects.bulk_create(
+                User(username=f"cook{index}", email=f"cook{index}@a.com")
+                for index in range(options["users"])
+            )
+            Recipe.objects.bulk_create(
+                (
+                    Recipe(
+                        name=f"Recipe {index}",
+                        description="",
+                        prep_time=5,
+                        cook_time=10,
+                        notes="",
+                        servings=2,
+                        author=rng.choice(users)
+                    )
+                    for index in range(options["recipes"])
+                ),
+                batch_size=5000
+            )
+            viewer, bystander = users[:2]
+            others = rng.sample(users[2:], options["blocks"])
+            half = len(others) // 2
+            viewer.blocking.add(*others[:half])
+            for blocker in others[half:]:
+                blocker.blocking.add(viewer)
+
+            blocks = User.blocking.through.objects
+            recipes = Recipe.objects.order_by("-created_at", "-id")
+
+            def page(queryset) -> None:
+                list(queryset.values_list("id")[:20])
+
+            self.stdout.write(format_latencies(
+                "block set read (cached)",
+                time_call(lambda: get_block_set(viewer), options["repeat"])))
+            self.stdout.write(format_latencies(
+                "page, no exclusion",
+                time_call(lambda: page(recipes), options["repeat"])))
+            self.stdout.write(format_latencies(
+                "page, cached id exclusion",
+                time_call(
+                    lambda: page(exclude_blocked(recipes, viewer)),
+                    options["repeat"])))
+            self.stdout.write(format_latencies(
+                "page, blocking subqueries",
+                time_call(
+                    lambda: page(recipes.exclude(
+                        author_id__in=blocks.filter(
+                            from_user_id=viewer.pk).values("to_user_id")
+                    ).exclude(
+                        author_id__in=blocks.filter(
+                            to_user_id=viewer.pk).values("from_user_id")
+                    )),
+                    options["repeat"])))
+
+            view = RecipesListView.as_view()
+            factory = APIRequestFactory()
+
+            def request_as(user) -> None:
+                request = factory.get("/api/recipes/")
+                force_authenticate(request, user)
+                view(request).render()
+
+            self.stdout.write(format_latencies(
+                "list request, no blocks",
+                time_call(lambda: request_as(bystander), options["repeat"])))
+            self.stdout.write(format_latencies(
+                f"list request, {options['blocks']} blocks",
+                time_call(lambda: request_as(viewer), options["repeat"])))
@@ -0,0 +1,123 @@
+import itertools
+import os
+import random
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.users import suggestions
+from apps.users.models import FollowSuggestion, User
+from apps.users.views import UserSuggestionsView
+from core.benchmark import (
+    format_latencies, scratch_database, stopwatch, time_call)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark computing and reading follow suggestions on a scratch "
+        "database with a power-law follower graph"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--users", type=int, default=20_000)
+        parser.add_argument(
+            "--follows", type=int, default=50,
+            help="Average number of users each user follows")
+        parser.add_argument(
+            "--skew", type=float, default=1.0,
+            help="Zipf exponent of user popularity")
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--reads", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        rng = random.Random(options["seed"])
+        limit = 20
+        with scratch_database(on_disk=True):
+            user_ids = self.create_users(options["users"])
+            self.create_follows(
+                rng, user_ids, options["follows"], options["skew"])
+
+            with stopwatch() as elapsed:
+                graph = suggestions.load_graph()
+            self.stdout.write(
+                f"Loaded {len(graph.follows.targets)} follows in "
+                f"{elapsed[0]:.1f}s")
+
+            for workers in sorted({1, options["workers"]}):
+                with stopwatch() as elapsed:
+                    rankings = [
+                        ranking
+                        for chunk in suggestions.rank_all(
+                            graph, limit, workers)
+                        for ranking in chunk
+                    ]
+                self.stdout.write(
+                    f"Ranked {len(rankings)} users with {workers} "
+                    f"worker(s) in {elapsed[0]:.1f}s")
+
+            with stopwatch() as elapsed:
+                stored = suggestions.store_rankings(graph, rankings)
+            self.stdout.write(
+                f"Stored {stored} suggestions in {elapsed[0]:.1f}s")
+
+            viewers = list(User.objects.filter(
+                pk__in=rng.sample(user_ids, min(len(user_ids), 1000))))
+            view = UserSuggestionsView.as_view()
+            factory = APIRequestFactory()
+
+            def read_suggestions() -> None:
+                request = factory.get("/api/users/suggestions/")
+                force_authenticate(request, rng.choice(viewers))
+                view(request).render()
+
+            def read_query() -> None:
+                list(FollowSuggestion.objects.filter(
+                    user=rng.choice(viewers)
+                ).select_related("suggested").order_by("rank"))
+
+            self.stdout.write(format_latencies(
+                "suggestions request",
+                time_call(read_suggestions, options["reads"])))
+            self.stdout.write(format_latencies(
+                "suggestions query", time_call(read_query, options["reads"])))
+
+    def create_users(self, count: int) -> list[int]:
+        with stopwatch() as elapsed:
+            User.objects.bulk_create(
+                (
+                    User(username=f"cook{index}", email=f"cook{index}@a.com")
+                    for index in range(count)
+                ),
+                batch_size=5000
+            )
+        self.stdout.write(f"Created {count} users in {elapsed[0]:.1f}s")
+        return list(User.objects.order_by("pk").values_list("pk", flat=True))
+
+    def create_follows(
+            self,
+            rng: random.Random,
+            user_ids: list[int],
+            follows: int,
+            skew: float
+    ) -> None:
+        """Let every user follow about `follows` users drawn by popularity"""
+        Follow = User.following.through
+        popular = user_ids[:]
+        rng.shuffle(popular)
+        weights = list(itertools.accumulate(
+            1 / (rank + 1) ** skew for rank in range(len(popular))))
+
+        rows = []
+        for user_id in user_ids:
+            picked = set(rng.choices(
+                popular, cum_weights=weights, k=rng.randint(1, 2 * follows)))
+            picked.discard(user_id)
+            rows.extend(
+                Follow(from_user_id=user_id, to_user_id=followed_id)
+                for followed_id in picked
+            )
+        with stopwatch() as elapsed:
+            Follow.objects.bulk_create(rows, batch_size=10_000)
+        self.stdout.write(f"Created {len(rows)} follows in {elapsed[0]:.1f}s")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.suggestions import compute_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the friends-of-friends follow suggestions of every user "
+        "from the whole follow graph"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--limit", type=int,
+            help="Suggestions kept per user (FOLLOW_SUGGESTIONS_PER_USER)")
+        parser.add_argument(
+            "--workers", type=int,
+            help="Ranking processes, one per CPU by default")
+
+    def handle(self, *args, **options) -> None:
+        stored = compute_suggestions(options["limit"], options["workers"])
+        self.stdout.write(f"Stored {stored} suggestions")
@@ -0,0 +1,47 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.importing import import_users, read_rows
+from core.benchmark import stopwatch
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV file with a header line or a JSON Lines "
+        "file, with username, email and password columns and optionally "
+        "first_name, last_name, bio and country"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format", choices=["csv", "jsonl"],
+            help="File format, guessed from the file extension by default")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers", type=int,
+            help="Password hashing processes, one per CPU by default")
+
+    def handle(self, *args, **options) -> None:
+        path = options["path"]
+        file_format = options["format"] or os.path.splitext(
+            path)[1].lstrip(".").lower()
+        if file_format not in ("csv", "jsonl"):
+            raise CommandError(
+                "Cannot tell the file format, pass --format csv or jsonl")
+
+        with open(path, newline="", encoding="utf-8") as file:
+            with stopwatch() as elapsed:
+                report = import_users(
+                    read_rows(file, file_format),
+                    options["batch_size"],
+                    options["workers"]
+                )
+        for line, reason in report.invalid:
+            self.stderr.write(f"Row {line} skipped: {reason}")
+        rate = report.created / elapsed[0] if elapsed[0] else 0
+        self.stdout.write(
+            f"Created {report.created} users in {elapsed[0]:.1f}s "
+            f"({rate:.0f} users/s), skipped {report.duplicates} taken "
+            f"emails or usernames and {len(report.invalid)} invalid rows")
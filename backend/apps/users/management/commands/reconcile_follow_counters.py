@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.counters.columns import reconcile_counters
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the follower and following counters of every user to fix "
+        "any drift"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options) -> None:
+        Follow = User.following.through
+        users: int = reconcile_counters(
+            User,
+            {
+                "follower_count": (Follow, "to_user"),
+                "following_count": (Follow, "from_user"),
+            },
+            options["batch_size"]
+        )
+        self.stdout.write(f"Reconciled {users} users")
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(child, field):
+    """Count of the child rows pointing at the outer row"""
+    return Coalesce(Subquery(
+        child.objects.filter(**{field: OuterRef("pk")}).order_by().values(
+            field).annotate(count=Count("pk")).values("count")
+    ), 0)
+
+
+def count_follows(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    Follow = User.following.through
+    User.objects.update(
+        follower_count=count_of(Follow, "to_user"),
+        following_count=count_of(Follow, "from_user")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_add_blocking_and_following_systems'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Follower count'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Following count'),
+        ),
+        migrations.RunPython(count_follows, migrations.RunPython.noop),
+    ]
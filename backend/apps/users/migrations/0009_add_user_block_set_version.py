@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_add_user_joined_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='block_set_version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Block set version'),
+        ),
+    ]
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Union
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Exists, OuterRef, Q
 from django.utils.translation import gettext_lazy as _
 from django_countries.fields import CountryField
 
@@ -13,6 +14,15 @@ if TYPE_CHECKING:
     from apps.users.models import User
 
 
+class Relationship(NamedTuple):
+    """How a user relates to the user viewing them"""
+
+    following: bool = False  # The viewer follows them.
+    followed_by: bool = False  # They follow the viewer.
+    blocking: bool = False  # The viewer has blocked them.
+    blocked_by: bool = False  # They have blocked the viewer.
+
+
 class User(AbstractUser):
     """
     Define the basic user authentication model along with profile data.
@@ -26,6 +36,14 @@ class User(AbstractUser):
     bio = models.TextField(_("Profile bio"), max_length=150, blank=True)
     country = CountryField(
         _("Country"), blank_label="(select country)", blank=True)
+    follower_count = models.PositiveIntegerField(
+        _("Follower count"), default=0)
+    following_count = models.PositiveIntegerField(
+        _("Following count"), default=0)
+    # Bumped whenever the user blocks or unblocks, or is blocked or
+    # unblocked, so every process drops its cached block set.
+    block_set_version = models.PositiveIntegerField(
+        _("Block set version"), default=0)
     
     following = models.ManyToManyField(
         "self",
@@ -43,25 +61,42 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Pages of the user list, newest first.
+            models.Index(
+                fields=["-date_joined", "-id"], name="user_joined_idx"),
+        ]
+
     def follow(self, user: User) -> bool:
         """Follow a user if not already following and not blocked by them"""
-        if self.is_following(user) or user.has_blocked(self):
+        relationship = self.relationship_to(user)
+        if relationship.following or relationship.blocked_by:
             return False
         self.following.add(user)
         return True
 
     def unfollow(self, user: User) -> bool:
         """Unfollow a user if already following and not blocked by them"""
-        if not self.is_following(user) or user.has_blocked(self):
+        relationship = self.relationship_to(user)
+        if not relationship.following or relationship.blocked_by:
             return False
         self.following.remove(user)
         return True
 
     def block(self, user: User) -> bool:
-        """Block a user if not already blocked"""
-        if self.has_blocked(user):
+        """
+        Block a user if not already blocked, ending follows between them in
+        both directions
+        """
+        relationship = self.relationship_to(user)
+        if relationship.blocking:
             return False
         self.blocking.add(user)
+        if relationship.following:
+            self.following.remove(user)
+        if relationship.followed_by:
+            user.following.remove(self)
         return True
 
     def unblock(self, user: User) -> bool:
@@ -72,14 +107,89 @@ class User(AbstractUser):
         return True
     
     def is_following(self, user: User) -> bool:
-        followed_user: User = self.following.filter(username=user.username)
-        return followed_user.first() is not None
+        return User.following.through.objects.filter(
+            from_user_id=self.pk, to_user_id=user.pk).exists()
 
     def has_blocked(self, user: User) -> bool:
         """See whether this user has blocked that user"""
-        blocked_user: User = self.blocking.filter(username=user.username)
-        return blocked_user.first() is not None
+        return User.blocking.through.objects.filter(
+            from_user_id=self.pk, to_user_id=user.pk).exists()
+
+    def blocked_user_ids(self) -> set[int]:
+        """Ids of the users this user blocked or was blocked by"""
+        blocks = User.blocking.through.objects.filter(
+            Q(from_user_id=self.pk) | Q(to_user_id=self.pk)
+        ).values_list("from_user_id", "to_user_id")
+        return {
+            to_user_id if from_user_id == self.pk else from_user_id
+            for from_user_id, to_user_id in blocks
+        }
+
+    def relationship_to(self, user: User) -> Relationship:
+        """How a user relates to this one, in a single query"""
+        return self.relationship_map([user])[user.pk]
+
+    def relationship_map(
+            self,
+            users: Iterable[Union[User, int]]
+    ) -> dict[int, Relationship]:
+        """
+        How each of the given users or user ids relates to this user, keyed
+        by id, in a single query however many users there are. Ids of users
+        that do not exist map to no relationship.
+        """
+        ids = {user if isinstance(user, int) else user.pk for user in users}
+        relationships = dict.fromkeys(ids, Relationship())
+        if not ids:
+            return relationships
+
+        follows = User.following.through.objects
+        blocks = User.blocking.through.objects
+        rows = User.objects.filter(pk__in=ids).annotate(
+            is_following=Exists(follows.filter(
+                from_user_id=self.pk, to_user_id=OuterRef("pk"))),
+            is_followed_by=Exists(follows.filter(
+                from_user_id=OuterRef("pk"), to_user_id=self.pk)),
+            is_blocking=Exists(blocks.filter(
+                from_user_id=self.pk, to_user_id=OuterRef("pk"))),
+            is_blocked_by=Exists(blocks.filter(
+                from_user_id=OuterRef("pk"), to_user_id=self.pk)),
+        ).values_list(
+            "pk",
+            "is_following",
+            "is_followed_by",
+            "is_blocking",
+            "is_blocked_by"
+        )
+        for pk, *flags in rows:
+            relationships[pk] = Relationship(*flags)
+        return relationships
 
     def __str__(self) -> str:
         return self.username
 
+
+class FollowSuggestion(models.Model):
+    """
+    Store a user suggested to another, ranked by how many of the users they
+    follow follow the suggested user, as computed by the
+    `compute_follow_suggestions` command
+    """
+
+    mutual_count = models.PositiveIntegerField(_("Followed by followees"))
+    rank = models.PositiveSmallIntegerField(_("Rank"))
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="follow_suggestions",
+        db_index=False
+    )
+    suggested = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "rank"], name="unique_suggestion_rank"),
+        ]
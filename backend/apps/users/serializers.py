@@ -1,9 +1,55 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, Optional, Union
+
+from django_countries.serializers import CountryFieldMixin
 from rest_framework import serializers
 
-from .models import User
+from .models import Relationship, User
+
+if TYPE_CHECKING:
+    from django.contrib.auth.models import AnonymousUser
+
+
+def relationship_context(
+        viewer: Union[User, AnonymousUser],
+        users: Iterable[User]
+) -> dict:
+    """
+    Serializer context giving each user's relationship to the viewer, built
+    with one query for the whole page
+    """
+    if not viewer.is_authenticated:
+        return {}
+    return {"relationships": viewer.relationship_map(users)}
+
+
+class UserSerializer(CountryFieldMixin, serializers.ModelSerializer):
+    """
+    A user's profile. Given the `relationship_context()` of a viewer, also
+    tells how each user relates to them; otherwise `relationship` is null.
+
+    Given `fields`, only those of its fields are output.
+    """
 
+    relationship = serializers.SerializerMethodField()
+
+    def __init__(
+            self,
+            *args,
+            fields: Optional[Iterable[str]] = None,
+            **kwargs
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def model_fields(cls, fields: Iterable[str]) -> list[str]:
+        """Model fields to load to output the given fields"""
+        return [name for name in fields if name != "relationship"]
 
-class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
@@ -15,5 +61,21 @@ class UserSerializer(serializers.ModelSerializer):
             "date_joined",
             "email",
             "bio",
-            "country"
-        ]
\ No newline at end of file
+            "country",
+            "follower_count",
+            "following_count",
+            "relationship"
+        ]
+        read_only_fields = ["follower_count", "following_count"]
+
+    def get_relationship(self, user: User) -> Optional[dict]:
+        relationships = self.context.get("relationships")
+        if relationships is None:
+            return None
+        return relationships.get(user.pk, Relationship())._asdict()
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "username"]
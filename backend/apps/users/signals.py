@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from apps.counters.columns import adjust_counter, adjust_counters
+from .blocks import invalidate_block_sets
+from .models import User
+
+
+@receiver(
+    m2m_changed, sender=User.following.through, dispatch_uid="count_follows")
+def count_follows(
+        sender: type,
+        instance: User,
+        action: str,
+        reverse: bool,
+        pk_set: set[int] | None,
+        **kwargs
+) -> None:
+    """
+    Shift the follower and following counts of both sides of follows.
+    `user.following` changes pass the followed ids, `user.followers`
+    changes the follower ids. Additions only pass the follows actually
+    made, while removals pass every id asked for, so they are counted
+    before the delete, in its transaction, from the follows that exist.
+    """
+    related = instance.followers if reverse else instance.following
+    if action == "post_add":
+        amount = 1
+    elif action == "pre_remove":
+        amount, pk_set = -1, set(related.filter(
+            pk__in=pk_set).values_list("pk", flat=True))
+    elif action == "pre_clear":
+        amount, pk_set = -1, set(related.values_list("pk", flat=True))
+    else:
+        return
+    if not pk_set:
+        return
+    if reverse:
+        own_field, other_field = "follower_count", "following_count"
+    else:
+        own_field, other_field = "following_count", "follower_count"
+    adjust_counter(User, instance.pk, own_field, amount * len(pk_set))
+    adjust_counters(User, pk_set, other_field, amount)
+
+
+@receiver(
+    m2m_changed, sender=User.blocking.through, dispatch_uid="drop_block_sets")
+def drop_block_sets(
+        sender: type,
+        instance: User,
+        action: str,
+        reverse: bool,
+        pk_set: set[int] | None,
+        **kwargs
+) -> None:
+    """
+    Drop the cached block sets of both sides of a block. The new versions
+    commit along with the block, so a read that sees one also sees it.
+    """
+    if action in ("post_add", "post_remove"):
+        user_ids = {instance.pk, *pk_set}
+    elif action == "pre_clear":
+        related = instance.blocked_by if reverse else instance.blocking
+        user_ids = {instance.pk, *related.values_list("pk", flat=True)}
+    else:
+        return
+    invalidate_block_sets(user_ids)
@@ -0,0 +1,93 @@
+"""
+Friends-of-friends follow suggestions, computed offline.
+
+`compute_suggestions` loads the whole follow graph into compact integer
+adjacency arrays (CSR: one offsets array and one flat targets array, over
+dense user indices), then ranks each user's candidates by how many of the
+users they follow follow them. Candidates already followed, the user
+themselves and users blocked in either direction are skipped. Ties go to
+the candidate with the most followers.
+
+Users are split into chunks ranked by a process pool (see `graph.py`), each
+worker holding one copy of the arrays; only the top `FOLLOW_SUGGESTIONS_PER_USER` of every
+user are sent back and stored in `FollowSuggestion`, one transaction per
+chunk, so the suggestion endpoint reads them with a single query.
+"""
+from __future__ import annotations
+
+import os
+from array import array
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from .graph import FollowGraph, Ranking, build_adjacency, rank_all
+from .models import FollowSuggestion, User
+
+
+def load_graph() -> FollowGraph:
+    """Read every follow and block into adjacency arrays, streaming rows"""
+    user_ids = array("q", User.objects.order_by("pk").values_list(
+        "pk", flat=True).iterator(chunk_size=50_000))
+    index = {user_id: node for node, user_id in enumerate(user_ids)}
+
+    def edges(through, both_ways: bool) -> Iterator[tuple[int, int]]:
+        rows = through.objects.order_by().values_list(
+            "from_user_id", "to_user_id").iterator(chunk_size=50_000)
+        for from_user_id, to_user_id in rows:
+            source = index.get(from_user_id)
+            target = index.get(to_user_id)
+            # Users who signed up after the users were read wait for the
+            # next run.
+            if source is None or target is None:
+                continue
+            yield source, target
+            if both_ways:
+                yield target, source
+
+    follows = build_adjacency(
+        len(user_ids), edges(User.following.through, both_ways=False))
+    blocks = build_adjacency(
+        len(user_ids), edges(User.blocking.through, both_ways=True))
+    follower_counts = array("i", bytes(4 * len(user_ids)))
+    for target in follows.targets:
+        follower_counts[target] += 1
+    return FollowGraph(user_ids, follows, blocks, follower_counts)
+
+
+def store_rankings(graph: FollowGraph, rankings: list[Ranking]) -> int:
+    """Replace the stored suggestions of the ranked users"""
+    user_ids = graph.user_ids
+    suggestions = [
+        FollowSuggestion(
+            user_id=user_ids[node],
+            suggested_id=user_ids[candidate],
+            mutual_count=mutual_count,
+            rank=rank
+        )
+        for node, candidates in rankings
+        for rank, (candidate, mutual_count) in enumerate(candidates, 1)
+    ]
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(
+            user_id__in=[user_ids[node] for node, _ in rankings]).delete()
+        FollowSuggestion.objects.bulk_create(suggestions, batch_size=5000)
+    return len(suggestions)
+
+
+def compute_suggestions(
+        limit: Optional[int] = None, workers: Optional[int] = None) -> int:
+    """
+    Recompute and store the suggestions of every user. Returns the number
+    of suggestions stored.
+    """
+    if limit is None:
+        limit = settings.FOLLOW_SUGGESTIONS_PER_USER
+    if workers is None:
+        workers = os.cpu_count() or 1
+    graph = load_graph()
+    stored = 0
+    for rankings in rank_all(graph, limit, workers):
+        stored += store_rankings(graph, rankings)
+    return stored
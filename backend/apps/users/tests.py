@@ -1,10 +1,26 @@
+import io
+import json
 import random
 import string
+import tempfile
+from io import StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
-
-from apps.users.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.counters.models import RowCounter
+from apps.engagement.models import Comment
+from apps.recipes.tests import RecipeTests
+from apps.users.blocks import exclude_blocked, get_block_set
+from apps.users.importing import import_users, read_rows
+from apps.users.models import FollowSuggestion, Relationship, User
+from apps.users.suggestions import compute_suggestions
 
 
 class UserTests(TestCase):
@@ -122,6 +138,423 @@ class UserTests(TestCase):
         self.assertFalse(self.user.has_blocked(hater_3))
 
 
+class RelationshipMapTests(TestCase):
+
+    def setUp(self):
+        self.viewer = UserTests.get_random_user()
+        self.users = [UserTests.get_random_user() for _ in range(4)]
+        fan, idol, troll, victim = self.users
+        self.viewer.follow(idol)
+        fan.follow(self.viewer)
+        self.viewer.block(troll)
+        victim.block(self.viewer)
+
+    def test_relationship_map(self):
+        fan, idol, troll, victim = self.users
+        with self.assertNumQueries(1):
+            relationships = self.viewer.relationship_map(
+                self.users + [fan.pk, 0])
+        self.assertEqual(relationships, {
+            fan.pk: Relationship(followed_by=True),
+            idol.pk: Relationship(following=True),
+            troll.pk: Relationship(blocking=True),
+            victim.pk: Relationship(blocked_by=True),
+            0: Relationship(),
+        })
+        with self.assertNumQueries(0):
+            self.assertEqual(self.viewer.relationship_map([]), {})
+
+    def test_follow_queries(self):
+        fan, idol, troll, victim = self.users
+        # One query for the relationship, then the blocked follow stops.
+        with self.assertNumQueries(1):
+            self.assertFalse(self.viewer.follow(victim))
+        with self.assertNumQueries(1):
+            self.assertFalse(self.viewer.follow(idol))
+        with self.assertNumQueries(1):
+            self.assertTrue(self.viewer.has_blocked(troll))
+
+    def test_users_list_relationships(self):
+        client = APIClient()
+        response = client.get("/api/users/")
+        self.assertTrue(all(
+            user["relationship"] is None for user in response.data["users"]))
+
+        client.force_authenticate(self.viewer)
+        # Cache the viewer's block set first.
+        client.get("/api/users/")
+        queries = self.users_list_queries(client)
+        for _ in range(10):
+            UserTests.get_random_user()
+        self.assertEqual(self.users_list_queries(client), queries)
+
+        response = client.get("/api/users/")
+        by_id = {
+            user["id"]: user["relationship"]
+            for user in response.data["users"]
+        }
+        self.assertEqual(
+            by_id[self.users[1].pk], Relationship(following=True)._asdict())
+        # Users blocked in either direction are not listed.
+        self.assertNotIn(self.users[2].pk, by_id)
+        self.assertNotIn(self.users[3].pk, by_id)
+
+    def users_list_queries(self, client: APIClient) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            client.get("/api/users/")
+        return len(queries)
+
+
+class UsersListTests(TestCase):
+
+    def setUp(self):
+        self.users = [UserTests.get_random_user() for _ in range(5)]
+        self.client = APIClient()
+
+    def test_pages(self):
+        first = self.client.get("/api/users/", {"limit": 3}).data
+        second = self.client.get(
+            "/api/users/", {"limit": 3, "cursor": first["next"]}).data
+        self.assertEqual(first["total_count"], 5)
+        self.assertEqual(
+            [user["id"] for user in first["users"] + second["users"]],
+            [user.pk for user in reversed(self.users)])
+        self.assertIsNone(second["next"])
+        self.assertNotIn("password", first["users"][0])
+
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/users/", {"fields": "username,country"})
+        self.assertEqual(
+            response.data["users"][0],
+            {"username": self.users[-1].username, "country": ""})
+        page_query = next(
+            query["sql"] for query in queries
+            if '"users_user"."date_joined"' in query["sql"])
+        for column in ("password", "bio", "email", "is_superuser"):
+            self.assertNotIn(f'"users_user"."{column}"', page_query)
+
+        response = self.client.get("/api/users/", {"fields": "id,password"})
+        self.assertEqual(response.status_code, 400)
+
+        for selection in ("", ","):
+            response = self.client.get("/api/users/", {"fields": selection})
+            self.assertEqual(
+                response.data["users"][0]["username"],
+                self.users[-1].username)
+
+
+class BlockSetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserTests.get_random_user()
+        self.blocked = UserTests.get_random_user()
+        self.blocker = UserTests.get_random_user()
+        self.user.block(self.blocked)
+        self.blocker.block(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cached_until_blocks_change(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(
+                get_block_set(self.user), {self.blocked.pk, self.blocker.pk})
+        # Only the version is read once the set is cached.
+        with self.assertNumQueries(1):
+            get_block_set(self.user)
+        self.assertEqual(get_block_set(self.blocked), {self.user.pk})
+
+        # Both sides see changes, whichever side of the relation made them.
+        self.blocker.unblock(self.user)
+        self.assertEqual(get_block_set(self.user), {self.blocked.pk})
+        self.blocked.blocked_by.clear()
+        self.assertEqual(get_block_set(self.user), frozenset())
+        self.assertEqual(get_block_set(self.blocked), frozenset())
+
+    def test_other_processes_see_changes(self):
+        get_block_set(self.user)
+        # Other processes keep their own caches, which nothing here drops.
+        with mock.patch.object(cache, "delete_many"), \
+                mock.patch.object(cache, "delete"):
+            self.blocker.unblock(self.user)
+        self.assertEqual(get_block_set(self.user), {self.blocked.pk})
+
+    def test_users_list(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.get("/api/users/").data
+        self.assertEqual(data["total_count"], 1)
+        self.assertEqual(
+            [user["id"] for user in data["users"]], [self.user.pk])
+
+    def test_follow_lists(self):
+        star = UserTests.get_random_user()
+        for fan in (self.user, self.blocked, self.blocker):
+            fan.follow(star)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.get(f"/api/users/{star.pk}/followers/").data
+        self.assertEqual(data["total_count"], 1)
+        self.assertEqual(
+            [user["id"] for user in data["users"]], [self.user.pk])
+
+    def test_exclude_blocked(self):
+        recipe = RecipeTests.get_generated_test_recipe(self.user)
+        comments = [
+            Comment.objects.create(text="Hi", recipe=recipe, author=author)
+            for author in (self.user, self.blocked, self.blocker, None)
+        ]
+        visible = exclude_blocked(Comment.objects.order_by("pk"), self.user)
+        self.assertEqual(list(visible), [comments[0], comments[3]])
+
+
+class FollowCountTests(TestCase):
+
+    def setUp(self):
+        self.user = UserTests.get_random_user()
+        self.fans = [UserTests.get_random_user() for _ in range(5)]
+        for fan in self.fans:
+            fan.follow(self.user)
+        self.user.follow(self.fans[0])
+        self.client = APIClient()
+
+    def assert_counts(self, user: User, followers: int, following: int):
+        user.refresh_from_db()
+        self.assertEqual(
+            (user.follower_count, user.following_count),
+            (followers, following))
+
+    def test_counts_follow_changes(self):
+        self.assert_counts(self.user, 5, 1)
+        self.assert_counts(self.fans[0], 1, 1)
+        self.assert_counts(self.fans[1], 0, 1)
+
+        # Repeated or refused changes leave the counts alone.
+        self.fans[1].follow(self.user)
+        self.fans[1].unfollow(self.fans[2])
+        self.assert_counts(self.user, 5, 1)
+
+        self.fans[1].unfollow(self.user)
+        self.assert_counts(self.user, 4, 1)
+        self.assert_counts(self.fans[1], 0, 0)
+
+        # Blocking ends follows both ways.
+        self.user.block(self.fans[0])
+        self.assert_counts(self.user, 3, 0)
+        self.assert_counts(self.fans[0], 0, 0)
+        self.assertFalse(self.fans[0].is_following(self.user))
+
+        # Removing follows that do not exist, directly on the relation.
+        self.fans[1].following.remove(self.user, self.fans[3])
+        self.user.followers.remove(self.fans[1], self.fans[2])
+        self.assert_counts(self.user, 2, 0)
+        self.assert_counts(self.fans[1], 0, 0)
+        self.assert_counts(self.fans[2], 0, 0)
+        self.assert_counts(self.fans[3], 0, 1)
+
+        self.user.followers.clear()
+        self.assert_counts(self.user, 0, 0)
+        self.assert_counts(self.fans[2], 0, 0)
+
+    def test_reconcile_command(self):
+        User.objects.update(follower_count=0, following_count=7)
+        call_command("reconcile_follow_counters", stdout=StringIO())
+        self.assert_counts(self.user, 5, 1)
+        self.assert_counts(self.fans[0], 1, 1)
+
+    def test_follow_lists(self):
+        url = f"/api/users/{self.user.pk}/followers/"
+        first = self.client.get(url, {"limit": 3})
+        self.assertEqual(first.data["total_count"], 5)
+        second = self.client.get(
+            url, {"limit": 3, "cursor": first.data["next"]})
+        listed = [user["id"] for user in first.data["users"]]
+        listed += [user["id"] for user in second.data["users"]]
+        self.assertEqual(listed, [fan.pk for fan in reversed(self.fans)])
+        self.assertIsNone(second.data["next"])
+
+        response = self.client.get(f"/api/users/{self.user.pk}/following/")
+        self.assertEqual(response.data["total_count"], 1)
+        self.assertEqual(
+            [user["id"] for user in response.data["users"]],
+            [self.fans[0].pk])
+
+        # Counting and paging the follows, whatever the page size.
+        with self.assertNumQueries(2):
+            self.client.get(url, {"limit": 5})
+        response = self.client.get("/api/users/999/followers/")
+        self.assertEqual(response.status_code, 404)
+
+
+class FollowSuggestionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = UserTests.get_random_user()
+        self.friends = [UserTests.get_random_user() for _ in range(3)]
+        self.popular, self.rising, self.niche, self.blocked = (
+            UserTests.get_random_user() for _ in range(4))
+        for friend in self.friends:
+            self.user.follow(friend)
+            friend.follow(self.popular)
+            friend.follow(self.blocked)
+        self.friends[0].follow(self.niche)
+        self.friends[1].follow(self.rising)
+        UserTests.get_random_user().follow(self.rising)
+        # Already followed by the user, so never suggested to them.
+        self.friends[0].follow(self.friends[1])
+        self.user.block(self.blocked)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def suggested(self, user: User) -> list[tuple[int, int]]:
+        return list(FollowSuggestion.objects.filter(user=user).order_by(
+            "rank").values_list("suggested_id", "mutual_count"))
+
+    def test_ranking(self):
+        for workers in (1, 2):
+            self.assertEqual(compute_suggestions(workers=workers), 4)
+            # Ties go to the user with the most followers.
+            self.assertEqual(self.suggested(self.user), [
+                (self.popular.pk, 3), (self.rising.pk, 1), (self.niche.pk, 1)
+            ])
+            self.assertEqual(
+                self.suggested(self.friends[0]), [(self.rising.pk, 1)])
+        self.assertEqual(compute_suggestions(limit=1, workers=1), 2)
+        self.assertEqual(self.suggested(self.user), [(self.popular.pk, 3)])
+
+    def test_users_joining_during_the_run_are_skipped(self):
+        late = UserTests.get_random_user()
+        late.follow(self.friends[0])
+        self.friends[0].follow(late)
+        # The users are read before the follows, which then include one
+        # of a user the run does not know of.
+        with mock.patch.object(
+                User, "objects", User.objects.exclude(pk=late.pk)):
+            self.assertEqual(compute_suggestions(workers=1), 4)
+        self.assertEqual(self.suggested(self.user), [
+            (self.popular.pk, 3), (self.rising.pk, 1), (self.niche.pk, 1)])
+
+    def test_endpoint(self):
+        compute_suggestions(workers=1)
+        response = self.client.get("/api/users/suggestions/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (result["user"]["id"], result["mutual_count"])
+                for result in response.data["results"]
+            ],
+            [(self.popular.pk, 3), (self.rising.pk, 1), (self.niche.pk, 1)]
+        )
+
+        # Follows and blocks made since the job ran are honoured, in one
+        # query besides the block set version once the set is cached.
+        self.user.follow(self.popular)
+        self.niche.block(self.user)
+        self.client.get("/api/users/suggestions/")
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/users/suggestions/")
+        self.assertEqual(
+            [result["user"]["id"] for result in response.data["results"]],
+            [self.rising.pk])
+        self.assertEqual(
+            APIClient().get("/api/users/suggestions/").status_code, 403)
+
+
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ImportUsersTests(TestCase):
+
+    def setUp(self):
+        self.existing = UserTests.get_random_user()
+        self.rows = [
+            {"username": "ada", "email": "Ada@Example.COM", "password": "pw1"},
+            {"username": "grace", "email": "grace@a.com", "bio": "Cook"},
+            # Clashing with a row above, an existing user, or invalid.
+            {"username": "ada", "email": "other@a.com", "password": "pw"},
+            {"username": "x", "email": self.existing.email.replace(
+                "gmail.com", "GMAIL.com")},
+            {"username": self.existing.username, "email": "new@a.com"},
+            {"username": "", "email": "nobody@a.com"},
+        ]
+
+    def test_import(self):
+        before = RowCounter.objects.get_count(User)
+        for workers in (1, 2):
+            report = import_users(self.rows, batch_size=2, workers=workers)
+            # A second run only finds users taken by the first.
+            created = 2 if workers == 1 else 0
+            self.assertEqual(report.created, created)
+            self.assertEqual(report.duplicates, 5 - created)
+            self.assertEqual(
+                report.invalid, [(6, "missing username or email")])
+
+        ada = User.objects.get(username="ada")
+        self.assertEqual(ada.email, "Ada@example.com")
+        self.assertTrue(ada.check_password("pw1"))
+        grace = User.objects.get(username="grace")
+        self.assertEqual(grace.bio, "Cook")
+        self.assertFalse(grace.has_usable_password())
+        self.assertEqual(RowCounter.objects.get_count(User), before + 2)
+
+    def test_invalid_rows_are_reported(self):
+        lines = [
+            '{"username": "ada", "email": "ada@a.com"}',
+            '{"username": "bob", "email": ',
+            '["bob", "bob@a.com"]',
+            '{"username": 5, "email": "five@a.com"}',
+            '{"username": "no spaces", "email": "cy@a.com"}',
+            '{"username": "dee", "email": "not-an-email"}',
+            '{"username": "eve", "email": "eve@a.com", "bio": "%s"}'
+            % ("b" * 151),
+            '{"username": "fay", "email": "fay@a.com", "country": "XX"}',
+            '{"username": "gus", "email": "gus@a.com", "country": "FR"}',
+        ]
+        report = import_users(
+            read_rows(io.StringIO("\n".join(lines)), "jsonl"), workers=1)
+        self.assertEqual(report.created, 2)
+        self.assertEqual(
+            [line for line, _ in report.invalid], [2, 3, 4, 5, 6, 7, 8])
+        self.assertIn("unreadable JSON", report.invalid[0][1])
+        self.assertEqual(report.invalid[2][1], "username is not text")
+        self.assertTrue(report.invalid[3][1].startswith("username:"))
+        self.assertEqual(
+            sorted(User.objects.filter(
+                username__in=["ada", "gus"]).values_list("country", flat=True)),
+            ["", "FR"])
+
+    def test_concurrent_signups(self):
+        # Users signing up after the batch was checked for taken values.
+        with mock.patch(
+                "apps.users.importing._taken", return_value=set()):
+            report = import_users(self.rows[:2] + [{
+                "username": "late", "email": self.existing.email}], workers=1)
+        self.assertEqual((report.created, report.duplicates), (2, 1))
+        self.assertTrue(User.objects.filter(username="grace").exists())
+        self.assertFalse(User.objects.filter(username="late").exists())
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write("username,email,password\n")
+            file.write("ada,ada@a.com,pw1\nbob,bob@a.com,pw2\n")
+            file.flush()
+            out = StringIO()
+            call_command("import_users", file.name, "--workers=2", stdout=out)
+        self.assertIn("Created 2 users", out.getvalue())
+        self.assertTrue(User.objects.get(username="bob").check_password("pw2"))
+
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl") as file:
+            file.write(json.dumps(
+                {"username": "cy", "email": "cy@a.com", "password": "x"}))
+            file.flush()
+            call_command("import_users", file.name, stdout=StringIO())
+        self.assertTrue(User.objects.filter(username="cy").exists())
+
+
 class UserManagerTests(TestCase):
 
     def test_create_user(self):
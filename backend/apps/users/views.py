@@ -3,36 +3,100 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from .models import User
-from .serializers import UserSerializer
+from apps.counters.models import RowCounter
+from core.pagination import KeysetPaginator
+from .blocks import exclude_blocked, get_block_set
+from .models import FollowSuggestion, User
+from .serializers import (
+    UserSerializer, UserSummarySerializer, relationship_context)
 
 if TYPE_CHECKING:
     from rest_framework.request import Request
 
 
 class UsersListView(APIView):
-    
+    paginator = KeysetPaginator(ordering=("-date_joined", "-id"))
+
     def get(self, request: Request) -> Response:
-        """List all the users in the database with additional meta"""
-        users = User.objects.all()
-        total_count: int = User.objects.count()
-        serializer = UserSerializer(users, many=True)
+        """
+        List a page of users, latest to join first, with additional meta.
+
+        Paginated with `?limit=` and `?cursor=` like the recipe list.
+        `?fields=` takes a comma-separated subset of the user fields to
+        output, and only the columns behind them are loaded; an empty
+        subset outputs them all. Users blocked in either direction are left
+        out.
+        """
+        fields = UserSerializer.Meta.fields
+        if "fields" in request.query_params:
+            fields = [
+                name
+                for name in request.query_params["fields"].split(",")
+                if name
+            ] or UserSerializer.Meta.fields
+            unknown = set(fields) - set(UserSerializer.Meta.fields)
+            if unknown:
+                return Response(data={"message": f"Unknown fields: {', '.join(sorted(unknown))}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The ordering fields are needed for the cursors.
+        columns = {
+            *UserSerializer.model_fields(fields), *self.paginator.fields}
+        block_set = get_block_set(request.user)
+        users, cursors = self.paginator.paginate(
+            User.objects.exclude(pk__in=block_set).only(*columns), request)
+        # Blocks go away with either user, so every blocked id is counted.
+        total_count: int = (
+            RowCounter.objects.get_count(User) - len(block_set))
+        context = {}
+        if "relationship" in fields:
+            context = relationship_context(request.user, users)
+        serializer = UserSerializer(
+            users, many=True, fields=fields, context=context)
 
         return Response(data={
-            "total_count": total_count, "users": serializer.data
+            "total_count": total_count,
+            **cursors,
+            "users": serializer.data
         }, status=status.HTTP_200_OK)
 
 
+class UserSuggestionsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request) -> Response:
+        """
+        List users followed by many of the users the requesting user
+        follows, best first, as ranked by `compute_follow_suggestions`.
+        Users followed or blocked in either direction since are left out.
+        """
+        suggestions = exclude_blocked(
+            FollowSuggestion.objects.filter(user=request.user).exclude(
+                suggested__followers=request.user),
+            request.user,
+            field="suggested"
+        ).select_related("suggested").order_by("rank")
+        results = [
+            {
+                "mutual_count": suggestion.mutual_count,
+                "user": UserSummarySerializer(suggestion.suggested).data
+            }
+            for suggestion in suggestions
+        ]
+        return Response(data={"results": results}, status=status.HTTP_200_OK)
+
+
 class UserDetailView(APIView):
 
     def get(self, request: Request, pk: int, *args, **kwargs) -> Response:
         """Get a detailed view of a user's info"""
         try:
             user = User.objects.get(pk=pk)
-            serializer = UserSerializer(user)
+            serializer = UserSerializer(
+                user, context=relationship_context(request.user, [user]))
             return Response(serializer.data, status=status.HTTP_200_OK)
         except User.DoesNotExist:
             return Response(data={"message": "User does not exist"}, status=status.HTTP_404_NOT_FOUND)
@@ -46,3 +110,55 @@ class UserDetailView(APIView):
 
         return Response(data={"message": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
+
+class FollowListView(APIView):
+    """
+    List a page of the users on one side of a user's follows, latest follow
+    first, paginated with `?limit=` and `?cursor=` like the recipe list.
+
+    Pages are read from the follow table's index on the user's side, and
+    the total comes from the user's maintained counter. Users blocked in
+    either direction are left out.
+    """
+
+    paginator = KeysetPaginator(ordering=("-id",))
+    user_field: str  # Side of the follow holding the requested user.
+    listed_field: str  # Side of the follow holding the listed users.
+    count_field: str
+
+    def get(self, request: Request, pk: int) -> Response:
+        total_count = User.objects.filter(pk=pk).values_list(
+            self.count_field, flat=True).first()
+        if total_count is None:
+            return Response(data={"message": "User does not exist"}, status=status.HTTP_404_NOT_FOUND)
+
+        follows = User.following.through.objects.filter(
+            **{f"{self.user_field}_id": pk}).select_related(self.listed_field)
+        block_set = get_block_set(request.user)
+        if block_set:
+            total_count -= follows.filter(
+                **{f"{self.listed_field}_id__in": block_set}).count()
+            follows = follows.exclude(
+                **{f"{self.listed_field}_id__in": block_set})
+        page, cursors = self.paginator.paginate(follows, request)
+        serializer = UserSummarySerializer(
+            [getattr(follow, self.listed_field) for follow in page],
+            many=True
+        )
+        return Response(data={
+            "total_count": total_count,
+            **cursors,
+            "users": serializer.data
+        }, status=status.HTTP_200_OK)
+
+
+class UserFollowersView(FollowListView):
+    user_field = "to_user"
+    listed_field = "from_user"
+    count_field = "follower_count"
+
+
+class UserFollowingView(FollowListView):
+    user_field = "from_user"
+    listed_field = "to_user"
+    count_field = "following_count"
@@ -0,0 +1,75 @@
+"""
+Small helpers shared by the `bench_*` management commands.
+
+Benchmarks report latencies in milliseconds as percentiles so results from
+different runs and machines can be compared at a glance.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def time_call(fn: Callable[[], object], repeat: int) -> list[float]:
+    """Run a callable several times and return each duration in seconds"""
+    samples: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def format_latencies(label: str, samples: list[float]) -> str:
+    """One-line p50/p95/p99 summary of samples given in seconds"""
+    return (
+        f"{label}: n={len(samples)} "
+        f"p50={percentile(samples, 50) * 1000:.3f}ms "
+        f"p95={percentile(samples, 95) * 1000:.3f}ms "
+        f"p99={percentile(samples, 99) * 1000:.3f}ms"
+    )
+
+
+@contextmanager
+def stopwatch() -> Iterator[list[float]]:
+    """Measure a block; the elapsed seconds are appended to the yielded list"""
+    elapsed: list[float] = []
+    start = time.perf_counter()
+    try:
+        yield elapsed
+    finally:
+        elapsed.append(time.perf_counter() - start)
+
+
+@contextmanager
+def scratch_database(on_disk: bool = False) -> Iterator[None]:
+    """
+    Run a benchmark against a throwaway copy of the test database so it
+    never touches real data. Benchmarks writing from several threads need
+    it `on_disk` to see real file locking.
+    """
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment, teardown_test_environment)
+
+    if on_disk:
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(
+            tempfile.mkdtemp(), "bench.sqlite3")
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
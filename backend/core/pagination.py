@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import TYPE_CHECKING, Any, Optional
+
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+
+if TYPE_CHECKING:
+    from django.db.models import Model
+    from django.db.models.query import QuerySet
+    from rest_framework.request import Request
+
+
+def get_limit(request: Request, default: int, maximum: int) -> int:
+    """Read `?limit=` from the request, clamped between 1 and the maximum"""
+    try:
+        limit = int(request.query_params.get("limit", default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking past the last row seen instead of using
+    an OFFSET, so every page costs the same regardless of how deep it is.
+
+    The ordering must be unique (end it with the primary key) and every
+    field in it must be sorted in the same direction. Cursors are opaque,
+    url-safe strings holding the boundary row's ordering values and the
+    direction to seek in.
+    """
+
+    default_limit: int = 20
+    max_limit: int = 100
+
+    def __init__(
+            self,
+            ordering: tuple[str, ...] = ("-created_at", "-id"),
+            default_limit: Optional[int] = None,
+            max_limit: Optional[int] = None
+    ) -> None:
+        descending = {field.startswith("-") for field in ordering}
+        if len(descending) != 1:
+            raise ValueError(_("Ordering fields must share one direction"))
+        self.ordering = ordering
+        self.descending: bool = descending.pop()
+        self.fields: list[str] = [field.lstrip("-") for field in ordering]
+        if default_limit is not None:
+            self.default_limit = default_limit
+        if max_limit is not None:
+            self.max_limit = max_limit
+
+    def get_limit(self, request: Request) -> int:
+        """Read `?limit=` from the request, clamped to the allowed range"""
+        return get_limit(request, self.default_limit, self.max_limit)
+
+    def encode_cursor(self, row: Model, reverse: bool) -> str:
+        """Build an opaque cursor pointing just past the given row"""
+        position = [str(getattr(row, field)) for field in self.fields]
+        payload = json.dumps({"p": position, "r": reverse}).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    def decode_cursor(
+            self, model: type[Model], cursor: str) -> tuple[list[Any], bool]:
+        """Turn a cursor back into typed ordering values and a direction"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded))
+            position, reverse = payload["p"], bool(payload["r"])
+            if len(position) != len(self.fields):
+                raise ValueError
+            values = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, position)
+            ]
+        except Exception:
+            raise NotFound(_("Invalid cursor"))
+        return values, reverse
+
+    def seek_filter(self, values: list[Any], reverse: bool) -> Q:
+        """
+        Build the row-value comparison `(a, b) < (x, y)` as nested Q objects
+        so it works on every database backend.
+
+        The extra inclusive bound on the leading field lets the database
+        start an index range search at the cursor instead of scanning every
+        earlier entry.
+        """
+        forward_lookup = "lt" if self.descending else "gt"
+        backward_lookup = "gt" if self.descending else "lt"
+        lookup = backward_lookup if reverse else forward_lookup
+
+        condition = Q(**{f"{self.fields[-1]}__{lookup}": values[-1]})
+        for field, value in zip(
+                reversed(self.fields[:-1]), reversed(values[:-1])):
+            condition = (
+                Q(**{f"{field}__{lookup}": value})
+                | (Q(**{field: value}) & condition)
+            )
+        if len(self.fields) == 1:
+            return condition
+        return Q(**{f"{self.fields[0]}__{lookup}e": values[0]}) & condition
+
+    def position(self, row: Model) -> tuple:
+        """Ordering values of a row"""
+        return tuple(getattr(row, field) for field in self.fields)
+
+    def paginate(
+            self, queryset: QuerySet, request: Request) -> tuple[list, dict]:
+        """
+        Return the rows of the requested page along with the `next` and
+        `previous` cursors, either of which is `None` at the ends.
+        """
+        return self.paginate_union([queryset], request)
+
+    def paginate_union(
+            self,
+            querysets: list[QuerySet],
+            request: Request
+    ) -> tuple[list, dict]:
+        """
+        Paginate the rows of several querysets as one ordered sequence, each
+        queryset seeking with the same cursor and fetching one page at most.
+        The ordering fields must be readable on every queryset's rows (as
+        annotations if need be), and rows sharing ordering values across
+        querysets are returned once. Cursors are decoded with the first
+        queryset's model.
+        """
+        limit = self.get_limit(request)
+        cursor = request.query_params.get("cursor")
+        values: Optional[list[Any]] = None
+        reverse = False
+
+        if cursor:
+            values, reverse = self.decode_cursor(querysets[0].model, cursor)
+
+        if reverse:
+            ordering = [
+                field[1:] if field.startswith("-") else f"-{field}"
+                for field in self.ordering
+            ]
+        else:
+            ordering = self.ordering
+
+        # Fetch one extra row to know if there is anything past this page.
+        merged: dict[tuple, Model] = {}
+        for queryset in querysets:
+            if values is not None:
+                queryset = queryset.filter(self.seek_filter(values, reverse))
+            for row in queryset.order_by(*ordering)[:limit + 1]:
+                merged.setdefault(self.position(row), row)
+        positions = sorted(merged, reverse=self.descending != reverse)
+        rows = [merged[position] for position in positions[:limit + 1]]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if reverse:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or reverse:
+                next_cursor = self.encode_cursor(rows[-1], reverse=False)
+            if cursor and (has_more or not reverse):
+                previous_cursor = self.encode_cursor(rows[0], reverse=True)
+
+        return rows, {"next": next_cursor, "previous": previous_cursor}
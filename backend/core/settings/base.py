@@ -41,7 +41,9 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
 
+    'apps.counters.apps.CountersConfig',
     'apps.engagement.apps.EngagementConfig',
+    'apps.feed.apps.FeedConfig',
     'apps.recipes.apps.RecipesConfig',
     'apps.uploads.apps.UploadsConfig',
     'apps.users.apps.UsersConfig',
@@ -89,6 +91,25 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'social-cookbook',
+    }
+}
+
+# Seconds a serialized recipe detail stays cached. Entries are also dropped
+# by signals whenever the recipe or anything shown with it changes.
+RECIPE_DETAIL_CACHE_TIMEOUT = 60 * 60
+
+# Seconds a user's set of blocked and blocking users stays cached. Sets are
+# also read again by every process whenever either side blocks or unblocks.
+BLOCK_SET_CACHE_TIMEOUT = 60 * 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -132,3 +153,75 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Recipe matching
+# Seconds before a process reloads its in-memory pantry ingredient index to
+# pick up writes made by other processes.
+
+PANTRY_INDEX_MAX_AGE = 300
+
+
+# Like write-behind
+# When enabled, recipe likes are queued in each process and coalesced per
+# user, then written in one transaction every LIKE_FLUSH_INTERVAL_MS
+# milliseconds or as soon as LIKE_FLUSH_MAX_EVENTS are waiting. Meant for
+# viral recipes whose counter row would otherwise be locked by every like.
+
+LIKE_WRITE_BEHIND = os.environ.get("LIKE_WRITE_BEHIND", "") == "1"
+LIKE_FLUSH_INTERVAL_MS = 200
+LIKE_FLUSH_MAX_EVENTS = 500
+
+
+# Trending recipes
+# Engagement counts half as much toward a recipe's trending score after
+# every TRENDING_HALF_LIFE_HOURS. Stored scores are rescaled to the current
+# time once they are older than TRENDING_DECAY_INTERVAL_MINUTES.
+
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_DECAY_INTERVAL_MINUTES = 60
+
+
+# Live engagement
+# Broker carrying live like and comment updates to recipe viewers, the
+# seconds between keep-alive lines of an idle stream, and the seconds after
+# which a stream ends and the browser reconnects.
+
+LIVE_BROKER = 'apps.engagement.live.LocalBroker'
+LIVE_HEARTBEAT_SECONDS = 15
+LIVE_STREAM_MAX_SECONDS = 5 * 60
+
+
+# Home feed
+# Recipes are copied into the feed of each follower of their author when
+# published, unless the author has more than FEED_FANOUT_MAX_FOLLOWERS
+# followers; feeds pull such authors' recipes when read instead. Following
+# someone copies their latest FEED_BACKFILL_RECIPES recipes.
+
+FEED_FANOUT_MAX_FOLLOWERS = 5000
+FEED_BACKFILL_RECIPES = 50
+
+
+# Follow suggestions
+# Number of friends-of-friends suggestions kept per user each time the
+# compute_follow_suggestions command runs.
+
+FOLLOW_SUGGESTIONS_PER_USER = 20
+
+
+# Picture uploads
+# Folders of uploaded pictures within the media storage, and the variants
+# made of every picture as (width, height) boxes the picture is shrunk to
+# fit. Variants are made by a pool of PICTURE_WORKERS threads outside of
+# requests; with no workers they are made before the upload is answered.
+
+PICTURES_LOCATION = 'pictures'
+PROFILE_PICTURES_LOCATION = 'profile_pictures'
+RECIPE_PICTURES_LOCATION = 'recipe_pictures'
+PICTURE_VARIANTS = {
+    "full": (1600, 1600),
+    "card": (600, 400),
+    "thumbnail": (150, 150),
+}
+PICTURE_WORKERS = 2
+PICTURE_MAX_BYTES = 10 * 1024 * 1024
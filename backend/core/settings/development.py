@@ -4,5 +4,4 @@ DEBUG = True
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-PROFILE_PICTURES_LOCATION = 'profile_pictures'
-RECIPE_PICTURES_LOCATION = 'recipe_pictures'
\ No newline at end of file
+DEFAULT_FILE_STORAGE = 'core.storage_backends.LocalMediaStorage'
\ No newline at end of file
@@ -1,6 +1,11 @@
+from django.core.files.storage import FileSystemStorage
 from storages.backends.s3boto3 import S3Boto3Storage
 
 
+class LocalMediaStorage(FileSystemStorage):
+    """Media kept in MEDIA_ROOT and served from MEDIA_URL, for development"""
+
+
 class PublicMediaStorage(S3Boto3Storage):
     location = 'media'  # Bucket subfolder name.
     default_acl = 'public-read'  # Access type.
@@ -14,20 +14,82 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
 from apps.users import views as user_views
 from apps.recipes import views as recipe_views
+from apps.engagement import views as engagement_views
+from apps.feed import views as feed_views
+from apps.uploads import views as upload_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
 
     # Accounts.
     path('api/users/', user_views.UsersListView.as_view()),
+    path(
+        'api/users/suggestions/',
+        user_views.UserSuggestionsView.as_view()
+    ),
     path('api/users/<int:pk>/', user_views.UserDetailView.as_view()),
+    path(
+        'api/users/<int:pk>/followers/',
+        user_views.UserFollowersView.as_view()
+    ),
+    path(
+        'api/users/<int:pk>/following/',
+        user_views.UserFollowingView.as_view()
+    ),
+    path(
+        'api/users/<int:pk>/picture/',
+        upload_views.UserProfilePictureView.as_view()
+    ),
 
     # Recipes.
     path('api/recipes/', recipe_views.RecipesListView.as_view()),
-    path('api/recipes/<int:pk>/', recipe_views.RecipeDetailView.as_view())
+    path('api/recipes/search/', recipe_views.RecipeSearchView.as_view()),
+    path('api/recipes/pantry/', recipe_views.RecipePantryView.as_view()),
+    path(
+        'api/recipes/trending/',
+        engagement_views.TrendingRecipesView.as_view()
+    ),
+    path('api/recipes/<int:pk>/', recipe_views.RecipeDetailView.as_view()),
+
+    # Engagement.
+    path(
+        'api/recipes/<int:pk>/comments/',
+        engagement_views.RecipeCommentsView.as_view()
+    ),
+    path(
+        'api/recipes/<int:pk>/like/',
+        engagement_views.RecipeLikeView.as_view()
+    ),
+    path(
+        'api/recipes/<int:pk>/live/',
+        engagement_views.RecipeLiveView.as_view()
+    ),
+    path(
+        'api/comments/<int:pk>/like/',
+        engagement_views.CommentLikeView.as_view()
+    ),
+
+    # Feed.
+    path('api/feed/', feed_views.FeedView.as_view()),
+
+    # Uploads.
+    path(
+        'api/recipes/<int:pk>/pictures/',
+        upload_views.RecipePicturesView.as_view()
+    ),
+    path(
+        'api/uploads/<int:pk>/',
+        upload_views.PictureUploadDetailView.as_view()
+    ),
 ]
+
+if settings.DEBUG:
+    urlpatterns += static(
+        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
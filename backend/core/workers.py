@@ -0,0 +1,13 @@
+"""
+Process pool helpers.
+
+Workers started with "spawn" rather than "fork" begin unconfigured, and
+they import the module of the pool's initializer before running it. The
+initializer therefore lives here, away from any module importing models.
+"""
+import django
+
+
+def setup_worker() -> None:
+    """Pool initializer setting Django up in a fresh worker"""
+    django.setup()